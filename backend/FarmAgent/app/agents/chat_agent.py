@@ -1,9 +1,7 @@
-import os
-import google.generativeai as genai
+from ..clients.llm import llm
 
-# Environment variables are already loaded globally in main.py
-# So here we just configure the API key
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Environment variables are already loaded globally in main.py;
+# the LLM gateway picks up GOOGLE_API_KEY on its first call
 
 def create_chat_prompt(farmer, user_question, weather_data, risk_scores):
     """Creates the context-aware prompt for the chatbot"""
@@ -39,8 +37,7 @@ async def generate_chat_response(farmer, user_question, weather_data, risk_score
     prompt = create_chat_prompt(farmer, user_question, weather_data, risk_scores)
     
     try:
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content(prompt)
+        response = await llm.generate(prompt, model='gemini-pro')
         return response.text.strip()
     except Exception as e:
         print(f"Chat error: {e}")
@@ -4,19 +4,21 @@ from dotenv import load_dotenv
 import json
 import subprocess
 import shutil
+from serving.lazy import LazyResource
 
 PERISKOPE_API_KEY = os.getenv("PERISKOPE_API_KEY")
 PERISKOPE_PHONE_ID = os.getenv("PERISKOPE_PHONE_ID", "")
 
 # Full path to npx.cmd (Windows). Auto-detect if possible.
 NPX_PATH = shutil.which("npx") or "npx"
-# Start MCP process once for the whole module
-MCP_PROC = None
-if not NPX_PATH or not os.path.exists(NPX_PATH):
-    print(f"❌ ERROR: npx not found. Check Node.js installation or NPX_PATH ({NPX_PATH})")
-else:
+
+def start_mcp_process():
+    """Starts the MCP process once, on the first alert rather than at import time"""
+    if not NPX_PATH or not os.path.exists(NPX_PATH):
+        print(f"❌ ERROR: npx not found. Check Node.js installation or NPX_PATH ({NPX_PATH})")
+        return None
     try:
-        MCP_PROC = subprocess.Popen(
+        proc = subprocess.Popen(
             [NPX_PATH, "-y", "@periskope/whatsapp-mcp", "--transport", "stdio"],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
@@ -24,9 +26,13 @@ else:
             universal_newlines=True
         )
         print("✅ MCP process started successfully")
+        return proc
     except Exception as e:
         print(f"❌ Failed to start MCP process: {e}")
-        MCP_PROC = None
+        return None
+
+# Not preloaded by default: set PRELOAD_MODELS=all (or include whatsapp_mcp) to start it at boot
+mcp_process = LazyResource("whatsapp_mcp", start_mcp_process, preload=False)
 
 def send_whatsapp_alert(phone_number: str, message: str) -> bool:
     """
@@ -40,6 +46,7 @@ def send_whatsapp_alert(phone_number: str, message: str) -> bool:
         print("❌ ERROR: PERISKOPE_API_KEY or PERISKOPE_PHONE_ID missing in .env")
         return False
 
+    MCP_PROC = mcp_process.get()
     if not MCP_PROC:
         print("❌ ERROR: MCP process not running. Start it manually or check NPX_PATH")
         return False
@@ -1,30 +1,140 @@
+import asyncio
+import math
 import os
-import google.generativeai as genai
+import threading
 from dotenv import load_dotenv
 from pathlib import Path
+from serving.lru import LRUCache
+from ..clients.llm import llm, LLMTimeout
 
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Advice is shared by every farmer with the same crop, stage, district and (bucketed) risk profile;
+# only the name differs. ADVICE_RISK_BUCKET=0.1 groups 0.60-0.69 disease risk together, etc.
+ADVICE_CACHE_TTL = float(os.getenv("ADVICE_CACHE_TTL", 6 * 3600))
+ADVICE_CACHE_SIZE = int(os.getenv("ADVICE_CACHE_SIZE", 10000))
+ADVICE_RISK_BUCKET = float(os.getenv("ADVICE_RISK_BUCKET", 0.1))
+ADVICE_LLM_TIMEOUT = float(os.getenv("ADVICE_LLM_TIMEOUT", 8))
+# After a timeout/error the profile gets the template for this long instead of every farmer waiting again
+ADVICE_FAILURE_TTL = float(os.getenv("ADVICE_FAILURE_TTL", 120))
+NAME_SLOT = "{name}"
 
-async def generate_advice(farmer: dict, weather: dict, risks: dict) -> str:
-    prompt = f"""
+advice_cache = LRUCache(maxsize=ADVICE_CACHE_SIZE, ttl=ADVICE_CACHE_TTL)
+failed_profiles = LRUCache(maxsize=ADVICE_CACHE_SIZE, ttl=ADVICE_FAILURE_TTL)
+_inflight = {}
+_counters = {"requests": 0, "coalesced": 0, "llm_calls": 0, "llm_timeouts": 0, "llm_errors": 0, "template_fallbacks": 0}
+_counters_lock = threading.Lock()
+
+# First match wins, so "thunderstorm with light rain" is a storm
+CONDITION_CLASSES = (
+    ("thunder", "storm"), ("squall", "storm"), ("tornado", "storm"),
+    ("rain", "rain"), ("drizzle", "rain"), ("shower", "rain"),
+    ("snow", "snow"), ("sleet", "snow"),
+    ("mist", "haze"), ("fog", "haze"), ("haze", "haze"), ("smoke", "haze"), ("dust", "haze"), ("sand", "haze"),
+    ("cloud", "cloudy"), ("overcast", "cloudy"),
+    ("clear", "clear"),
+)
+
+def _count(name: str):
+    with _counters_lock:
+        _counters[name] += 1
+
+def condition_class(conditions: str) -> str:
+    text = str(conditions).lower()
+    for word, label in CONDITION_CLASSES:
+        if word in text:
+            return label
+    return "other"
+
+def risk_bucket(value: float) -> int:
+    return int(math.floor(float(value) / ADVICE_RISK_BUCKET + 1e-9))
+
+def advice_key(farmer: dict, weather: dict, risks: dict) -> tuple:
+    return (
+        str(farmer.get('crop')).strip().lower(),
+        str(farmer.get('growth_stage')).strip().lower(),
+        str(farmer.get('district')).strip().lower(),
+        risk_bucket(risks['disease_risk']),
+        risk_bucket(risks['pest_risk']),
+        risks['irrigation_action'],
+        condition_class(weather.get('conditions', '')),
+    )
+
+def build_advice_prompt(farmer: dict, weather: dict, risks: dict) -> str:
+    return f"""
     Create urgent weather advisory for farmer. MAX 160 CHARACTERS.
 
-    FARMER: {farmer.get('name')} - {farmer.get('crop')} ({farmer.get('growth_stage')})
+    FARMER: {NAME_SLOT} - {farmer.get('crop')} ({farmer.get('growth_stage')})
     LOCATION: {farmer.get('district')}
-    
+
     WEATHER: {weather['current_temp']}°C, {weather['humidity']}% humidity, {weather['conditions']}
     RAIN: {weather['total_rainfall']}mm last 24h, {weather['wet_hours']} humid hours
-    
+
     RISKS: Disease {risks['disease_risk']*100}%, Pests {risks['pest_risk']*100}%
     ACTION: {risks['irrigation_action'].upper()} irrigation
 
     Write direct, urgent message in English. No greetings. Just critical actions.
+    If you address the farmer, write {NAME_SLOT} exactly as shown; it is replaced with their name.
     """
 
+def template_advice(farmer: dict, risks: dict) -> str:
+    return f"URGENT: {risks['disease_risk']*100}% disease risk. {risks['irrigation_action'].upper()} irrigation for {farmer.get('crop')}."
+
+def fill_name(advice: str, farmer: dict) -> str:
+    return advice.replace(NAME_SLOT, str(farmer.get('name') or "Farmer"))[:160]
+
+async def ask_llm(prompt: str):
+    """Gemini's advice text, or None if it failed or took longer than ADVICE_LLM_TIMEOUT"""
+    _count("llm_calls")
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
-        return response.text.strip().replace('*', '').replace('#', '')[:160]
+        response = await llm.generate(prompt, model='gemini-1.5-flash', deadline=ADVICE_LLM_TIMEOUT)
+        return response.text.strip().replace('*', '').replace('#', '')
+    except LLMTimeout:
+        _count("llm_timeouts")
+        print(f"Gemini API timed out after {ADVICE_LLM_TIMEOUT}s")
     except Exception as e:
+        _count("llm_errors")
         print(f"Gemini API failed: {e}")
-        return f"URGENT: {risks['disease_risk']*100}% disease risk. {risks['irrigation_action'].upper()} irrigation for {farmer.get('crop')}."
+    return None
+
+async def write_profile_advice(key: tuple, prompt: str):
+    try:
+        advice = await ask_llm(prompt)
+        if advice:
+            advice_cache.put(key, advice)
+        else:
+            failed_profiles.put(key, True)
+        return advice
+    finally:
+        _inflight.pop(key, None)
+
+async def generate_advice(farmer: dict, weather: dict, risks: dict) -> str:
+    _count("requests")
+    key = advice_key(farmer, weather, risks)
+    advice = advice_cache.get(key)
+    if advice is None and not failed_profiles.get(key, False):
+        pending = _inflight.get(key)
+        if pending is not None:
+            # Same profile already being written for another farmer: wait for that call
+            _count("coalesced")
+        else:
+            # Own task, so one cancelled caller doesn't cancel the call for the farmers waiting on it
+            pending = asyncio.ensure_future(write_profile_advice(key, build_advice_prompt(farmer, weather, risks)))
+            _inflight[key] = pending
+        advice = await asyncio.shield(pending)
+
+    if not advice:
+        _count("template_fallbacks")
+        return template_advice(farmer, risks)
+    return fill_name(advice, farmer)
+
+def advice_stats() -> dict:
+    with _counters_lock:
+        counters = dict(_counters)
+    requests = counters["requests"]
+    return {
+        **counters,
+        "llm_calls_per_request": round(counters["llm_calls"] / requests, 4) if requests else 0.0,
+        "risk_bucket": ADVICE_RISK_BUCKET,
+        "llm_timeout_s": ADVICE_LLM_TIMEOUT,
+        "backed_off_profiles": len(failed_profiles),
+        "cache": advice_cache.stats(),
+    }
@@ -1,33 +1,10 @@
 # agents/weather_agent.py
-import aiohttp
-import os, httpx, math
-from dotenv import load_dotenv
-from pathlib import Path
-API_KEY = os.getenv("OWM_API_KEY")
+from ..clients.weather_service import weather_service
+
 async def analyze_weather(lat: float, lon: float) -> dict:
     """
-    Fetch weather data from API and ensure all required keys exist.
-    Returns a dict with defaults if missing.
+    Fetch weather data for a farm and ensure all required keys exist.
+    Returns a dict with defaults if missing. Lookups go through the shared
+    weather_service: snapped to a grid cell, cached and deduplicated.
     """
-    url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={API_KEY}&units=metric"
-    
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url) as resp:
-                data = await resp.json()
-        except Exception as e:
-            print(f"Weather API error: {e}")
-            data = {}
-
-    weather = {
-        'current_temp': data.get('main', {}).get('temp', 25),
-        'avg_temp': data.get('main', {}).get('temp', 25),
-        'total_rainfall': data.get('rain', {}).get('1h', 0),
-        'wet_hours': 1 if data.get('rain', {}).get('1h', 0) > 0 else 0,
-        'max_wind_speed': data.get('wind', {}).get('speed', 0),
-        'humidity': data.get('main', {}).get('humidity', 50),
-        'conditions': data.get('weather', [{}])[0].get('description', 'Unknown')
-    }
-
-
-    return weather
+    return await weather_service.get(lat, lon)
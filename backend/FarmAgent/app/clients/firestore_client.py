@@ -30,21 +30,39 @@ def get_firestore_client():
 
 
 
-def get_all_farmers():
+def iter_farmer_pages(page_size: int = 500):
+    """
+    Yields farmers a page (list) at a time, one short query per page ordered by document id and
+    resumed after the previous page's last document, so no Firestore stream stays open for the
+    whole run. Read errors propagate: a run that lost the connection must not look complete.
+    """
     db = get_firestore_client()
-    farmers_ref = db.collection('farmers')
-    farmers = []
-
-    try:
-        for doc in farmers_ref.stream():
+    query = db.collection('farmers').order_by('__name__').limit(page_size)
+    last_doc = None
+    while True:
+        page_query = query.start_after(last_doc) if last_doc is not None else query
+        docs = list(page_query.stream())
+        if not docs:
+            return
+        page = []
+        for doc in docs:
             farmer_data = doc.to_dict()
             farmer_data['id'] = doc.id
-            farmers.append(farmer_data)
-    except Exception as e:
-        print(f"Error fetching farmers: {e}")
+            page.append(farmer_data)
+        yield page
+        if len(docs) < page_size:
+            return
+        last_doc = docs[-1]
 
 
-    return farmers
+def iter_farmers(page_size: int = 500):
+    """Yields farmers one document at a time, so the whole collection is never held in memory"""
+    for page in iter_farmer_pages(page_size):
+        yield from page
+
+
+def get_all_farmers():
+    return list(iter_farmers())
 
 def save_alert(farmer_id: str, alert_data: dict):
     db = get_firestore_client()
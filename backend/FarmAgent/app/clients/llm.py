@@ -0,0 +1,378 @@
+# clients/llm.py
+import asyncio
+import hashlib
+import os
+import random
+import threading
+
+from serving.metrics import RollingWindow
+
+# "gemini" talks to Google; "stub" answers locally (load tests, offline dev)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+# Per-attempt deadline, including the wait for a concurrency slot
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 20))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", 2))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5))
+# Send a second, identical request if the first hasn't answered after this many seconds (0 = off)
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", 0))
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", 300))
+LLM_STUB_TAIL_RATE = float(os.getenv("LLM_STUB_TAIL_RATE", 0.05))
+LLM_STUB_ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", 0))
+
+
+class LLMError(RuntimeError):
+    """Raised when every attempt at a completion failed"""
+
+
+class LLMTimeout(LLMError):
+    """Raised when the call's deadline ran out before an answer came back"""
+
+
+class LLMResult:
+    def __init__(self, text: str, prompt_tokens: int = 0, output_tokens: int = 0):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+
+
+class GeminiBackend:
+    """google-generativeai's native async client; the SDK is only imported on first use"""
+    name = "gemini"
+
+    def __init__(self, api_key=None):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
+        self._genai = genai
+        self._models = {}
+
+    def _model(self, model: str):
+        if model not in self._models:
+            self._models[model] = self._genai.GenerativeModel(model)
+        return self._models[model]
+
+    async def generate(self, model: str, prompt: str) -> LLMResult:
+        response = await self._model(model).generate_content_async(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResult(
+            response.text,
+            getattr(usage, "prompt_token_count", 0) or 0,
+            getattr(usage, "candidates_token_count", 0) or 0,
+        )
+
+    async def stream(self, model: str, prompt: str):
+        response = await self._model(model).generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:  # a chunk without text parts (e.g. only a finish reason)
+                continue
+            yield LLMResult(text)
+        usage = getattr(response, "usage_metadata", None)
+        yield LLMResult("", getattr(usage, "prompt_token_count", 0) or 0, getattr(usage, "candidates_token_count", 0) or 0)
+
+
+class StubBackend:
+    """
+    Local stand-in: a canned answer derived from the prompt after a jittered
+    delay. LLM_STUB_TAIL_RATE of calls take 10x longer and LLM_STUB_ERROR_RATE
+    of them fail, so timeouts, retries and hedging can be exercised offline.
+    """
+    name = "stub"
+
+    def __init__(self, latency_ms=LLM_STUB_LATENCY_MS, tail_rate=LLM_STUB_TAIL_RATE, error_rate=LLM_STUB_ERROR_RATE):
+        self.latency_s = latency_ms / 1000.0
+        self.tail_rate = tail_rate
+        self.error_rate = error_rate
+
+    def answer(self, prompt: str) -> str:
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        # Keep the reasoner's name slot so cached advice still gets personalised
+        greeting = "{name}: " if "{name}" in prompt else ""
+        return f"{greeting}Check fields today, follow the irrigation advice and watch for disease (stub {digest})."
+
+    def _delay(self) -> float:
+        delay = self.latency_s * random.uniform(0.5, 1.5)
+        if random.random() < self.tail_rate:
+            delay *= 10
+        return delay
+
+    async def generate(self, model: str, prompt: str) -> LLMResult:
+        await asyncio.sleep(self._delay())
+        if random.random() < self.error_rate:
+            raise RuntimeError("stub backend error")
+        text = self.answer(prompt)
+        return LLMResult(text, len(prompt.split()), len(text.split()))
+
+    async def stream(self, model: str, prompt: str):
+        """The same answer a word at a time: the first after a third of the latency, the rest spread over it"""
+        delay = self._delay()
+        words = self.answer(prompt).split(" ")
+        await asyncio.sleep(delay / 3)
+        if random.random() < self.error_rate:
+            raise RuntimeError("stub backend error")
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(delay * 2 / 3 / len(words))
+            yield LLMResult(word if i == 0 else " " + word)
+        yield LLMResult("", len(prompt.split()), len(words))
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "stub": StubBackend,
+}
+
+
+def register_backend(name: str, factory):
+    """
+    Makes LLM_BACKEND=<name> build backends with `factory()`. A backend needs
+    an async generate(model, prompt) -> LLMResult; an async-generator
+    stream(model, prompt) yielding LLMResult chunks is optional (without one,
+    streams arrive as a single chunk).
+    """
+    BACKENDS[name.lower()] = factory
+
+
+class LLMGateway:
+    """
+    One async entry point for every LLM call in FarmAgent.
+
+    At most `max_concurrency` calls are in flight; the rest wait for a slot.
+    Each attempt gets `timeout` seconds (slot wait included) and a call's
+    `deadline` caps all of its attempts together. Failed attempts are retried
+    with exponential backoff and full jitter. With `hedge_after` set, an
+    attempt still unanswered after that long gets a duplicate request and the
+    first answer wins. Latency, retries, hedges and token counts are tracked
+    for stats().
+
+    stream() gets the same slot, deadline and retry handling up to the first
+    chunk; after that a stall longer than `timeout` between chunks ends the
+    stream with LLMTimeout, since text already sent can't be taken back.
+    """
+
+    def __init__(self, backend=LLM_BACKEND, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT,
+                 retries=LLM_RETRIES, retry_base_delay=LLM_RETRY_BASE_DELAY, hedge_after=LLM_HEDGE_AFTER):
+        self.backend_name = backend
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = timeout
+        self.retries = max(0, int(retries))
+        self.retry_base_delay = retry_base_delay
+        self.hedge_after = hedge_after
+        self.latency_ms = RollingWindow()
+        self.first_chunk_ms = RollingWindow()
+        self._backend = None
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {"calls": 0, "streams": 0, "succeeded": 0, "failed": 0, "attempts": 0, "retries": 0,
+                          "timeouts": 0, "errors": 0, "hedges": 0, "hedge_wins": 0,
+                          "prompt_tokens": 0, "output_tokens": 0}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if self.backend_name not in BACKENDS:
+                raise LLMError(f"Unknown LLM backend '{self.backend_name}' (choose from {sorted(BACKENDS)})")
+            self._backend = BACKENDS[self.backend_name]()
+        return self._backend
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _call(self, model: str, prompt: str) -> LLMResult:
+        async with self._get_semaphore():
+            self._count("attempts")
+            with self._lock:
+                self._in_flight += 1
+            try:
+                return await self.backend.generate(model, prompt)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+
+    async def _attempt(self, model: str, prompt: str, timeout: float) -> LLMResult:
+        try:
+            return await asyncio.wait_for(self._call(model, prompt), timeout)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise LLMTimeout(f"no answer within {timeout:.2f}s") from None
+        except LLMError:
+            raise
+        except Exception as e:
+            self._count("errors")
+            raise LLMError(str(e)) from e
+
+    async def _hedged(self, model: str, prompt: str, timeout: float) -> LLMResult:
+        if self.hedge_after <= 0 or self.hedge_after >= timeout:
+            return await self._attempt(model, prompt, timeout)
+
+        first = asyncio.ensure_future(self._attempt(model, prompt, timeout))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done:
+                self._count("hedges")
+                tasks.add(asyncio.ensure_future(self._attempt(model, prompt, timeout - self.hedge_after)))
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()  # the loser's error is already superseded
+                else:
+                    task.cancel()
+
+    async def generate(self, prompt: str, model: str = "gemini-1.5-flash", deadline: float = None) -> LLMResult:
+        """The backend's answer to `prompt`; raises LLMTimeout/LLMError once retries or the deadline run out"""
+        self._count("calls")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        ends = started + (deadline if deadline is not None else self.timeout * (self.retries + 1))
+        error = None
+        for attempt in range(self.retries + 1):
+            remaining = ends - loop.time()
+            if remaining <= 0:
+                break
+            if attempt:
+                self._count("retries")
+            try:
+                result = await self._hedged(model, prompt, min(self.timeout, remaining))
+            except LLMError as e:
+                error = e
+                backoff = random.uniform(0, self.retry_base_delay * 2 ** attempt)
+                if attempt < self.retries and loop.time() + backoff < ends:
+                    await asyncio.sleep(backoff)
+                continue
+            self.latency_ms.record((loop.time() - started) * 1000.0)
+            self._count("succeeded")
+            self._count("prompt_tokens", result.prompt_tokens)
+            self._count("output_tokens", result.output_tokens)
+            return result
+        self._count("failed")
+        if error is None or isinstance(error, LLMTimeout):
+            raise LLMTimeout(f"{model} gave no answer within {ends - started:.2f}s")
+        raise error
+
+    async def _open_stream(self, model: str, prompt: str):
+        backend = self.backend
+        if hasattr(backend, "stream"):
+            async for chunk in backend.stream(model, prompt):
+                yield chunk
+        else:
+            yield await backend.generate(model, prompt)
+
+    async def stream(self, prompt: str, model: str = "gemini-1.5-flash", deadline: float = None):
+        """Yields the answer's text as the backend produces it; raises LLMTimeout/LLMError like generate()"""
+        self._count("calls")
+        self._count("streams")
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        ends = started + (deadline if deadline is not None else self.timeout * (self.retries + 1))
+        error = None
+        for attempt in range(self.retries + 1):
+            remaining = ends - loop.time()
+            if remaining <= 0:
+                break
+            if attempt:
+                self._count("retries")
+            semaphore = self._get_semaphore()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), min(self.timeout, remaining))
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                error = LLMTimeout("no free LLM slot")
+                continue
+            self._count("attempts")
+            with self._lock:
+                self._in_flight += 1
+            chunks = self._open_stream(model, prompt)
+            try:
+                # Until the first chunk nothing has been sent, so failures here can still be retried
+                first_timeout = min(self.timeout, ends - loop.time())
+                try:
+                    first = await asyncio.wait_for(chunks.__anext__(), first_timeout)
+                except StopAsyncIteration:
+                    first = LLMResult("")
+                except asyncio.TimeoutError:
+                    self._count("timeouts")
+                    error, first = LLMTimeout(f"no first chunk within {first_timeout:.2f}s"), None
+                except Exception as e:
+                    self._count("errors")
+                    error, first = LLMError(str(e)), None
+
+                if first is not None:
+                    self.first_chunk_ms.record((loop.time() - started) * 1000.0)
+                    prompt_tokens, output_tokens = first.prompt_tokens, first.output_tokens
+                    if first.text:
+                        yield first.text
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            self._count("timeouts")
+                            self._count("failed")
+                            raise LLMTimeout(f"stream stalled for {self.timeout:.2f}s") from None
+                        except Exception as e:
+                            self._count("errors")
+                            self._count("failed")
+                            raise LLMError(str(e)) from e
+                        prompt_tokens += chunk.prompt_tokens
+                        output_tokens += chunk.output_tokens
+                        if chunk.text:
+                            yield chunk.text
+                    self.latency_ms.record((loop.time() - started) * 1000.0)
+                    self._count("succeeded")
+                    self._count("prompt_tokens", prompt_tokens)
+                    self._count("output_tokens", output_tokens)
+                    return
+            finally:
+                await chunks.aclose()
+                with self._lock:
+                    self._in_flight -= 1
+                semaphore.release()
+            backoff = random.uniform(0, self.retry_base_delay * 2 ** attempt)
+            if attempt < self.retries and loop.time() + backoff < ends:
+                await asyncio.sleep(backoff)
+        self._count("failed")
+        if error is None or isinstance(error, LLMTimeout):
+            raise LLMTimeout(f"{model} gave no answer within {ends - started:.2f}s")
+        raise error
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+        return {
+            "backend": self.backend_name,
+            "max_concurrency": self.max_concurrency,
+            "timeout_s": self.timeout,
+            "retries": self.retries,
+            "hedge_after_s": self.hedge_after,
+            "in_flight": in_flight,
+            **counters,
+            "latency_ms": self.latency_ms.snapshot(),
+            "first_chunk_ms": self.first_chunk_ms.snapshot(),
+        }
+
+
+llm = LLMGateway()
@@ -0,0 +1,207 @@
+# clients/weather_service.py
+import asyncio
+import math
+import os
+import threading
+import time
+
+import aiohttp
+
+from serving.lru import LRUCache
+from serving.metrics import RollingWindow
+
+API_KEY = os.getenv("OWM_API_KEY")
+# Point at a local stub (FarmAgent/stub_weather_server.py) for load tests
+OWM_BASE_URL = os.getenv("OWM_BASE_URL", "http://api.openweathermap.org/data/2.5").rstrip("/")
+# Farmers within one cell share a lookup: a WEATHER_GRID_DEG square (0.1° ≈ 11 km), or a
+# geohash cell when WEATHER_GEOHASH_PRECISION is set (5 ≈ 4.9 km, 4 ≈ 39 km)
+WEATHER_GRID_DEG = float(os.getenv("WEATHER_GRID_DEG", 0.1))
+WEATHER_GEOHASH_PRECISION = int(os.getenv("WEATHER_GEOHASH_PRECISION", 0))
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 900))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", 50000))
+WEATHER_MAX_CONNECTIONS = int(os.getenv("WEATHER_MAX_CONNECTIONS", 32))
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", 10))
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_cell(lat: float, lon: float, precision: int):
+    """(geohash, center lat, center lon) of the geohash cell containing the point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars), (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def parse_owm(data: dict) -> dict:
+    """OpenWeatherMap's current-weather payload in the shape risk_engine expects (defaults where missing)"""
+    return {
+        'current_temp': data.get('main', {}).get('temp', 25),
+        'avg_temp': data.get('main', {}).get('temp', 25),
+        'total_rainfall': data.get('rain', {}).get('1h', 0),
+        'wet_hours': 1 if data.get('rain', {}).get('1h', 0) > 0 else 0,
+        'max_wind_speed': data.get('wind', {}).get('speed', 0),
+        'humidity': data.get('main', {}).get('humidity', 50),
+        'conditions': data.get('weather', [{}])[0].get('description', 'Unknown')
+    }
+
+
+class WeatherService:
+    """
+    Current weather per grid cell, shared by the daily pipeline and chat.
+
+    Coordinates are snapped to a cell and the upstream is asked about the
+    cell's center, so every farmer in the cell gets the same answer. Answers
+    are cached for `ttl` seconds; concurrent requests for a cell that is
+    already being fetched wait for that one call, which runs as its own task
+    so cancelling one caller does not cancel it for the others. All calls go through one
+    pooled aiohttp session (at most `max_connections` sockets). Failed
+    lookups fall back to parse_owm's defaults and are not cached.
+    """
+
+    def __init__(self, base_url=OWM_BASE_URL, api_key=API_KEY, grid_deg=WEATHER_GRID_DEG,
+                 geohash_precision=WEATHER_GEOHASH_PRECISION, ttl=WEATHER_CACHE_TTL,
+                 cache_size=WEATHER_CACHE_SIZE, max_connections=WEATHER_MAX_CONNECTIONS, timeout=WEATHER_TIMEOUT):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.grid_deg = grid_deg
+        self.geohash_precision = geohash_precision
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cache = LRUCache(maxsize=cache_size, ttl=ttl)
+        self.upstream_latency_ms = RollingWindow()
+        self._inflight = {}
+        self._session = None
+        self._session_loop = None
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._coalesced = 0
+        self._upstream_calls = 0
+        self._upstream_errors = 0
+
+    def cell(self, lat: float, lon: float):
+        """(cache key, center lat, center lon) for a coordinate"""
+        if self.geohash_precision > 0:
+            key, center_lat, center_lon = geohash_cell(lat, lon, self.geohash_precision)
+            return key, center_lat, center_lon
+        i, j = math.floor(lat / self.grid_deg), math.floor(lon / self.grid_deg)
+        return (i, j), round((i + 0.5) * self.grid_deg, 6), round((j + 0.5) * self.grid_deg, 6)
+
+    def _release_session(self):
+        """
+        Takes the current session off the service. Returns it if it belongs to the running loop
+        (the caller awaits its close); a session from another loop is closed on that loop while it
+        is still running, or detached once it has finished (an earlier asyncio.run), since nothing
+        can await it any more.
+        """
+        session, loop = self._session, self._session_loop
+        self._session = self._session_loop = None
+        if session is None or session.closed:
+            return None
+        if loop is asyncio.get_running_loop():
+            return session
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            session.detach()
+        return None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            self._release_session()
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def _fetch(self, lat: float, lon: float):
+        """Parsed weather for one point, or None if the upstream call failed"""
+        params = {"lat": lat, "lon": lon, "appid": self.api_key or "", "units": "metric"}
+        with self._lock:
+            self._upstream_calls += 1
+        started = time.perf_counter()
+        try:
+            async with self._get_session().get(f"{self.base_url}/weather", params=params) as resp:
+                data = await resp.json(content_type=None)
+                if resp.status != 200:
+                    raise RuntimeError(f"HTTP {resp.status}: {data}")
+            return parse_owm(data)
+        except Exception as e:
+            print(f"Weather API error: {e}")
+            with self._lock:
+                self._upstream_errors += 1
+            return None
+        finally:
+            self.upstream_latency_ms.record((time.perf_counter() - started) * 1000.0)
+
+    async def _fetch_cell(self, key, center_lat: float, center_lon: float):
+        try:
+            weather = await self._fetch(center_lat, center_lon)
+            if weather is not None:
+                self.cache.put(key, weather)
+            return weather
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, lat: float, lon: float) -> dict:
+        with self._lock:
+            self._requests += 1
+        key, center_lat, center_lon = self.cell(lat, lon)
+        weather = self.cache.get(key)
+        if weather is not None:
+            return dict(weather)
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            with self._lock:
+                self._coalesced += 1
+        else:
+            # Its own task, so a caller that gets cancelled (e.g. a dropped chat request) only stops
+            # waiting; the lookup carries on for everyone else in the cell
+            pending = asyncio.ensure_future(self._fetch_cell(key, center_lat, center_lon))
+            self._inflight[key] = pending
+        weather = await asyncio.shield(pending)
+        return dict(weather) if weather is not None else parse_owm({})
+
+    async def close(self):
+        session = self._release_session()
+        if session is not None:
+            await session.close()
+
+    def stats(self) -> dict:
+        cache = self.cache.stats()
+        with self._lock:
+            served = self._requests
+            upstream = self._upstream_calls
+            return {
+                "cell": f"geohash{self.geohash_precision}" if self.geohash_precision > 0 else f"grid {self.grid_deg}°",
+                "base_url": self.base_url,
+                "requests": served,
+                "cache_hits": cache["hits"],
+                "coalesced": self._coalesced,
+                "upstream_calls": upstream,
+                "upstream_errors": self._upstream_errors,
+                "hit_rate": round(1 - upstream / served, 4) if served else 0.0,
+                "cached_cells": cache["entries"],
+                "ttl_s": cache["ttl_s"],
+                "upstream_latency_ms": self.upstream_latency_ms.snapshot(),
+            }
+
+
+weather_service = WeatherService()
@@ -0,0 +1,176 @@
+# pipeline.py
+import asyncio
+import inspect
+import time
+
+# Marks the end of a stage's input; every worker of the stage gets one
+_DONE = object()
+
+
+class PipelineBusy(RuntimeError):
+    """Raised when a run is requested while the previous one is still going"""
+
+
+class Stage:
+    """
+    One step of a StagedPipeline: `fn(item)` returns the item for the next
+    stage, or None to drop it. Blocking functions (Firestore, the MCP pipe)
+    are marked `blocking=True` and run in a worker thread.
+    """
+
+    def __init__(self, name: str, fn, concurrency: int = 1, blocking: bool = False):
+        self.name = name
+        self.fn = fn
+        self.concurrency = max(1, int(concurrency))
+        self.blocking = blocking
+        self.reset()
+
+    def reset(self):
+        self.received = 0
+        self.passed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+
+    async def call(self, item):
+        if self.blocking:
+            return await asyncio.to_thread(self.fn, item)
+        result = self.fn(item)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def stats(self, elapsed: float) -> dict:
+        return {
+            "stage": self.name,
+            "concurrency": self.concurrency,
+            "received": self.received,
+            "passed": self.passed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "per_second": round(self.passed / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class StagedPipeline:
+    """
+    Items flow from an async source through the stages in order, with a
+    bounded queue in front of each stage and `stage.concurrency` workers
+    pulling from it. Only queue_size items wait per stage, so memory and
+    open connections stay flat however long the source is; a slow stage
+    back-pressures the ones before it. An item that raises (CancelledError
+    included, unless the run itself is being cancelled) is counted as failed
+    and dropped without stopping the run.
+    """
+
+    def __init__(self, name: str, stages, queue_size: int = 256):
+        self.name = name
+        self.stages = list(stages)
+        self.queue_size = max(1, int(queue_size))
+        self.running = False
+        self.runs = 0
+        self.produced = 0
+        self.started_at = None
+        self.finished_at = None
+        self._started = None
+        self._elapsed = 0.0
+        self._queues = []
+
+    async def _work(self, stage: Stage, inbox: asyncio.Queue, outbox):
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            stage.received += 1
+            stage.in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await stage.call(item)
+            except asyncio.CancelledError:
+                # Only a cancelled run may stop the worker; a CancelledError raised from inside the
+                # stage (e.g. an awaited lookup that someone else cancelled) fails just this item
+                if asyncio.current_task().cancelling():
+                    raise
+                stage.failed += 1
+                print(f"❌ {self.name}/{stage.name} failed: cancelled")
+                continue
+            except Exception as e:
+                stage.failed += 1
+                print(f"❌ {self.name}/{stage.name} failed: {e}")
+                continue
+            finally:
+                stage.in_flight -= 1
+                stage.busy_seconds += time.perf_counter() - started
+            if result is None:
+                stage.dropped += 1
+                continue
+            stage.passed += 1
+            if outbox is not None:
+                await outbox.put(result)
+
+    async def _run_stage(self, i: int):
+        stage, inbox = self.stages[i], self._queues[i]
+        outbox = self._queues[i + 1] if i + 1 < len(self.stages) else None
+        # Workers only exit early when cancelled, and then nobody is left to read the end markers
+        await asyncio.gather(*(self._work(stage, inbox, outbox) for _ in range(stage.concurrency)))
+        if outbox is not None:
+            for _ in range(self.stages[i + 1].concurrency):
+                await outbox.put(_DONE)
+
+    async def _produce(self, source):
+        error = None
+        try:
+            async for item in source:
+                self.produced += 1
+                await self._queues[0].put(item)
+        except Exception as e:  # still drain what was queued, then report it
+            error = e
+        for _ in range(self.stages[0].concurrency):
+            await self._queues[0].put(_DONE)
+        if error is not None:
+            raise error
+
+    async def run(self, source) -> dict:
+        """Pushes every item of the async iterable `source` through the stages; returns stats()"""
+        if self.running:
+            raise PipelineBusy(f"{self.name} pipeline is already running")
+        self.running = True
+        self.runs += 1
+        self.produced = 0
+        for stage in self.stages:
+            stage.reset()
+        self._queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self.started_at, self.finished_at = time.time(), None
+        self._started = time.perf_counter()
+        try:
+            results = await asyncio.gather(
+                self._produce(source),
+                *(self._run_stage(i) for i in range(len(self.stages))),
+                return_exceptions=True,
+            )
+        finally:
+            self._elapsed = time.perf_counter() - self._started
+            self.finished_at = time.time()
+            self.running = False
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+        return self.stats()
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self._started if self.running else self._elapsed
+        return {
+            "pipeline": self.name,
+            "running": self.running,
+            "runs": self.runs,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(elapsed, 3),
+            "produced": self.produced,
+            "queue_size": self.queue_size,
+            "queue_depth": [queue.qsize() for queue in self._queues],
+            "stages": [stage.stats(elapsed) for stage in self.stages],
+        }
@@ -1,53 +1,92 @@
 # scheduler.py
 import asyncio
-from .clients.firestore_client import get_all_farmers, save_alert
+import os
+from .clients.firestore_client import iter_farmer_pages, save_alert
 from .agents.weather_agent import analyze_weather
 from .agents.risk_engine import calculate_risks
 from .agents.reasoner import generate_advice
 from .agents.notifier import send_whatsapp_alert
+from .pipeline import Stage, StagedPipeline
 
-async def process_single_farmer(farmer: dict):
+# Per-stage worker counts; farmers are read from Firestore FARMER_PAGE_SIZE at a time
+WEATHER_CONCURRENCY = int(os.getenv("PIPELINE_WEATHER_CONCURRENCY", 32))
+ADVICE_CONCURRENCY = int(os.getenv("PIPELINE_ADVICE_CONCURRENCY", 8))
+# Alerts share one MCP stdio pipe, which carries one request/response at a time
+NOTIFY_CONCURRENCY = int(os.getenv("PIPELINE_NOTIFY_CONCURRENCY", 1))
+PERSIST_CONCURRENCY = int(os.getenv("PIPELINE_PERSIST_CONCURRENCY", 8))
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 256))
+FARMER_PAGE_SIZE = int(os.getenv("PIPELINE_FARMER_PAGE_SIZE", 500))
+
+async def stream_farmers(page_size: int = FARMER_PAGE_SIZE):
+    """Farmers from Firestore, one paged query per worker-thread hop; read errors end the run as failed"""
+    pages = iter_farmer_pages(page_size)
+    while True:
+        page = await asyncio.to_thread(next, pages, None)
+        if page is None:
+            return
+        for farmer in page:
+            yield farmer
+
+# --- Stages: each takes and returns a job dict ({"farmer": ...} plus what earlier stages added) ---
+async def fetch_weather(job: dict):
+    farmer = job["farmer"]
     print(f"Processing {farmer['name']} in {farmer['district']}...")
 
-    # Get weather data
     weather = await analyze_weather(farmer['lat'], farmer['lon'])
     if not weather:
         print(f"Weather data unavailable for {farmer['name']}")
-        return
+        return None
+    job["weather"] = weather
+    return job
 
-    # Calculate risks
-    risks = calculate_risks(weather, farmer.get('crop', 'default'))
+def score_risk(job: dict):
+    job["risks"] = calculate_risks(job["weather"], job["farmer"].get('crop', 'default'))
+    return job
 
-    # Generate advice
+async def write_advice(job: dict):
+    farmer, weather, risks = job["farmer"], job["weather"], job["risks"]
     if asyncio.iscoroutinefunction(generate_advice):
-        message = await generate_advice(farmer, weather, risks)
+        job["message"] = await generate_advice(farmer, weather, risks)
     else:
-        message = generate_advice(farmer, weather, risks)
+        job["message"] = generate_advice(farmer, weather, risks)
+    return job
 
-    # Send WhatsApp alert
+def notify(job: dict):
+    farmer = job["farmer"]
     if farmer.get('phone'):
-        success = send_whatsapp_alert(farmer['phone'], message)
-        status = "sent" if success else "failed"
+        success = send_whatsapp_alert(farmer['phone'], job["message"])
+        job["status"] = "sent" if success else "failed"
     else:
-        status = "no_phone"
+        job["status"] = "no_phone"
+    return job
 
-    # Save alert
+def persist(job: dict):
+    farmer = job["farmer"]
     alert_data = {
-        "message": message,
-        "status": status,
-        "weather_data": weather,
-        "risk_scores": risks
+        "message": job["message"],
+        "status": job["status"],
+        "weather_data": job["weather"],
+        "risk_scores": job["risks"]
     }
-
     save_alert(farmer['id'], alert_data)
-    print(f"Alert {status} for {farmer['name']}")
+    print(f"Alert {job['status']} for {farmer['name']}")
+    return job
+
+daily_pipeline = StagedPipeline("daily_alerts", [
+    Stage("weather", fetch_weather, WEATHER_CONCURRENCY),
+    Stage("risk", score_risk),
+    Stage("advice", write_advice, ADVICE_CONCURRENCY),
+    Stage("notify", notify, NOTIFY_CONCURRENCY, blocking=True),
+    Stage("persist", persist, PERSIST_CONCURRENCY, blocking=True),
+], queue_size=QUEUE_SIZE)
 
 async def run_daily_pipeline():
-    farmers = get_all_farmers()
-    if not farmers:
+    summary = await daily_pipeline.run(({"farmer": farmer} async for farmer in stream_farmers()))
+    if not summary["produced"]:
         print("No farmers found in database")
-        return
+        return summary
 
-    tasks = [process_single_farmer(farmer) for farmer in farmers]
-    await asyncio.gather(*tasks)
-    print(f"Processed {len(farmers)} farmers")
+    print(f"Processed {summary['produced']} farmers in {summary['elapsed_seconds']}s")
+    for stage in summary["stages"]:
+        print(f"📊 {stage['stage']}: {stage['passed']} ok, {stage['dropped']} dropped, {stage['failed']} failed")
+    return summary
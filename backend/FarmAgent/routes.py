@@ -1,11 +1,20 @@
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from FarmAgent.app.scheduler import run_daily_pipeline
+from FarmAgent.app.scheduler import run_daily_pipeline, daily_pipeline
+from FarmAgent.app.pipeline import PipelineBusy
 from FarmAgent.app.agents.weather_agent import analyze_weather
+from FarmAgent.app.clients.weather_service import weather_service
+from FarmAgent.app.agents.reasoner import advice_stats
+from FarmAgent.app.clients.llm import llm
+from serving.metrics import RollingWindow
 from FarmAgent.app.agents.risk_engine import calculate_risks
 
 import asyncio
+import json
+import time
 from dotenv import load_dotenv
 from pathlib import Path
 import firebase_admin
@@ -30,6 +39,10 @@ async def startup_event():
     else:
         print("⚠️ FarmAgent scheduler already running")
 
+@router.on_event("shutdown")
+async def close_weather_session():
+    await weather_service.close()
+
 @router.get("/")
 async def root():
     return {
@@ -49,15 +62,38 @@ async def health_check():
 @router.post("/run-now")
 async def trigger_pipeline_now():
     try:
-        await run_daily_pipeline()
+        summary = await run_daily_pipeline()
         return {
             "status": "success",
             "message": "Agent pipeline executed successfully",
-            "action": "check_whatsapp_for_alerts"
+            "action": "check_whatsapp_for_alerts",
+            "summary": summary
         }
+    except PipelineBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Pipeline failed: {str(e)}")
 
+# Per-stage counters of the current (or last) daily pipeline run
+@router.get("/pipeline/stats")
+async def pipeline_stats():
+    return daily_pipeline.stats()
+
+# Weather cache hit rate and upstream call counts (shared by the pipeline and chat)
+@router.get("/weather/stats")
+async def weather_stats():
+    return weather_service.stats()
+
+# Advice cache hit rate and Gemini call/timeout counts for the daily pipeline
+@router.get("/advice/stats")
+async def get_advice_stats():
+    return advice_stats()
+
+# Gateway counters for every Gemini call: attempts, retries, hedges, timeouts, tokens, latency
+@router.get("/llm/stats")
+async def llm_stats():
+    return llm.stats()
+
 @router.post("/farmers")
 async def register_farmer(farmer_data: dict):
     try:
@@ -128,8 +164,20 @@ async def get_farmer_alerts(farmer_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch alerts: {str(e)}")
 
+# Time to first byte and total time per chat request; for /api/chat both are the full round trip
+chat_latency = {
+    endpoint: {"ttfb_ms": RollingWindow(), "total_ms": RollingWindow()}
+    for endpoint in ("chat", "chat_stream")
+}
+
+def record_chat_latency(endpoint: str, started: float, first_byte: float = None):
+    now = time.perf_counter()
+    chat_latency[endpoint]["ttfb_ms"].record(((first_byte or now) - started) * 1000.0)
+    chat_latency[endpoint]["total_ms"].record((now - started) * 1000.0)
+
 @router.post("/api/chat")
 async def chat_with_farmer(chat_data: dict):
+    started = time.perf_counter()
     try:
         db = firestore.client()
         farmer_ref = db.collection("farmers").document(chat_data["farmer_id"])
@@ -152,13 +200,100 @@ async def chat_with_farmer(chat_data: dict):
             "timestamp": firestore.SERVER_TIMESTAMP
         }
         db.collection("chat_messages").add(chat_history)
+        record_chat_latency("chat", started)
         return {"response": response}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
-async def generate_chat_response(farmer, user_question, weather_data, risk_scores):
-    import google.generativeai as genai
-    prompt = f"""
+def sse_event(data: dict, event: str = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data)}\n\n"
+
+def save_chat_history(farmer_id: str, user_message: str, reply: list):
+    """Runs after the stream has been sent; `reply` holds the chunks that went out"""
+    if not reply:
+        return
+    try:
+        db = firestore.client()
+        db.collection("chat_messages").add({
+            "farmer_id": farmer_id,
+            "user_message": user_message,
+            "bot_response": "".join(reply).strip(),
+            "timestamp": firestore.SERVER_TIMESTAMP
+        })
+    except Exception as e:
+        print(f"❌ Failed to save chat history for {farmer_id}: {e}")
+
+@router.post("/api/chat/stream")
+async def stream_chat_with_farmer(chat_data: dict):
+    """
+    Same answer as /api/chat as Server-Sent Events: a `data: {"token": ...}`
+    event per chunk as Gemini produces it, then `event: done` with the full
+    response, ttfb_ms and total_ms. The chat-history write happens after the
+    stream has been sent.
+    """
+    started = time.perf_counter()
+    try:
+        db = firestore.client()
+        farmer_ref = db.collection("farmers").document(chat_data["farmer_id"])
+        farmer_doc = await asyncio.to_thread(farmer_ref.get)
+        if not farmer_doc.exists:
+            raise HTTPException(status_code=404, detail="Farmer not found")
+
+        farmer = farmer_doc.to_dict()
+        weather = await analyze_weather(farmer["lat"], farmer["lon"])
+        if not weather:
+            raise HTTPException(status_code=500, detail="Could not fetch weather data")
+
+        risks = calculate_risks(weather, farmer.get("crop", "default"))
+        prompt = create_chat_prompt(farmer, chat_data["message"], weather, risks)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
+
+    reply = []
+
+    async def events():
+        first_byte = None
+        try:
+            async for text in llm.stream(prompt, model="gemini-pro"):
+                first_byte = first_byte or time.perf_counter()
+                reply.append(text)
+                yield sse_event({"token": text})
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            if reply:
+                yield sse_event({"detail": str(e)}, event="error")
+            else:
+                first_byte = time.perf_counter()
+                reply.append(CHAT_FALLBACK)
+                yield sse_event({"token": CHAT_FALLBACK})
+        record_chat_latency("chat_stream", started, first_byte)
+        yield sse_event({
+            "response": "".join(reply).strip(),
+            "ttfb_ms": round(((first_byte or time.perf_counter()) - started) * 1000.0, 1),
+            "total_ms": round((time.perf_counter() - started) * 1000.0, 1),
+        }, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(save_chat_history, chat_data["farmer_id"], chat_data["message"], reply),
+    )
+
+@router.get("/api/chat/stats")
+async def chat_stats():
+    return {
+        endpoint: {name: window.snapshot() for name, window in windows.items()}
+        for endpoint, windows in chat_latency.items()
+    }
+
+CHAT_FALLBACK = "I'm having trouble processing your question right now. Please try again later."
+
+def create_chat_prompt(farmer, user_question, weather_data, risk_scores):
+    return f"""
 You are FarmAI, an agricultural expert assistant for {farmer.get('name', 'the farmer')}.
 
 CONTEXT:
@@ -173,10 +308,11 @@ QUESTION: {user_question}
 Answer specifically for this farmer's situation. Be practical and actionable.
 Keep response under 200 characters. Use simple language.
 """
+
+async def generate_chat_response(farmer, user_question, weather_data, risk_scores):
+    prompt = create_chat_prompt(farmer, user_question, weather_data, risk_scores)
     try:
-        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-        model = genai.GenerativeModel("gemini-pro")
-        response = model.generate_content(prompt)
+        response = await llm.generate(prompt, model="gemini-pro")
         return response.text.strip()
     except Exception:
-        return "I'm having trouble processing your question right now. Please try again later."
+        return CHAT_FALLBACK
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for OpenWeatherMap's current-weather endpoint, for load-testing FarmAgent offline.
+
+Usage (from backend/):
+    python -m FarmAgent.stub_weather_server --port 8090 --latency-ms 150
+    OWM_BASE_URL=http://127.0.0.1:8090/data/2.5 uvicorn main:app
+
+Answers GET /data/2.5/weather?lat=&lon= with a deterministic payload in
+OpenWeatherMap's shape (same coordinates, same weather) after an optional
+delay, and counts calls at GET /stats so the FarmAgent weather cache's
+upstream_calls can be checked against what the upstream actually saw.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+
+from fastapi import FastAPI
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+app = FastAPI(title="Stub weather server")
+app.state.latency_s = 0.0
+app.state.calls = 0
+app.state.coordinates = set()
+
+
+@app.get("/data/2.5/weather")
+async def current_weather(lat: float, lon: float, appid: str = "", units: str = "metric"):
+    app.state.calls += 1
+    app.state.coordinates.add((lat, lon))
+    if app.state.latency_s:
+        await asyncio.sleep(app.state.latency_s)
+    wave = math.sin(lat * 3.1) + math.cos(lon * 1.7)
+    rain = max(0.0, round(4 * wave, 2))
+    return {
+        "coord": {"lat": lat, "lon": lon},
+        "main": {"temp": round(27 + 5 * wave, 2), "humidity": int(60 + 20 * wave)},
+        "wind": {"speed": round(3 + abs(wave), 2)},
+        "rain": {"1h": rain} if rain else {},
+        "weather": [{"description": "light rain" if rain else "clear sky"}],
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return {"calls": app.state.calls, "distinct_coordinates": len(app.state.coordinates)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=100, help="Delay before every answer")
+    args = parser.parse_args()
+
+    import uvicorn
+    app.state.latency_s = args.latency_ms / 1000.0
+    print(f"🌦️ Stub weather server on http://{args.host}:{args.port}/data/2.5 ({args.latency_ms:.0f} ms latency)")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
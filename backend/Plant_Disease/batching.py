@@ -0,0 +1,116 @@
+# Plant_Disease/batching.py
+import asyncio
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from serving.metrics import RollingWindow
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-image requests into one batched model call.
+
+    The first request in an empty queue opens a window of `max_wait_ms`; every
+    request that arrives before the window closes (or until `max_batch_size`
+    rows are collected) is stacked into the same batch. Each caller gets its
+    own row of the batched prediction back. Batches run on `executor` (an
+    InferenceExecutor) when given, otherwise on the loop's default executor.
+    """
+
+    def __init__(self, infer_fn, max_batch_size: int = 16, max_wait_ms: float = 5.0, executor=None):
+        self.infer_fn = infer_fn
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = None
+        self._worker = None
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._queue_wait_ms = RollingWindow()
+        self._infer_ms = RollingWindow()
+        self._requests = 0
+        self._batches = 0
+
+    async def submit(self, row: np.ndarray) -> np.ndarray:
+        """Queue one preprocessed image (H, W, C) and wait for its prediction row"""
+        loop = asyncio.get_running_loop()
+        self._ensure_worker()
+        future = loop.create_future()
+        self._queue.put_nowait((row, future, time.perf_counter()))
+        return await future
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._collect())
+
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that disconnected while queued don't need a row
+            batch = [item for item in batch if not item[1].cancelled()]
+            if batch:
+                await self._run_batch(batch)
+
+    async def _run_batch(self, batch):
+        dispatched = time.perf_counter()
+        for _, _, enqueued in batch:
+            self._queue_wait_ms.record((dispatched - enqueued) * 1000.0)
+
+        inputs = np.stack([row for row, _, _ in batch])
+        try:
+            if self.executor is not None:
+                predictions = await self.executor.run(self.infer_fn, inputs)
+            else:
+                loop = asyncio.get_running_loop()
+                predictions = await loop.run_in_executor(None, self.infer_fn, inputs)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._infer_ms.record((time.perf_counter() - dispatched) * 1000.0)
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._requests += len(batch)
+                self._batches += 1
+
+        for i, (_, future, _) in enumerate(batch):
+            if not future.done():
+                future.set_result(predictions[i])
+
+    def stats(self) -> dict:
+        with self._lock:
+            histogram = dict(sorted(self._batch_sizes.items()))
+            requests, batches = self._requests, self._batches
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": round(requests / batches, 3) if batches else 0.0,
+            "batch_size_histogram": histogram,
+            "queue_wait_ms": self._queue_wait_ms.snapshot(),
+            "inference_ms": self._infer_ms.snapshot(),
+        }
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy full-resolution decode vs. draft-mode decode for disease preprocessing.
+
+Usage (from backend/):
+    python -m Plant_Disease.benchmark_preprocess photo1.jpg photo2.jpg --repeat 20
+    python -m Plant_Disease.benchmark_preprocess --synthetic 4000x3000
+
+Reports per-image decode time and peak memory for each path. Peak memory is
+measured in a fresh subprocess per path as resident-set growth while decoding
+(VmHWM after resetting it on Linux, ru_maxrss elsewhere), so PIL's native
+buffers are included, not just Python allocations.
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Plant_Disease.preprocessing import decode_image, decode_image_legacy  # noqa: E402
+from serving.metrics import peak_rss_kb, reset_peak_rss  # noqa: E402
+
+PATHS = {
+    "legacy": decode_image_legacy,
+    "draft": decode_image,
+}
+
+
+def synthetic_jpeg(size: str) -> bytes:
+    width, height = (int(v) for v in size.lower().split("x"))
+    rng = np.random.default_rng(0)
+    # Smooth gradients plus noise so the JPEG has realistic entropy
+    x = np.linspace(0, 255, width, dtype=np.float32)[None, :]
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    for channel, base in enumerate((x + 0 * y, y + 0 * x, (x + y) / 2)):
+        noise = rng.integers(-12, 13, size=(height, width), dtype=np.int16)
+        pixels[..., channel] = np.clip(base + noise, 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _measure(name, images, repeat, queue):
+    decode = PATHS[name]
+    warmup = io.BytesIO()
+    Image.new("RGB", (256, 256)).save(warmup, format="JPEG")
+    decode(warmup.getvalue())  # codec warmup, small enough not to move the RSS peak
+    reset_peak_rss()
+    baseline = peak_rss_kb()
+    timings = []
+    for _ in range(repeat):
+        for data in images:
+            start = time.perf_counter()
+            decode(data)
+            timings.append((time.perf_counter() - start) * 1000.0)
+    queue.put({
+        "path": name,
+        "images": len(timings),
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": statistics.median(timings),
+        "max_ms": max(timings),
+        "peak_rss_growth_mb": (peak_rss_kb() - baseline) / 1024.0,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", help="Image files to decode")
+    parser.add_argument("--synthetic", default=None, help="Generate one synthetic JPEG of WIDTHxHEIGHT (e.g. 4000x3000)")
+    parser.add_argument("--repeat", type=int, default=10, help="Passes over the image set per path")
+    args = parser.parse_args()
+
+    images = []
+    for path in args.images:
+        with open(path, "rb") as f:
+            images.append(f.read())
+    if args.synthetic or not images:
+        images.append(synthetic_jpeg(args.synthetic or "4000x3000"))
+
+    print("🌿 Disease preprocessing benchmark")
+    print(f"📊 {len(images)} image(s), {args.repeat} pass(es), "
+          f"{sum(len(i) for i in images) / len(images) / 1e6:.2f} MB average encoded size")
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for name in PATHS:
+        queue = context.Queue()
+        proc = context.Process(target=_measure, args=(name, images, args.repeat, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+
+    print(f"\n{'path':<8} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9} {'peak RSS +MB':>13}")
+    for r in results:
+        print(f"{r['path']:<8} {r['mean_ms']:>9.2f} {r['p50_ms']:>9.2f} {r['max_ms']:>9.2f} {r['peak_rss_growth_mb']:>13.1f}")
+
+    legacy, draft = results
+    diffs = [np.abs(decode_image_legacy(i) - decode_image(i)).max() for i in images]
+    print(f"\n⚡ Speedup: {legacy['mean_ms'] / draft['mean_ms']:.1f}x")
+    print(f"📊 Max per-pixel difference vs legacy input: {max(diffs):.4f} (on a 0-1 scale)")
+
+
+if __name__ == "__main__":
+    main()
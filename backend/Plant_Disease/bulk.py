@@ -0,0 +1,119 @@
+# Plant_Disease/bulk.py
+import asyncio
+import json
+import zipfile
+
+import numpy as np
+
+from Plant_Disease.uploads import read_bounded
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp", ".tif", ".tiff")
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed", "application/x-zip")
+
+
+def is_zip_upload(upload) -> bool:
+    filename = (upload.filename or "").lower()
+    return filename.endswith(".zip") or upload.content_type in ZIP_CONTENT_TYPES
+
+
+def _read_entry(archive, info, max_bytes):
+    # Declared sizes can lie, so the read itself is bounded too
+    with archive.open(info) as entry:
+        return read_bounded(entry, max_bytes)
+
+
+def collect_image_sources(uploads, max_bytes: int):
+    """
+    [(filename, read_fn)] for every image in the request, without reading any
+    pixels. Zip archives are opened here (so a corrupt one raises BadZipFile
+    before any response is sent) and walked entry by entry; `read_fn()` returns
+    the raw bytes of one image (at most `max_bytes`, else UploadTooLarge) and
+    is only called when that image is decoded.
+    """
+    sources = []
+    for upload in uploads:
+        if is_zip_upload(upload):
+            archive = zipfile.ZipFile(upload.file)
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                sources.append((info.filename, lambda archive=archive, info=info: _read_entry(archive, info, max_bytes)))
+        else:
+            sources.append((upload.filename, lambda upload=upload: read_bounded(upload.file, max_bytes)))
+    return sources
+
+
+def _chunks(sources, size):
+    chunk = []
+    for source in sources:
+        chunk.append(source)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def stream_predictions(sources, decode_fn, infer_fn, format_fn, executor, batch_size: int = 32,
+                             input_shape=(128, 128, 3)):
+    """
+    Scores `sources` in fixed-size batches and yields one NDJSON line per image.
+
+    Each batch gets one preallocated float32 buffer and `decode_fn(bytes, out)`
+    writes every image straight into its row. A batch is decoded as a single
+    executor job, so one bulk request holds at most two slots of the shared
+    inference queue (decoding batch k+1 while batch k is on the model) and
+    cannot crowd out single-image, yield or price requests. At most those two
+    buffers exist at any time, so memory stays flat however many images the
+    request contains.
+    """
+
+    def decode_chunk(chunk, buffer):
+        errors = []
+        for i, (_, read_fn) in enumerate(chunk):
+            try:
+                decode_fn(read_fn(), buffer[i])
+                errors.append(None)
+            except Exception as e:  # a bad image only fails its own line
+                errors.append(e)
+        return errors
+
+    def start_decoding(chunk):
+        buffer = np.empty((len(chunk),) + tuple(input_shape), dtype=np.float32)
+        return buffer, asyncio.ensure_future(executor.run(decode_chunk, chunk, buffer))
+
+    async def finish(offset, chunk, buffer, decoding):
+        try:
+            errors = await decoding
+        except Exception as e:  # e.g. InferenceQueueFull
+            errors = [e] * len(chunk)
+        ok = [i for i, error in enumerate(errors) if error is None]
+        predictions = {}
+        if ok:
+            try:
+                batch = buffer if len(ok) == len(chunk) else buffer[ok]
+                rows = await executor.run(infer_fn, batch)
+                predictions = {i: rows[j] for j, i in enumerate(ok)}
+            except Exception as e:
+                errors = [e] * len(chunk)
+
+        for i, (filename, _) in enumerate(chunk):
+            line = {"index": offset + i, "filename": filename}
+            if i in predictions:
+                line.update(format_fn(predictions[i]))
+            else:
+                line.update({"status": "error", "error": f"Prediction failed: {errors[i]}"})
+            yield json.dumps(line) + "\n"
+
+    pending = None
+    offset = 0
+    for chunk in _chunks(sources, batch_size):
+        buffer, decoding = start_decoding(chunk)
+        if pending is not None:
+            async for line in finish(*pending):
+                yield line
+        pending = (offset, chunk, buffer, decoding)
+        offset += len(chunk)
+    if pending is not None:
+        async for line in finish(*pending):
+            yield line
@@ -0,0 +1,163 @@
+# Plant_Disease/cache.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Rough per-entry bookkeeping cost (dict slot, key string, ndarray header)
+ENTRY_OVERHEAD_BYTES = 256
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def perceptual_hash(input_arr: np.ndarray) -> str:
+    """
+    63-bit pHash of a (H, W, 3) image array: grayscale, 32x32 block means,
+    2-D DCT, then one bit per coefficient of the low-frequency 8x8 block above
+    the median, skipping the DC term (it only tracks overall brightness);
+    written as 16 hex digits. Re-encodes and mild recompression of the same
+    photo hash identically.
+    """
+    gray = input_arr[..., :3] @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    h, w = gray.shape
+    gray = gray[: h - h % 32, : w - w % 32]
+    small = gray.reshape(32, gray.shape[0] // 32, 32, gray.shape[1] // 32).mean(axis=(1, 3))
+    low = (_DCT_32 @ small @ _DCT_32.T)[:8, :8].flatten()[1:]
+    bits = low > np.median(low)
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+class PredictionCache:
+    """
+    Two-tier cache of class-probability rows keyed by the preprocessed image.
+
+    mode="exact" keys on a SHA-256 of the normalized 128x128 float input;
+    mode="phash" keys on a perceptual hash so near-duplicate re-encodes hit too;
+    mode="off" disables the cache. The memory tier is an LRU bounded by
+    `max_bytes`; when `disk_dir` is set every entry is also written there (in
+    the background) so it survives restarts and refills the memory tier on hit.
+    """
+
+    def __init__(self, mode: str = "exact", max_bytes: int = 16 * 1024 * 1024, disk_dir: str = None, namespace: str = ""):
+        self.mode = mode
+        self.max_bytes = int(max_bytes)
+        self.namespace = namespace
+        self.disk_dir = os.path.join(disk_dir, namespace or "default", mode) if disk_dir else None
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prediction-cache") if self.disk_dir else None
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("exact", "phash")
+
+    def key_for(self, input_arr: np.ndarray):
+        if not self.enabled:
+            return None
+        if self.mode == "phash":
+            return "p" + perceptual_hash(input_arr)
+        digest = hashlib.sha256(self.namespace.encode())
+        digest.update(np.ascontiguousarray(input_arr, dtype=np.float32).tobytes())
+        return "e" + digest.hexdigest()
+
+    def get(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._memory_hits += 1
+                return value
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+        self._remember(key, value)
+        return value
+
+    def put(self, key, prediction: np.ndarray):
+        if key is None:
+            return
+        value = np.array(prediction, dtype=np.float32)
+        self._remember(key, value)
+        if self._writer is not None:
+            self._writer.submit(self._write_disk, key, value)
+
+    def _remember(self, key, value):
+        size = value.nbytes + len(key) + ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                old_key, old_value = self._entries.popitem(last=False)
+                self._bytes -= old_value.nbytes + len(old_key) + ENTRY_OVERHEAD_BYTES
+                self._evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[1:3], key + ".npy")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            return np.load(self._disk_path(key))
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, value):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Prediction cache disk write failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "mode": self.mode,
+                "disk_dir": self.disk_dir,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "lookups": lookups,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_hit_ratio": round(self._memory_hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Convert the disease SavedModel to TFLite and compare backends.
+
+Usage (from backend/):
+    # Writes trained_model_dynamic.tflite and trained_model_int8.tflite next to the SavedModel
+    python -m Plant_Disease.convert_tflite convert --calibration-dir path/to/valid
+
+    # Accuracy vs. latency of saved_model / dynamic / int8 on a labelled image folder
+    # (one sub-folder per class name, e.g. the PlantVillage valid/ split)
+    python -m Plant_Disease.convert_tflite report --data-dir path/to/valid --per-class 20
+
+Serve a converted model with DISEASE_MODEL_BACKEND=tflite and
+DISEASE_TFLITE_MODEL=trained_model_int8.tflite (or trained_model_dynamic.tflite).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Plant_Disease.bulk import IMAGE_EXTENSIONS  # noqa: E402
+from Plant_Disease.labels import class_names  # noqa: E402
+from Plant_Disease.inference_plan import InferencePlan, saved_model_compiler  # noqa: E402
+from Plant_Disease.preprocessing import decode_image  # noqa: E402
+from Plant_Disease.tflite_backend import TFLiteModel  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVED_MODEL_PATH = os.path.join(BASE_DIR, "trained_model_savedmodel")
+VARIANTS = ("dynamic", "int8")
+
+
+def list_images(data_dir, per_class=None):
+    """(path, class_name) pairs from a folder with one sub-folder per class"""
+    samples = []
+    for class_name in sorted(os.listdir(data_dir)):
+        class_dir = os.path.join(data_dir, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(IMAGE_EXTENSIONS))
+        samples.extend((os.path.join(class_dir, f), class_name) for f in files[:per_class])
+    return samples
+
+
+def representative_dataset(calibration_dir, samples):
+    if calibration_dir:
+        paths = [path for path, _ in list_images(calibration_dir)]
+        rng = np.random.default_rng(0)
+        rng.shuffle(paths)
+        paths = paths[:samples]
+        print(f"📊 Calibrating int8 ranges on {len(paths)} images from {calibration_dir}")
+
+        def gen():
+            for path in paths:
+                with open(path, "rb") as f:
+                    yield [decode_image(f.read())[None, ...]]
+    else:
+        print("⚠️ No --calibration-dir given: calibrating on random inputs; int8 accuracy will suffer")
+
+        def gen():
+            rng = np.random.default_rng(0)
+            for _ in range(samples):
+                yield [rng.random((1, 128, 128, 3), dtype=np.float32)]
+    return gen
+
+
+def convert(args):
+    import tensorflow as tf
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for variant in VARIANTS:
+        converter = tf.lite.TFLiteConverter.from_saved_model(args.saved_model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if variant == "int8":
+            converter.representative_dataset = representative_dataset(args.calibration_dir, args.calibration_samples)
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+            # Keep float32 model I/O so the serving preprocessing is unchanged
+            converter.inference_input_type = tf.float32
+            converter.inference_output_type = tf.float32
+        print(f"🔄 Converting {variant}...")
+        tflite_bytes = converter.convert()
+        out_path = os.path.join(args.out_dir, f"trained_model_{variant}.tflite")
+        with open(out_path, "wb") as f:
+            f.write(tflite_bytes)
+        print(f"✅ Wrote {out_path} ({len(tflite_bytes) / 1e6:.1f} MB)")
+
+
+def _dir_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def _latency(plan, batch, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        plan(batch)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+
+def report(args):
+    import tensorflow as tf
+
+    samples = list_images(args.data_dir, args.per_class)
+    if not samples:
+        sys.exit(f"❌ No labelled images found under {args.data_dir}")
+    inputs = np.empty((len(samples), 128, 128, 3), dtype=np.float32)
+    for i, (path, _) in enumerate(samples):
+        with open(path, "rb") as f:
+            inputs[i] = decode_image(f.read())
+    labels = np.array([class_names.index(c) if c in class_names else -1 for _, c in samples])
+    print(f"📊 {len(samples)} labelled images from {args.data_dir}")
+
+    buckets = (1, args.batch_size)
+    backends = {"saved_model": (args.saved_model, lambda: saved_model_compiler(tf.saved_model.load(args.saved_model)))}
+    for variant in VARIANTS:
+        path = os.path.join(args.out_dir, f"trained_model_{variant}.tflite")
+        if os.path.exists(path):
+            backends[f"tflite_{variant}"] = (path, lambda path=path: TFLiteModel(path, args.threads).compile_fn)
+
+    results, reference = [], None
+    for name, (path, make_compile_fn) in backends.items():
+        start = time.perf_counter()
+        plan = InferencePlan(make_compile_fn(), buckets=buckets, name=name)
+        plan.warmup(passes=1)
+        load_seconds = time.perf_counter() - start
+
+        predicted = np.argmax(plan(inputs), axis=1)
+        if reference is None:
+            reference = predicted
+        single_p50, single_p99 = _latency(plan, inputs[:1], args.repeat)
+        batch_p50, _ = _latency(plan, inputs[:args.batch_size], max(3, args.repeat // 10))
+        results.append({
+            "backend": name,
+            "size_mb": round(_dir_size(path) / 1e6, 2),
+            "load_s": round(load_seconds, 2),
+            "top1_accuracy": round(float(np.mean(predicted == labels)), 4),
+            "agreement_with_saved_model": round(float(np.mean(predicted == reference)), 4),
+            "single_p50_ms": round(single_p50, 2),
+            "single_p99_ms": round(single_p99, 2),
+            f"batch{args.batch_size}_ms_per_image": round(batch_p50 / min(args.batch_size, len(inputs)), 2),
+        })
+
+    columns = list(results[0].keys())
+    print("\n" + " | ".join(columns))
+    for row in results:
+        print(" | ".join(str(row[c]) for c in columns))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📝 Report written to {args.json}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = sub.add_parser("convert", help="SavedModel -> dynamic-range and int8 TFLite")
+    convert_parser.add_argument("--saved-model", default=SAVED_MODEL_PATH)
+    convert_parser.add_argument("--out-dir", default=BASE_DIR)
+    convert_parser.add_argument("--calibration-dir", default=None, help="Labelled image folder used for int8 calibration")
+    convert_parser.add_argument("--calibration-samples", type=int, default=200)
+    convert_parser.set_defaults(func=convert)
+
+    report_parser = sub.add_parser("report", help="Accuracy vs. latency of every available backend")
+    report_parser.add_argument("--data-dir", required=True, help="Folder with one sub-folder of images per class")
+    report_parser.add_argument("--per-class", type=int, default=20)
+    report_parser.add_argument("--saved-model", default=SAVED_MODEL_PATH)
+    report_parser.add_argument("--out-dir", default=BASE_DIR, help="Where the .tflite files live")
+    report_parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    report_parser.add_argument("--batch-size", type=int, default=32)
+    report_parser.add_argument("--repeat", type=int, default=50)
+    report_parser.add_argument("--json", default=None, help="Also write the report as JSON")
+    report_parser.set_defaults(func=report)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
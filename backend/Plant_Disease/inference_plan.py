@@ -0,0 +1,130 @@
+# Plant_Disease/inference_plan.py
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+
+class InferencePlan:
+    """
+    A model call resolved once at load time.
+
+    `compile_fn(batch_size)` returns a callable for exactly that batch size
+    (e.g. a traced tf ConcreteFunction). One is built per bucket; incoming
+    batches are zero-padded up to the nearest bucket so every request reuses
+    an already-traced graph, and batches above the largest bucket are split.
+    `warmup()` pushes dummy batches through every bucket so tracing and
+    allocator growth happen before the first real request.
+    """
+
+    def __init__(self, compile_fn, buckets=DEFAULT_BUCKETS, input_shape=(128, 128, 3), name: str = ""):
+        self.name = name
+        self.input_shape = tuple(input_shape)
+        self.buckets = sorted({int(b) for b in buckets if int(b) > 0})
+        self._calls = {size: compile_fn(size) for size in self.buckets}
+        self.ready = False
+        self.warmup_seconds = None
+        self._lock = threading.Lock()
+
+    def _bucket_for(self, n: int) -> int:
+        for size in self.buckets:
+            if size >= n:
+                return size
+        return self.buckets[-1]
+
+    def __call__(self, input_arr: np.ndarray) -> np.ndarray:
+        n = len(input_arr)
+        largest = self.buckets[-1]
+        if n > largest:
+            return np.concatenate([self(input_arr[i:i + largest]) for i in range(0, n, largest)])
+
+        size = self._bucket_for(n)
+        if size != n:
+            padded = np.zeros((size,) + self.input_shape, dtype=np.float32)
+            padded[:n] = input_arr
+            input_arr = padded
+        return np.asarray(self._calls[size](np.asarray(input_arr, dtype=np.float32)))[:n]
+
+    def warmup(self, passes: int = 2):
+        with self._lock:
+            start = time.perf_counter()
+            for size in self.buckets:
+                dummy = np.zeros((size,) + self.input_shape, dtype=np.float32)
+                for _ in range(max(1, passes)):
+                    self._calls[size](dummy)
+            self.warmup_seconds = round(time.perf_counter() - start, 3)
+            self.ready = True
+        return self.warmup_seconds
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "backend": self.name,
+            "batch_buckets": self.buckets,
+            "warmup_seconds": self.warmup_seconds,
+        }
+
+
+def _first_output(outputs):
+    if isinstance(outputs, dict):
+        return next(iter(outputs.values()))
+    return outputs
+
+
+def saved_model_compiler(model):
+    """Resolves signature, input key and output key once, then traces one graph per batch size"""
+    import tensorflow as tf
+
+    if "serving_default" in model.signatures:
+        infer = model.signatures["serving_default"]
+    else:
+        infer = model.signatures[list(model.signatures.keys())[0]]
+    input_keys = list(infer.structured_input_signature[1].keys())
+    input_key = input_keys[0] if input_keys else "input_1"
+    output_key = list(infer.structured_outputs.keys())[0]
+    input_shape = (128, 128, 3)
+    if input_keys:
+        declared = tuple(infer.structured_input_signature[1][input_key].shape[1:])
+        if all(dim is not None for dim in declared):
+            input_shape = declared
+
+    @tf.function
+    def call(x):
+        return infer(**{input_key: x})[output_key]
+
+    def compile_fn(batch_size):
+        concrete = call.get_concrete_function(tf.TensorSpec((batch_size,) + input_shape, tf.float32))
+
+        def run(batch, _model=model):  # holding the model keeps its variables alive
+            return concrete(tf.constant(batch)).numpy()
+
+        return run
+
+    return compile_fn
+
+
+def keras_compiler(model, is_tfsm_layer: bool = False):
+    """For TFSMLayer and Keras models: one traced inference graph per batch size"""
+    import tensorflow as tf
+
+    @tf.function
+    def call(x):
+        outputs = model(x) if is_tfsm_layer else model(x, training=False)
+        return _first_output(outputs)
+
+    def compile_fn(batch_size):
+        concrete = call.get_concrete_function(tf.TensorSpec((batch_size, 128, 128, 3), tf.float32))
+
+        def run(batch, _model=model):
+            return concrete(tf.constant(batch)).numpy()
+
+        return run
+
+    return compile_fn
+
+
+def eager_compiler(predict_fn):
+    """No tracing available (mock model): call the model as-is"""
+    return lambda batch_size: predict_fn
@@ -0,0 +1,60 @@
+# Plant_Disease/preprocessing.py
+import io
+
+import numpy as np
+from PIL import Image
+
+TARGET_SIZE = (128, 128)
+# Bumped whenever decoding changes the model input bits (used to namespace caches)
+PREPROCESS_VERSION = "draft-v1"
+
+
+class ImageTooLarge(ValueError):
+    """Raised when an image header declares more pixels than we are willing to decode"""
+
+
+def _open(data, max_pixels=None):
+    """Opens bytes or a file object; only the header is read at this point"""
+    image = Image.open(io.BytesIO(data) if isinstance(data, (bytes, bytearray, memoryview)) else data)
+    if max_pixels and image.width * image.height > max_pixels:
+        raise ImageTooLarge(
+            f"Image is {image.width}x{image.height}; at most {max_pixels / 1e6:.0f} megapixels are accepted"
+        )
+    return image
+
+
+def decode_into(data, out: np.ndarray, max_pixels=None):
+    """
+    Decodes one image straight into `out` (a (128, 128, 3) float32 slot, e.g.
+    one row of a preallocated batch buffer).
+
+    JPEGs are opened in draft mode so libjpeg's DCT scaling decodes a 12MP
+    photo at 1/2, 1/4 or 1/8 size - the smallest that is still >= 128x128 -
+    instead of materialising every pixel. One resize then lands on the model
+    size, and the uint8 pixels are scaled into `out` without intermediate
+    float copies. `data` may be bytes or a (spooled) file object; the pixel
+    count is checked from the header before anything is decoded.
+    """
+    image = _open(data, max_pixels)
+    if image.format == "JPEG":
+        image.draft("RGB", TARGET_SIZE)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != TARGET_SIZE:
+        image = image.resize(TARGET_SIZE)
+    np.divide(np.asarray(image), np.float32(255.0), out=out, casting="unsafe")
+    return out
+
+
+def decode_image(data, max_pixels=None) -> np.ndarray:
+    return decode_into(data, np.empty(TARGET_SIZE[::-1] + (3,), dtype=np.float32), max_pixels)
+
+
+def decode_image_legacy(data, max_pixels=None) -> np.ndarray:
+    """The original path: full-resolution decode, convert, resize, float copy, divide"""
+    image = _open(data, max_pixels)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image = image.resize(TARGET_SIZE)
+    input_arr = np.asarray(image, dtype=np.float32)  # what img_to_array does
+    return input_arr / 255.0
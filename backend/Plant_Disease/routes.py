@@ -1,127 +1,113 @@
-import tensorflow as tf
 import numpy as np
 from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List
 from PIL import Image
-import io
 # from langchain_google_genai import ChatGoogleGenerativeAI  # Temporarily disabled
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import PromptTemplate
 import os
+from Plant_Disease.labels import class_names
+from Plant_Disease.batching import MicroBatcher
+from Plant_Disease.inference_plan import InferencePlan, saved_model_compiler, keras_compiler, eager_compiler
+from Plant_Disease.tflite_backend import TFLiteModel
+from Plant_Disease.cache import PredictionCache
+from Plant_Disease.preprocessing import decode_image, decode_image_legacy, decode_into, PREPROCESS_VERSION, ImageTooLarge
+from Plant_Disease.uploads import UploadTooLarge, set_upload_spool_threshold
+from Plant_Disease.bulk import collect_image_sources, stream_predictions
+from serving.executor import inference_executor, InferenceQueueFull
+from serving.lazy import LazyResource
 # Use tf.keras instead of standalone keras
 
 # ✅ Router for Plant Disease
 router = APIRouter(prefix="/disease", tags=["Plant Disease"])
 
-# ✅ Class labels
-class_names = [
-    "Apple___Apple_scab",
-    "Apple___Black_rot",
-    "Apple___Cedar_apple_rust",
-    "Apple___healthy",
-    "Blueberry___healthy",
-    "Cherry_(including_sour)___Powdery_mildew",
-    "Cherry_(including_sour)___healthy",
-    "Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot",
-    "Corn_(maize)___Common_rust_",
-    "Corn_(maize)___Northern_Leaf_Blight",
-    "Corn_(maize)___healthy",
-    "Grape___Black_rot",
-    "Grape___Esca_(Black_Measles)",
-    "Grape___Leaf_blight_(Isariopsis_Leaf_Spot)",
-    "Grape___healthy",
-    "Orange___Haunglongbing_(Citrus_greening)",
-    "Peach___Bacterial_spot",
-    "Peach___healthy",
-    "Pepper,_bell___Bacterial_spot",
-    "Pepper,_bell___healthy",
-    "Potato___Early_blight",
-    "Potato___Late_blight",
-    "Potato___healthy",
-    "Raspberry___healthy",
-    "Soybean___healthy",
-    "Squash___Powdery_mildew",
-    "Strawberry___Leaf_scorch",
-    "Strawberry___healthy",
-    "Tomato___Bacterial_spot",
-    "Tomato___Early_blight",
-    "Tomato___Late_blight",
-    "Tomato___Leaf_Mold",
-    "Tomato___Septoria_leaf_spot",
-    "Tomato___Spider_mites Two-spotted_spider_mite",
-    "Tomato___Target_Spot",
-    "Tomato___Tomato_Yellow_Leaf_Curl_Virus",
-    "Tomato___Tomato_mosaic_virus",
-    "Tomato___healthy"
-]
-
 # ✅ Path to trained model
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "trained_model_savedmodel")
 
-# ✅ Load model with fallback to mock model for development
-try:
+# ✅ Optional quantized TFLite backend for CPU-only boxes (build it with Plant_Disease/convert_tflite.py)
+MODEL_BACKEND = os.getenv("DISEASE_MODEL_BACKEND", "saved_model")
+TFLITE_MODEL_PATH = os.path.join(BASE_DIR, os.getenv("DISEASE_TFLITE_MODEL", "trained_model_int8.tflite"))
+TFLITE_THREADS = int(os.getenv("DISEASE_TFLITE_THREADS", os.cpu_count() or 1))
+
+# Create a simple mock model that returns realistic predictions
+class MockModel:
+    def __init__(self):
+        self.num_classes = len(class_names)
+        print(f"📊 Mock model created with {self.num_classes} classes")
+    def predict(self, input_arr):
+        # Return random but realistic predictions
+        np.random.seed(42)  # For consistent results during development
+        predictions = np.random.dirichlet(np.ones(self.num_classes) * 0.1, size=len(input_arr))
+        # Boost one class to simulate a detection
+        max_idx = np.random.randint(0, self.num_classes)
+        predictions[:, max_idx] *= 5  # Make one class more likely
+        predictions = predictions / np.sum(predictions, axis=1, keepdims=True)  # Renormalize
+        print(f"📊 Mock prediction generated, max confidence: {np.max(predictions):.3f}")
+        return predictions
+
+def load_disease_model():
+    """Loader chain: [tflite] → saved_model → TFSMLayer → .h5/.keras → mock. Returns (model, model_type)."""
     print(f"\n🔄 Loading model from: {MODEL_PATH}")
-    
+
+    # Zeroth try (opt-in): quantized TFLite interpreter
+    if MODEL_BACKEND == "tflite":
+        try:
+            tflite_model = TFLiteModel(TFLITE_MODEL_PATH, num_threads=TFLITE_THREADS)
+            print(f"\n✅ Model loaded successfully using TFLite ({os.path.basename(TFLITE_MODEL_PATH)}, {TFLITE_THREADS} threads)")
+            return tflite_model, "tflite"
+        except Exception as e0:
+            print(f"\n⚠️ TFLite backend failed: {e0}")
+
+    import tensorflow as tf  # imported here so importing the router does not pay for TensorFlow
+
     # First try: tf.saved_model.load (works with Keras 3 for inference)
     try:
         model = tf.saved_model.load(MODEL_PATH)
         print("\n✅ Model loaded successfully using tf.saved_model.load")
         print(f"📊 Model signatures: {list(model.signatures.keys())}")
-        model_type = "saved_model"
+        return model, "saved_model"
     except Exception as e1:
         print(f"\n⚠️ tf.saved_model.load failed: {e1}")
-        # Second try: TFSMLayer
-        try:
-            import keras
-            model = keras.layers.TFSMLayer(MODEL_PATH, call_endpoint='serving_default')
-            print("\n✅ Model loaded successfully using TFSMLayer")
-            model_type = "tfsm_layer"
-        except Exception as e2:
-            print(f"\n⚠️ TFSMLayer also failed: {e2}")
-            # Third try: tf.keras.models.load_model for .h5 or .keras
-            try:
-                keras_model_path = os.path.join(BASE_DIR, "trained_model.h5")
-                if os.path.exists(keras_model_path):
-                    model = tf.keras.models.load_model(keras_model_path)
-                    print("\n✅ Model loaded successfully using tf.keras.models.load_model (.h5)")
-                    model_type = "keras_h5"
-                else:
-                    keras_model_path = os.path.join(BASE_DIR, "trained_model.keras")
-                    if os.path.exists(keras_model_path):
-                        model = tf.keras.models.load_model(keras_model_path)
-                        print("\n✅ Model loaded successfully using tf.keras.models.load_model (.keras)")
-                        model_type = "keras_keras"
-                    else:
-                        raise FileNotFoundError("No .h5 or .keras model file found.")
-            except Exception as e3:
-                print(f"\n⚠️ tf.keras.models.load_model also failed: {e3}")
-                # Fallback: Create a mock model for development/testing
-                print("\n🔄 Creating mock model for development/testing...")
-                # Create a simple mock model that returns realistic predictions
-                class MockModel:
-                    def __init__(self):
-                        self.num_classes = len(class_names)
-                        print(f"📊 Mock model created with {self.num_classes} classes")
-                    def predict(self, input_arr):
-                        # Return random but realistic predictions
-                        np.random.seed(42)  # For consistent results during development
-                        predictions = np.random.dirichlet(np.ones(self.num_classes) * 0.1, size=1)
-                        # Boost one class to simulate a detection
-                        max_idx = np.random.randint(0, self.num_classes)
-                        predictions[0][max_idx] *= 5  # Make one class more likely
-                        predictions = predictions / np.sum(predictions, axis=1, keepdims=True)  # Renormalize
-                        print(f"📊 Mock prediction generated, max confidence: {np.max(predictions):.3f}")
-                        return predictions
-                model = MockModel()
-                model_type = "mock"
-                print("\n✅ Mock model created successfully for testing")
-                print("⚠️ Note: This is a temporary mock model for development.")
-                print("📝 To use the real model, please retrain it with TensorFlow 2.17+ or provide a compatible .keras file")
-except Exception as e:
-    print(f"\n❌ Unexpected error during model loading: {e}")
-    model = None
-    model_type = "none"
+
+    # Second try: TFSMLayer
+    try:
+        import keras
+        model = keras.layers.TFSMLayer(MODEL_PATH, call_endpoint='serving_default')
+        print("\n✅ Model loaded successfully using TFSMLayer")
+        return model, "tfsm_layer"
+    except Exception as e2:
+        print(f"\n⚠️ TFSMLayer also failed: {e2}")
+
+    # Third try: tf.keras.models.load_model for .h5 or .keras
+    try:
+        keras_model_path = os.path.join(BASE_DIR, "trained_model.h5")
+        if os.path.exists(keras_model_path):
+            model = tf.keras.models.load_model(keras_model_path)
+            print("\n✅ Model loaded successfully using tf.keras.models.load_model (.h5)")
+            return model, "keras_h5"
+        keras_model_path = os.path.join(BASE_DIR, "trained_model.keras")
+        if os.path.exists(keras_model_path):
+            model = tf.keras.models.load_model(keras_model_path)
+            print("\n✅ Model loaded successfully using tf.keras.models.load_model (.keras)")
+            return model, "keras_keras"
+        raise FileNotFoundError("No .h5 or .keras model file found.")
+    except Exception as e3:
+        print(f"\n⚠️ tf.keras.models.load_model also failed: {e3}")
+
+    # Fallback: Create a mock model for development/testing
+    print("\n🔄 Creating mock model for development/testing...")
+    model = MockModel()
+    print("\n✅ Mock model created successfully for testing")
+    print("⚠️ Note: This is a temporary mock model for development.")
+    print("📝 To use the real model, please retrain it with TensorFlow 2.17+ or provide a compatible .keras file")
+    return model, "mock"
+
+# ✅ Model, inference plan and prediction cache are loaded on first use (or preloaded in the
+# background at startup, see PRELOAD_MODELS in main.py) so importing this router stays cheap
+model = None
+model_type = "unloaded"
+inference_plan = None
+prediction_cache = None
 
 # ✅ Gemini setup (temporarily disabled - requires Google API credentials)
 # from langchain_google_genai import ChatGoogleGenerativeAI
@@ -134,8 +120,8 @@ except Exception as e:
 gemini_llm = None  # Temporary placeholder
 parser = None
 
-prompt1 = PromptTemplate(
-    template="""
+# Prompt for the Gemini advice chain (chain1) once it is re-enabled; LangChain is not imported until then
+ADVICE_PROMPT_TEMPLATE = """
         You are an agriculture expert. 
         A farmer's plant or leaf has the disease: {disease}.
         Suggest:
@@ -161,97 +147,182 @@ prompt1 = PromptTemplate(
         ### Prevention
         --- (if any)
         and never try highlighting any text using **. so give proper response.
-    """,
-    input_variables=["disease"]
-)
+    """
+
 chain1 = None  # Temporarily disabled until Gemini credentials are set up
 
+# ✅ Inference plan: signature/keys resolved and graphs traced once per batch bucket at load time
+BATCH_MAX_SIZE = int(os.getenv("DISEASE_BATCH_MAX_SIZE", 16))
+STREAM_BATCH_SIZE = int(os.getenv("DISEASE_STREAM_BATCH_SIZE", 32))
+BATCH_BUCKETS = [int(b) for b in os.getenv("DISEASE_BATCH_BUCKETS", "1,2,4,8,16,32").split(",") if b.strip()]
+BATCH_BUCKETS = sorted(set(BATCH_BUCKETS) | {BATCH_MAX_SIZE, STREAM_BATCH_SIZE})
+
+def build_inference_plan():
+    if model_type == "tflite":
+        compile_fn = model.compile_fn
+    elif model_type == "saved_model":
+        compile_fn = saved_model_compiler(model)
+    elif model_type == "tfsm_layer":
+        compile_fn = keras_compiler(model, is_tfsm_layer=True)
+    elif model_type in ("keras_h5", "keras_keras"):
+        compile_fn = keras_compiler(model)
+    else:
+        compile_fn = eager_compiler(model.predict)
+    return InferencePlan(compile_fn, buckets=BATCH_BUCKETS, name=model_type)
+
+# ✅ Batched model call (input_arr: (N, 128, 128, 3) float32 -> (N, num_classes))
+def run_model(input_arr):
+    return inference_plan(input_arr)
+
+# ✅ Micro-batching queue shared by all concurrent /predict calls
+batcher = MicroBatcher(
+    run_model,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=float(os.getenv("DISEASE_BATCH_MAX_WAIT_MS", 5)),
+    executor=inference_executor,
+)
+
+# ✅ Upload limits: byte caps enforced while the body is read (see upload_limits), header-checked
+# pixel counts, and uploads above DISEASE_UPLOAD_SPOOL_BYTES spooled to disk instead of RAM
+MAX_UPLOAD_BYTES = int(os.getenv("DISEASE_MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("DISEASE_MAX_BATCH_UPLOAD_BYTES", 512 * 1024 * 1024))
+MAX_IMAGE_PIXELS = int(os.getenv("DISEASE_MAX_IMAGE_PIXELS", 50_000_000))
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS  # PIL's own decompression-bomb guard
+set_upload_spool_threshold(int(os.getenv("DISEASE_UPLOAD_SPOOL_BYTES", 1024 * 1024)))
+
+def upload_limits(mount_prefix: str = "") -> dict:
+    """Request-body caps for UploadSizeLimitMiddleware, keyed by full path under `mount_prefix`"""
+    return {
+        f"{mount_prefix}{router.prefix}/predict": MAX_UPLOAD_BYTES,
+        f"{mount_prefix}{router.prefix}/predict-batch": MAX_BATCH_UPLOAD_BYTES,
+    }
+
+# ✅ Draft-mode JPEG decoding straight into float32 buffers (DISEASE_FAST_DECODE=0 restores the full decode)
+FAST_DECODE = os.getenv("DISEASE_FAST_DECODE", "1") != "0"
+
+def decode_into_buffer(contents, out):
+    if FAST_DECODE:
+        return decode_into(contents, out, MAX_IMAGE_PIXELS)
+    out[...] = decode_image_legacy(contents, MAX_IMAGE_PIXELS)
+    return out
+
+# ✅ Prediction cache keyed on the normalized 128x128 input (DISEASE_CACHE_MODE=exact|phash|off)
+def _model_version():
+    model_file = TFLITE_MODEL_PATH if model_type == "tflite" else os.path.join(MODEL_PATH, "saved_model.pb")
+    if os.path.exists(model_file):
+        return f"{model_type}-{int(os.path.getmtime(model_file))}-{PREPROCESS_VERSION}"
+    return f"{model_type}-{PREPROCESS_VERSION}"
+
+def load_disease_runtime():
+    """Loads the model, traces and warms every batch bucket, and opens the prediction cache"""
+    global model, model_type, inference_plan, prediction_cache
+    try:
+        model, model_type = load_disease_model()
+    except Exception as e:
+        print(f"\n❌ Unexpected error during model loading: {e}")
+        model, model_type = None, "none"
+
+    if model is not None:
+        try:
+            inference_plan = build_inference_plan()
+            print(f"\n🔥 Warming up {model_type} for batch sizes {inference_plan.buckets}...")
+            warmup_seconds = inference_plan.warmup(passes=int(os.getenv("DISEASE_WARMUP_PASSES", 2)))
+            print(f"✅ Disease model warm and ready ({warmup_seconds}s)")
+        except Exception as e:
+            print(f"\n❌ Failed to build inference plan: {e}")
+            inference_plan = None
+
+    prediction_cache = PredictionCache(
+        mode=os.getenv("DISEASE_CACHE_MODE", "exact"),
+        max_bytes=int(os.getenv("DISEASE_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+        disk_dir=os.getenv("DISEASE_CACHE_DIR") or None,
+        namespace=_model_version(),
+    )
+    return inference_plan
+
+disease_runtime = LazyResource("plant_disease", load_disease_runtime)
+
+def run_model_cached(input_arr):
+    """run_model that only sends rows missing from the prediction cache to the model"""
+    keys = [prediction_cache.key_for(row) for row in input_arr]
+    rows = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    if missing:
+        fresh = run_model(input_arr[missing])
+        for j, i in enumerate(missing):
+            rows[i] = fresh[j]
+            prediction_cache.put(keys[i], fresh[j])
+    return np.stack(rows)
+
+def preprocess_image(source):
+    """Bytes or file object -> (128, 128, 3) float32 in [0, 1] (reduced-resolution JPEG decode)"""
+    if FAST_DECODE:
+        return decode_image(source, MAX_IMAGE_PIXELS)
+    return decode_image_legacy(source, MAX_IMAGE_PIXELS)
+
+def preprocess_and_lookup(source):
+    input_arr = preprocess_image(source)
+    key = prediction_cache.key_for(input_arr)
+    return input_arr, key, prediction_cache.get(key)
+
+def build_prediction_response(prediction):
+    """Turns one row of class probabilities into the /predict response body"""
+    result_index = int(np.argmax(prediction))
+    confidence = float(prediction[result_index])
+
+    print(f"📊 Predicted class index: {result_index}")
+    print(f"📊 Confidence: {confidence:.4f}")
+    result = class_names[result_index]
+    # Generate basic advice based on disease type
+    if "healthy" in result.lower():
+        disease_advice = "Good news! Your plant appears to be healthy. Continue with regular care and monitoring."
+    elif "unknown" in result.lower():
+        disease_advice = "Unable to identify the specific disease. Please consult with a local agricultural expert for proper diagnosis."
+    else:
+        disease_advice = f"Disease detected: {result}. Please consult with a local agricultural expert for specific treatment recommendations."
+
+    # AI advice (temporarily using simple rule-based advice)
+    ai_response = disease_advice
+    if model_type == "mock":
+        ai_response += "\n\n⚠️ Note: This prediction is from a mock model for development testing. For real disease detection, please provide a properly trained model."
+
+    return {
+        "class": result,
+        "confidence": round(confidence * 100, 2),  # Convert to percentage
+        "advice": ai_response,
+        "model_type": model_type,
+        "status": "success",
+        "all_predictions": prediction.tolist()[:10]  # Show top 10 predictions for debugging
+    }
+
 # ✅ Prediction endpoint
 @router.post("/predict")
 async def predict(file: UploadFile = File(...)):
-    if model is None:
+    if await disease_runtime.aget() is None:
         return JSONResponse(content={"error": "Model not loaded."}, status_code=500)
 
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        return JSONResponse(content={
+            "error": f"Upload too large (limit {MAX_UPLOAD_BYTES} bytes)",
+            "status": "error"
+        }, status_code=413)
+
     try:
-        # Read and preprocess image
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
-        
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-            
-        # Resize to model input size
-        image = image.resize((128, 128))
-        
-        # Convert to array and normalize
-        input_arr = tf.keras.preprocessing.image.img_to_array(image)
-        input_arr = input_arr / 255.0  # Normalize pixel values
-        input_arr = np.expand_dims(input_arr, axis=0)
-        
-        print(f"📊 Input shape: {input_arr.shape}")
-
-        # Make prediction based on model type
-        global model_type
-        if model_type == "mock":
-            prediction = model.predict(input_arr)
-        elif model_type == "saved_model":
-            # Handle tf.saved_model.load predictions
-            if 'serving_default' in model.signatures:
-                infer = model.signatures["serving_default"]
-            else:
-                sig_key = list(model.signatures.keys())[0]
-                infer = model.signatures[sig_key]
-            
-            input_keys = list(infer.structured_input_signature[1].keys())
-            input_key = input_keys[0] if input_keys else 'input_1'
-            
-            prediction_dict = infer(**{input_key: tf.constant(input_arr, dtype=tf.float32)})
-            output_keys = list(prediction_dict.keys())
-            prediction = prediction_dict[output_keys[0]].numpy()
-        elif model_type == "tfsm_layer":
-            # Handle TFSMLayer predictions
-            prediction = model(input_arr)
-            if isinstance(prediction, dict):
-                prediction_key = list(prediction.keys())[0]
-                prediction = prediction[prediction_key].numpy()
-            else:
-                prediction = prediction.numpy()
-        else:
-            # Fallback prediction method
-            prediction = model.predict(input_arr)
-        
-        print(f"📊 Prediction shape: {prediction.shape}")
-        print(f"📊 Prediction values: {prediction[0][:5]}...")  # Show first 5 values
-        
-        result_index = np.argmax(prediction, axis=1)[0]
-        confidence = float(prediction[0][result_index])
-        
-        print(f"📊 Predicted class index: {result_index}")
-        print(f"📊 Confidence: {confidence:.4f}")
-        result = class_names[result_index]
-        # Generate basic advice based on disease type
-        if "healthy" in result.lower():
-            disease_advice = "Good news! Your plant appears to be healthy. Continue with regular care and monitoring."
-        elif "unknown" in result.lower():
-            disease_advice = "Unable to identify the specific disease. Please consult with a local agricultural expert for proper diagnosis."
-        else:
-            disease_advice = f"Disease detected: {result}. Please consult with a local agricultural expert for specific treatment recommendations."
-
-        # AI advice (temporarily using simple rule-based advice)
-        ai_response = disease_advice
-        if model_type == "mock":
-            ai_response += "\n\n⚠️ Note: This prediction is from a mock model for development testing. For real disease detection, please provide a properly trained model."
-
-        return {
-            "class": result,
-            "confidence": round(confidence * 100, 2),  # Convert to percentage
-            "advice": ai_response,
-            "model_type": model_type,
-            "status": "success",
-            "all_predictions": prediction[0].tolist()[:10]  # Show top 10 predictions for debugging
-        }
+        # Decode straight from the (possibly disk-spooled) upload and check the
+        # prediction cache, off the event loop
+        input_arr, cache_key, prediction = await inference_executor.run(preprocess_and_lookup, file.file)
+
+        if prediction is None:
+            # Queued with other concurrent uploads and run as one batch
+            prediction = await batcher.submit(input_arr)
+            prediction_cache.put(cache_key, prediction)
+
+        return build_prediction_response(prediction)
 
+    except InferenceQueueFull as e:
+        return JSONResponse(content={"error": str(e), "status": "busy"}, status_code=503)
+    except (ImageTooLarge, UploadTooLarge, Image.DecompressionBombError) as e:
+        return JSONResponse(content={"error": str(e), "status": "error"}, status_code=413)
     except Exception as e:
         print(f"❌ Prediction error: {e}")
         import traceback
@@ -260,3 +331,49 @@ async def predict(file: UploadFile = File(...)):
             "error": f"Prediction failed: {str(e)}",
             "status": "error"
         }, status_code=500)
+
+# ✅ Bulk scoring: many files or one zip archive in, one NDJSON line per image out
+@router.post("/predict-batch")
+async def predict_batch(files: List[UploadFile] = File(...)):
+    if await disease_runtime.aget() is None:
+        return JSONResponse(content={"error": "Model not loaded."}, status_code=500)
+
+    try:
+        sources = collect_image_sources(files, MAX_UPLOAD_BYTES)
+    except zipfile.BadZipFile as e:
+        return JSONResponse(content={"error": f"Invalid zip archive: {e}", "status": "error"}, status_code=400)
+
+    lines = stream_predictions(
+        sources,
+        decode_fn=decode_into_buffer,
+        infer_fn=run_model_cached,
+        format_fn=build_prediction_response,
+        executor=inference_executor,
+        batch_size=STREAM_BATCH_SIZE,
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+# ✅ Readiness: 200 only once the model is loaded and every batch bucket has been warmed up
+# (does not trigger the load itself)
+@router.get("/ready")
+def readiness():
+    if inference_plan is None:
+        return JSONResponse(content={
+            "ready": False,
+            "model_type": model_type,
+            **disease_runtime.status(),
+        }, status_code=503)
+    status = inference_plan.status()
+    return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
+# ✅ Prediction cache hit ratios
+@router.get("/cache/stats")
+def cache_stats():
+    if prediction_cache is None:
+        return {"mode": None, **disease_runtime.status()}
+    return prediction_cache.stats()
+
+# ✅ Batch-size and queue-wait statistics for tuning DISEASE_BATCH_MAX_SIZE / DISEASE_BATCH_MAX_WAIT_MS
+@router.get("/batching/stats")
+def batching_stats():
+    return batcher.stats()
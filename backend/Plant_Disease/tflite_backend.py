@@ -0,0 +1,76 @@
+# Plant_Disease/tflite_backend.py
+import os
+import threading
+
+import numpy as np
+
+
+def _interpreter_class():
+    # The standalone LiteRT / tflite runtimes are much lighter than full TensorFlow; fall back to tf.lite
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+
+
+class TFLiteModel:
+    """
+    A converted .tflite disease model served through multi-threaded interpreters.
+
+    Interpreters are not thread-safe and have fixed tensor shapes, so
+    `compile_fn(batch_size)` builds one interpreter per batch bucket, each
+    guarded by its own lock. Input/output stay float32; int8 models quantize
+    and dequantize inside the graph.
+    """
+
+    def __init__(self, model_path: str, num_threads: int = 1):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"No TFLite model at {model_path}")
+        self.model_path = model_path
+        self.num_threads = max(1, int(num_threads))
+        self._interpreter_class = _interpreter_class()
+        # Fail at load time, not on the first request, if the file is unusable
+        self._new_interpreter(1)
+
+    def _new_interpreter(self, batch_size: int):
+        interpreter = self._interpreter_class(model_path=self.model_path, num_threads=self.num_threads)
+        input_index = interpreter.get_input_details()[0]["index"]
+        input_shape = list(interpreter.get_input_details()[0]["shape"])
+        if input_shape[0] != batch_size:
+            interpreter.resize_tensor_input(input_index, [batch_size] + input_shape[1:])
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def compile_fn(self, batch_size: int):
+        interpreter = self._new_interpreter(batch_size)
+        input_details = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        lock = threading.Lock()
+
+        def call(batch):
+            batch = np.asarray(batch, dtype=np.float32)
+            if input_details["dtype"] != np.float32:
+                # Fully integer model: quantize the input ourselves
+                scale, zero_point = input_details["quantization"]
+                info = np.iinfo(input_details["dtype"])
+                batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(input_details["dtype"])
+            with lock:
+                interpreter.set_tensor(input_details["index"], batch)
+                interpreter.invoke()
+                output = interpreter.get_tensor(output_details["index"]).copy()
+            if output_details["dtype"] != np.float32:
+                scale, zero_point = output_details["quantization"]
+                output = (output.astype(np.float32) - zero_point) * scale
+            return output
+
+        return call
+
+    def predict(self, input_arr):
+        return self.compile_fn(len(input_arr))(input_arr)
@@ -0,0 +1,94 @@
+# Plant_Disease/uploads.py
+import json
+
+from starlette.formparsers import MultiPartParser
+
+
+class UploadTooLarge(Exception):
+    """Raised while reading a request body that goes over its byte cap"""
+
+
+def set_upload_spool_threshold(max_bytes: int):
+    """
+    Uploaded files bigger than `max_bytes` are spooled to a temp file on disk
+    instead of being kept in RAM while the multipart body is parsed.
+    """
+    # Starlette renamed the attribute; support both spellings
+    for attr in ("spool_max_size", "max_file_size"):
+        if hasattr(MultiPartParser, attr):
+            setattr(MultiPartParser, attr, int(max_bytes))
+
+
+def read_bounded(fp, max_bytes: int) -> bytes:
+    """Reads at most `max_bytes` from `fp`, raising UploadTooLarge if there is more"""
+    data = fp.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadTooLarge(f"Image exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+    return data
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that caps request bodies per path while they are read.
+
+    `limits` maps an exact request path to a byte cap. Requests announcing a
+    bigger Content-Length are rejected before any body is read; chunked or
+    lying clients are cut off as soon as the running byte count passes the
+    cap, and whatever error the app produced is replaced with a 413.
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = {path.rstrip("/"): int(cap) for path, cap in limits.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST":
+            return await self.app(scope, receive, send)
+        cap = self.limits.get(scope["path"].rstrip("/"))
+        if cap is None:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > cap:
+                return await self._reject(send, cap)
+
+        state = {"received": 0, "exceeded": False, "started": False}
+
+        async def limited_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > cap:
+                    state["exceeded"] = True
+                    raise UploadTooLarge(f"Request body exceeds {cap} bytes")
+            return message
+
+        async def guarded_send(message):
+            if state["exceeded"]:
+                if message["type"] == "http.response.start" and not state["started"]:
+                    state["started"] = True
+                    await self._reject(send, cap)
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            if not state["started"]:
+                state["started"] = True
+                await self._reject(send, cap)
+
+    @staticmethod
+    async def _reject(send, cap):
+        body = json.dumps({
+            "error": f"Upload too large (limit {cap} bytes)",
+            "status": "error",
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-import joblib
-import pandas as pd
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import JSONResponse, Response
+import calendar
+import json
+import numpy as np
 from pydantic import BaseModel
+from typing import List, Optional
 import os
+from serving.executor import inference_executor, InferenceQueueFull
+from serving.lazy import LazyResource
+from serving.lru import LRUCache
+from serving.compiled_forest import load_model
+from serving.catalog import Catalog, encoder_categories, etag_response
 
 # ✅ Router for Price Prediction
 router = APIRouter(prefix="/price", tags=["Price Prediction"])
@@ -12,16 +19,45 @@ router = APIRouter(prefix="/price", tags=["Price Prediction"])
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "models", "crop_price_model_2.pkl")
 
-# ✅ Load model with fallback
-try:
-    print(f"\n🔄 Loading price prediction model from: {MODEL_PATH}")
-    model = joblib.load(MODEL_PATH)
-    print("\n✅ Price prediction model loaded successfully")
-    model_loaded = True
-except Exception as e:
-    print(f"\n❌ Failed to load price prediction model: {e}")
-    model = None
-    model_loaded = False
+# ✅ Load model with fallback (on first use, or preloaded in the background at startup)
+model = None
+# Identifies the loaded artifact; cached surfaces are keyed on it so a retrained model never serves stale prices
+model_version = None
+# Commodities, states, districts, months the fitted encoder knows (built at load time)
+catalog = None
+# The encoder keeps districts independently of states; when the training export ships a
+# {state: [districts]} map next to the model, surfaces without districts use it
+STATE_DISTRICTS_PATH = os.getenv("PRICE_STATE_DISTRICTS_PATH", os.path.join(BASE_DIR, "models", "state_districts.json"))
+state_districts = {}
+
+def load_state_districts(path: str = STATE_DISTRICTS_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return {state: sorted(districts) for state, districts in json.load(f).items()}
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"⚠️ Could not read {path}: {e}")
+        return {}
+
+def load_price_model():
+    global model, model_version, catalog, state_districts
+    # joblib, pandas and scikit-learn are imported with the model, not with the router
+    import joblib
+    try:
+        print(f"\n🔄 Loading price prediction model from: {MODEL_PATH}")
+        model = load_model(MODEL_PATH, joblib.load)  # compiled forest when USE_COMPILED_FORESTS=1
+        stat = os.stat(MODEL_PATH)
+        model_version = f"{int(stat.st_mtime)}-{stat.st_size}"
+        catalog = build_price_catalog(model)
+        state_districts = load_state_districts()
+        print("\n✅ Price prediction model loaded successfully")
+    except Exception as e:
+        print(f"\n❌ Failed to load price prediction model: {e}")
+        model = None
+    return model
+
+price_model = LazyResource("price_model", load_price_model)
 
 # Input schema for request body
 class CropPriceData(BaseModel):
@@ -41,68 +77,236 @@ def price_prediction_status():
         "status": "active",
         "service": "Crop Price Prediction",
         "version": "1.0.0",
-        "model_loaded": model is not None
+        "model_loaded": model is not None,
+        "model_state": price_model.state,
+        "model_version": model_version
     }
 
+def run_price_prediction(data: CropPriceData) -> float:
+    import pandas as pd
+
+    # Convert input to DataFrame (model expects same features as training)
+    df = pd.DataFrame([data.dict()])
+    return float(model.predict(df)[0])
+
 @router.post("/predict")
-def predict_price(data: CropPriceData):
+async def predict_price(data: CropPriceData):
     """Predict crop price based on input data"""
-    if model is None:
+    if await price_model.aget() is None:
         return {"error": "Price prediction model not loaded"}
     
     try:
-        # Convert input to DataFrame (model expects same features as training)
-        df = pd.DataFrame([data.dict()])
-        
-        # Predict
-        pred = model.predict(df)[0]
+        # Predict on the shared inference executor
+        pred = await inference_executor.run(run_price_prediction, data)
         
         return {
-            "predicted_price": float(pred),
+            "predicted_price": pred,
             "status": "success",
             "input_data": data.dict()
         }
+    except InferenceQueueFull as e:
+        return JSONResponse(content={"error": str(e), "status": "busy"}, status_code=503)
     except Exception as e:
         return {
             "error": f"Prediction failed: {str(e)}",
             "status": "error"
         }
 
-@router.get("/commodities")
-def get_supported_commodities():
-    """Get list of supported commodities"""
-    # Common commodities that the model might support
-    commodities = [
-        "Rice", "Wheat", "Maize", "Sugarcane", "Cotton", "Groundnut",
-        "Soybean", "Turmeric", "Coriander", "Chili", "Onion", "Potato",
-        "Tomato", "Banana", "Mango", "Orange", "Apple", "Grapes",
-        "Tea", "Coffee", "Rubber", "Coconut", "Areca nut", "Cardamom",
-        "Black pepper", "Ginger", "Garlic", "Lemon", "Jowar", "Bajra",
-        "Ragi", "Barley", "Gram", "Tur", "Moong", "Urad", "Linseed",
-        "Castor seed", "Sesamum", "Safflower", "Nigerseed", "Sunflower"
-    ]
-    
+# ✅ Batch and surface forecasts: many rows, one model call
+PRICE_BATCH_MAX_ROWS = int(os.getenv("PRICE_BATCH_MAX_ROWS", 10000))
+surface_cache = LRUCache(maxsize=int(os.getenv("PRICE_SURFACE_CACHE_SIZE", 512)))
+
+class PriceSurfaceRequest(BaseModel):
+    commodity_name: str
+    state_name: str
+    districts: Optional[List[str]] = None  # default: every district the model knows for state_name
+    months: Optional[List[str]] = None  # default: every month the model was trained on
+    avg_min_price: float
+    avg_max_price: float
+    calculationType: str
+    change: float
+
+def run_price_batch(rows: List[CropPriceData]) -> List[float]:
+    import pandas as pd
+
+    df = pd.DataFrame([row.dict() for row in rows])
+    return model.predict(df).tolist()
+
+@router.post("/predict-batch")
+async def predict_price_batch(rows: List[CropPriceData]):
+    """Predict prices for many inputs in one model call; results are in input order"""
+    if len(rows) > PRICE_BATCH_MAX_ROWS:
+        return JSONResponse(
+            content={"error": f"At most {PRICE_BATCH_MAX_ROWS} rows per request", "status": "error"}, status_code=400
+        )
+    if await price_model.aget() is None:
+        return {"error": "Price prediction model not loaded"}
+
+    try:
+        preds = await inference_executor.run(run_price_batch, rows) if rows else []
+        return {"predicted_prices": preds, "count": len(preds), "status": "success"}
+    except InferenceQueueFull as e:
+        return JSONResponse(content={"error": str(e), "status": "busy"}, status_code=503)
+    except Exception as e:
+        return {"error": f"Prediction failed: {str(e)}", "status": "error"}
+
+def model_months() -> List[str]:
+    """Month labels the fitted encoder knows, in calendar order (calendar names if it cannot be read)"""
+    try:
+        preprocessor = model.steps[0][1]
+        for _, encoder, columns in preprocessor.transformers_:
+            if "month" in list(columns):
+                months = [str(m) for m in encoder.categories_[list(columns).index("month")]]
+                order = {name: i for i, name in enumerate(calendar.month_name)}
+                return sorted(months, key=lambda m: order.get(m, len(order)))
+    except (AttributeError, IndexError, TypeError):
+        pass
+    return list(calendar.month_name)[1:]
+
+def state_district_names(state: str) -> List[str]:
+    """
+    Districts to forecast when a surface request names none: the state's entry in the
+    state -> districts map when one was shipped with the model, otherwise every district
+    the fitted encoder knows (it stores them without their state)
+    """
+    if state_districts:
+        return state_districts.get(state, [])
+    return list(catalog.fields.get("district_name", [])) if catalog is not None else []
+
+def run_price_surface(request: PriceSurfaceRequest, districts: List[str], months: List[str]) -> dict:
+    import pandas as pd
+
+    df = pd.DataFrame({
+        "month": np.tile(months, len(districts)),
+        "commodity_name": request.commodity_name,
+        "avg_min_price": request.avg_min_price,
+        "avg_max_price": request.avg_max_price,
+        "state_name": request.state_name,
+        "district_name": np.repeat(districts, len(months)),
+        "calculationType": request.calculationType,
+        "change": request.change,
+    })
+    prices = model.predict(df).reshape(len(districts), len(months))
     return {
-        "commodities": sorted(commodities),
-        "count": len(commodities),
-        "status": "success"
+        "commodity_name": request.commodity_name,
+        "state_name": request.state_name,
+        "months": months,
+        "districts": districts,
+        "predicted_prices": prices.tolist(),  # one row per district, one column per month
+        "model_version": model_version,
+        "status": "success",
     }
 
+@router.post("/surface")
+async def price_surface(request: PriceSurfaceRequest):
+    """Forecast one commodity over every (district, month) pair of a state in one model call"""
+    if request.districts is not None and not request.districts:
+        return JSONResponse(content={"error": "Give at least one district", "status": "error"}, status_code=400)
+    if await price_model.aget() is None:
+        return {"error": "Price prediction model not loaded"}
+
+    districts = request.districts or state_district_names(request.state_name)
+    if not districts:
+        return JSONResponse(
+            content={"error": f"No known districts for {request.state_name}", "status": "error"}, status_code=400
+        )
+    months = request.months or model_months()
+    cells = len(districts) * len(months)
+    if cells > PRICE_BATCH_MAX_ROWS:
+        return JSONResponse(
+            content={"error": f"Surface has {cells} cells; the limit is {PRICE_BATCH_MAX_ROWS}", "status": "error"},
+            status_code=400,
+        )
+
+    key = (model_version, json.dumps(request.dict(), sort_keys=True))
+    body = surface_cache.get(key)
+    if body is None:
+        try:
+            result = await inference_executor.run(run_price_surface, request, districts, months)
+        except InferenceQueueFull as e:
+            return JSONResponse(content={"error": str(e), "status": "busy"}, status_code=503)
+        except Exception as e:
+            return {"error": f"Prediction failed: {str(e)}", "status": "error"}
+        body = JSONResponse(content=result).body
+        surface_cache.put(key, body)
+    return Response(content=body, media_type="application/json")
+
+@router.get("/surface/stats")
+def price_surface_stats():
+    return {"model_version": model_version, **surface_cache.stats()}
+
+# ✅ Catalog: values the model was trained on, served as pre-rendered bytes with ETags
+# (the fallback lists are only used while no model is loaded)
+DEFAULT_COMMODITIES = sorted([
+    "Rice", "Wheat", "Maize", "Sugarcane", "Cotton", "Groundnut",
+    "Soybean", "Turmeric", "Coriander", "Chili", "Onion", "Potato",
+    "Tomato", "Banana", "Mango", "Orange", "Apple", "Grapes",
+    "Tea", "Coffee", "Rubber", "Coconut", "Areca nut", "Cardamom",
+    "Black pepper", "Ginger", "Garlic", "Lemon", "Jowar", "Bajra",
+    "Ragi", "Barley", "Gram", "Tur", "Moong", "Urad", "Linseed",
+    "Castor seed", "Sesamum", "Safflower", "Nigerseed", "Sunflower"
+])
+DEFAULT_STATES = sorted([
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh",
+    "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka",
+    "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya",
+    "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim",
+    "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand",
+    "West Bengal", "Delhi", "Chandigarh", "Dadra and Nagar Haveli",
+    "Daman and Diu", "Lakshadweep", "Puducherry"
+])
+MAX_SUGGESTIONS = 50
+
+def build_price_catalog(price_pipeline):
+    categories = encoder_categories(price_pipeline)
+    if not categories:
+        print("⚠️ Price model has no readable encoder categories; serving the default catalog")
+        return None
+    price_catalog = Catalog(categories)
+    # Render the list endpoints now so requests only compare ETags
+    price_catalog.full()
+    for view, field in (("commodities", "commodity_name"), ("states", "state_name")):
+        values = price_catalog.fields.get(field, [])
+        price_catalog.render(view, {view: values, "count": len(values), "status": "success"})
+    return price_catalog
+
+default_catalog = Catalog({"commodity_name": DEFAULT_COMMODITIES, "state_name": DEFAULT_STATES})
+
+async def current_catalog() -> Catalog:
+    await price_model.aget()
+    return catalog or default_catalog
+
+@router.get("/catalog")
+async def get_catalog(if_none_match: Optional[str] = Header(None)):
+    """Every categorical value the price model knows, per input field"""
+    return etag_response((await current_catalog()).full(), if_none_match)
+
+@router.get("/commodities")
+async def get_supported_commodities(if_none_match: Optional[str] = Header(None)):
+    """Get list of supported commodities"""
+    price_catalog = await current_catalog()
+    commodities = price_catalog.fields.get("commodity_name", [])
+    rendered = price_catalog.render(
+        "commodities", {"commodities": commodities, "count": len(commodities), "status": "success"}
+    )
+    return etag_response(rendered, if_none_match)
+
 @router.get("/states")
-def get_supported_states():
+async def get_supported_states(if_none_match: Optional[str] = Header(None)):
     """Get list of supported Indian states"""
-    states = [
-        "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh",
-        "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka",
-        "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya",
-        "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim",
-        "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand",
-        "West Bengal", "Delhi", "Chandigarh", "Dadra and Nagar Haveli",
-        "Daman and Diu", "Lakshadweep", "Puducherry"
-    ]
-    
-    return {
-        "states": sorted(states),
-        "count": len(states),
-        "status": "success"
-    }
+    price_catalog = await current_catalog()
+    states = price_catalog.fields.get("state_name", [])
+    rendered = price_catalog.render("states", {"states": states, "count": len(states), "status": "success"})
+    return etag_response(rendered, if_none_match)
+
+@router.get("/typeahead")
+async def typeahead(field: str, q: str = "", limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)):
+    """Autocomplete for one input field (e.g. field=district_name&q=luck)"""
+    price_catalog = await current_catalog()
+    suggestions = price_catalog.suggest(field, q, limit)
+    if suggestions is None:
+        return JSONResponse(
+            content={"error": f"Unknown field {field!r}; choose from {', '.join(price_catalog.fields)}", "status": "error"},
+            status_code=400,
+        )
+    return {"field": field, "query": q, "suggestions": suggestions, "status": "success"}
@@ -14,9 +14,11 @@ import uvicorn
 # Add current directory to Python path for imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
+# backend/ holds the shared `serving` package used by the routes
+sys.path.append(os.path.dirname(current_dir))
 
 # Import the price prediction routes
-from routes import router as price_router
+from routes import router as price_router, price_model
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -102,6 +104,9 @@ async def startup_event():
     else:
         print(f"⚠️  Model file not found: {model_path}")
         app.state.model_loaded = False
+
+    # Unpickle the model in the background; the first /predict waits for it if needed
+    price_model.preload()
     
     print("🎯 API Documentation available at: http://localhost:8000/docs")
     print("🌐 Service ready to accept requests")
@@ -0,0 +1,100 @@
+# Yield_Prediction/batch.py
+import json
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+# pandas is imported by the functions that need it, so importing the routers does not pay for it
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def iter_csv_chunks(fp, chunk_rows: int, text_columns):
+    """DataFrames of at most `chunk_rows` rows from a CSV file object; the index is the row number"""
+    import pandas as pd
+
+    return pd.read_csv(fp, chunksize=chunk_rows, dtype={c: str for c in text_columns}, skipinitialspace=True)
+
+
+def iter_frame_chunks(frame: "pd.DataFrame", chunk_rows: int):
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def missing_columns(frame: "pd.DataFrame", numeric_columns, text_columns, defaults=None) -> list:
+    defaults = defaults or {}
+    return [c for c in list(numeric_columns) + list(text_columns) if c not in frame.columns and c not in defaults]
+
+
+def clean_chunk(chunk: "pd.DataFrame", numeric_columns, text_columns, defaults=None, integer_columns=()):
+    """
+    Coerces one raw chunk to model-ready dtypes. Returns (valid rows, error
+    lines); a row with a missing or non-numeric value is reported by its
+    index instead of failing the whole chunk.
+    """
+    import pandas as pd
+
+    frame = chunk.copy()
+    for column, value in (defaults or {}).items():
+        if column not in frame.columns:
+            frame[column] = value
+    for column in numeric_columns:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    bad = frame[list(numeric_columns) + list(text_columns)].isna()
+    bad_rows = bad.any(axis=1).to_numpy()
+
+    errors = [
+        {
+            "index": int(index),
+            "error": f"Missing or non-numeric values in: {', '.join(bad.columns[row_bad])}",
+            "status": "error",
+        }
+        for index, row_bad in zip(frame.index[bad_rows], bad.to_numpy()[bad_rows])
+    ]
+    valid = frame[~bad_rows]
+    if len(valid):
+        valid = valid.astype({c: np.int64 for c in integer_columns})
+    return valid, errors
+
+
+def predict_chunk(chunks, predict_fn, clean_fn) -> list:
+    """
+    Pulls the next chunk from `chunks` and scores it with one `predict_fn`
+    call. Returns the chunk's NDJSON lines in row order, or None once the
+    iterator is exhausted. Runs on the inference executor (reading the next
+    CSV chunk blocks too).
+    """
+    chunk = next(chunks, None)
+    if chunk is None:
+        return None
+    valid, errors = clean_fn(chunk)
+    lines = [dict(line) for line in errors]
+    if len(valid):
+        results = predict_fn(valid)
+        lines.extend({"index": int(index), **result} for index, result in zip(valid.index, results))
+    lines.sort(key=lambda line: line["index"])
+    return [json.dumps(line) + "\n" for line in lines]
+
+
+async def stream_yield_predictions(chunks, predict_fn, clean_fn, executor, busy_error):
+    """
+    Async generator of NDJSON lines, one per input row, in input order.
+
+    Each chunk is read, cleaned and scored in a single executor job, so the
+    models run once per chunk rather than once per row. If the executor is
+    saturated or the input turns out to be malformed mid-stream, a final
+    error line is emitted and the stream ends.
+    """
+    while True:
+        try:
+            lines = await executor.run(predict_chunk, chunks, predict_fn, clean_fn)
+        except busy_error as e:
+            yield json.dumps({"error": str(e), "status": "busy"}) + "\n"
+            return
+        except Exception as e:
+            yield json.dumps({"error": f"Batch prediction failed: {e}", "status": "error"}) + "\n"
+            return
+        if lines is None:
+            return
+        for line in lines:
+            yield line
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pipeline.predict(DataFrame) vs. the compiled feature encoder for single-row yield inference.
+
+Usage (from backend/):
+    python -m Yield_Prediction.benchmark_encoder --rows 500
+
+Draws random rows from the categories the pipeline was fitted on, checks
+that both paths return bit-identical predictions, and reports per-call
+latency of the encoding step alone and of encode + predict.
+"""
+
+import argparse
+import os
+import pickle
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Yield_Prediction.fast_encoder import CompiledYieldEncoder  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+YIELD_MODEL_PATH = os.path.join(BASE_DIR, "saved_models", "crop_yield_model.pkl")
+YIELD_FEATURES = ['State_Name', 'District_Name', 'Crop_Year', 'Season', 'Crop']
+
+
+def random_rows(encoder, n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {column: list(lookup)[rng.integers(len(lookup))] for column, lookup, _ in encoder.onehot}
+        row.update({column: int(rng.integers(1997, 2025)) for column, _ in encoder.passthrough})
+        rows.append(row)
+    return rows
+
+
+def _time_ms(fn, rows):
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        fn(row)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    timings.sort()
+    return {
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": statistics.median(timings),
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=YIELD_MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=300, help="Random single-row calls per path")
+    args = parser.parse_args()
+
+    with open(args.model, "rb") as f:
+        pipeline = pickle.load(f)
+    encoder = CompiledYieldEncoder.from_pipeline(pipeline)
+    if encoder is None:
+        sys.exit("❌ This pipeline's structure is not supported by the compiled encoder")
+    preprocessor = pipeline.steps[0][1]
+    rows = random_rows(encoder, args.rows)
+
+    print("🌾 Yield single-row inference benchmark")
+    print(f"📊 {args.rows} rows, {encoder.n_features} encoded features")
+
+    # Parity first: every row must match the pipeline bit for bit
+    expected = np.array([pipeline.predict(pd.DataFrame([row], columns=YIELD_FEATURES))[0] for row in rows])
+    compiled = np.array([encoder.predict([row])[0] for row in rows])
+    mismatches = int(np.sum(expected != compiled))
+    print(f"{'✅' if mismatches == 0 else '❌'} Bit-identical predictions: {args.rows - mismatches}/{args.rows}")
+
+    results = {
+        "encode: pandas + ColumnTransformer": _time_ms(
+            lambda row: preprocessor.transform(pd.DataFrame([row], columns=YIELD_FEATURES)), rows),
+        "encode: compiled": _time_ms(lambda row: encoder.encode([row]), rows),
+        "predict: pipeline": _time_ms(
+            lambda row: pipeline.predict(pd.DataFrame([row], columns=YIELD_FEATURES)), rows),
+        "predict: compiled": _time_ms(lambda row: encoder.predict([row]), rows),
+    }
+
+    print(f"\n{'path':<36} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        print(f"{name:<36} {r['mean_ms']:>9.3f} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f}")
+
+    encode_speedup = results["encode: pandas + ColumnTransformer"]["p50_ms"] / results["encode: compiled"]["p50_ms"]
+    predict_saved = results["predict: pipeline"]["p50_ms"] - results["predict: compiled"]["p50_ms"]
+    print(f"\n⚡ Encoding {encode_speedup:.0f}x faster; {predict_saved:.2f} ms saved per single-row prediction (p50)")
+
+
+if __name__ == "__main__":
+    main()
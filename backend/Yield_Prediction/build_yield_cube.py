@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Precompute the yield model over every (state, district, season, crop, year) it can be asked about.
+
+Usage (from backend/):
+    python -m Yield_Prediction.build_yield_cube --data Yield_Prediction/crop_production.csv --years 2000-2030
+
+Locations are the (State_Name, District_Name) pairs present in the
+production data, seasons come from the same file, and crops are the classes
+the recommendation model can return (--all-crops adds every crop in the
+data). The result is written to saved_models/yield_cube/ (cube.npy +
+index.json) and picked up by /yield/predict-yield on its next load; rebuild
+it whenever crop_yield_model.pkl is retrained.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Yield_Prediction.engines import yield_model_path  # noqa: E402
+from Yield_Prediction.yield_cube import CUBE_FILE, INDEX_FILE, YieldCube  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVED_MODELS = os.path.join(BASE_DIR, "saved_models")
+YIELD_FEATURES = ['State_Name', 'District_Name', 'Crop_Year', 'Season', 'Crop']
+
+
+def _unpickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def read_axes(data_path, crops, all_crops=False):
+    columns = ['State_Name', 'District_Name', 'Season'] + (['Crop'] if all_crops else [])
+    frame = pd.read_csv(data_path, usecols=columns, dtype=str).dropna()
+    for column in columns:
+        frame[column] = frame[column].str.strip()  # as in yield-final.py
+    locations = sorted(set(zip(frame['State_Name'], frame['District_Name'])))
+    seasons = sorted(frame['Season'].unique())
+    if all_crops:
+        crops = list(crops) + sorted(set(frame['Crop'].unique()) - set(crops))
+    return locations, seasons, list(crops)
+
+
+def build(args):
+    start_year, end_year = (int(y) for y in args.years.split("-"))
+    years = np.arange(start_year, end_year + 1)
+    pipeline = _unpickle(args.model)
+    crops = [str(c) for c in _unpickle(args.recommend_model).classes_]
+    locations, seasons, crops = read_axes(args.data, crops, args.all_crops)
+
+    shape = (len(locations), len(seasons), len(crops), len(years))
+    print("🌾 Building yield cube")
+    print(f"📊 {len(locations)} locations x {len(seasons)} seasons x {len(crops)} crops x {len(years)} years "
+          f"= {int(np.prod(shape)):,} cells ({np.prod(shape) * 8 / 1e6:.1f} MB)")
+
+    os.makedirs(args.out, exist_ok=True)
+    tmp_path = os.path.join(args.out, CUBE_FILE + ".tmp")
+    cube = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=shape)
+
+    # Every (season, crop, year) combination for one location, in cube order
+    s_idx, c_idx, y_idx = (a.ravel() for a in np.indices(shape[1:]))
+    block_seasons = np.array(seasons, dtype=object)[s_idx]
+    block_crops = np.array(crops, dtype=object)[c_idx]
+    block_years = years[y_idx]
+
+    started = time.perf_counter()
+    for first in range(0, len(locations), args.locations_per_batch):
+        batch = locations[first:first + args.locations_per_batch]
+        frame = pd.DataFrame({
+            'State_Name': np.repeat([s for s, _ in batch], len(s_idx)),
+            'District_Name': np.repeat([d for _, d in batch], len(s_idx)),
+            'Crop_Year': np.tile(block_years, len(batch)),
+            'Season': np.tile(block_seasons, len(batch)),
+            'Crop': np.tile(block_crops, len(batch)),
+        }, columns=YIELD_FEATURES)
+        cube[first:first + len(batch)] = pipeline.predict(frame).reshape((len(batch),) + shape[1:])
+        done = first + len(batch)
+        elapsed = time.perf_counter() - started
+        print(f"\r🔄 {done}/{len(locations)} locations ({elapsed:.0f}s, ~{elapsed / done * (len(locations) - done):.0f}s left)",
+              end="", flush=True)
+    cube.flush()
+    del cube
+    print()
+
+    os.replace(tmp_path, os.path.join(args.out, CUBE_FILE))
+    with open(os.path.join(args.out, INDEX_FILE), "w") as f:
+        json.dump({
+            "locations": [list(location) for location in locations],
+            "seasons": seasons,
+            "crops": crops,
+            "years": [int(years[0]), int(years[-1])],
+            "model_path": os.path.abspath(args.model),
+            "model_mtime": os.path.getmtime(args.model),
+        }, f)
+    print(f"✅ Wrote {args.out} in {time.perf_counter() - started:.1f}s")
+
+    # Spot-check random cells against single-row predictions
+    yield_cube = YieldCube(args.out)
+    rng = np.random.default_rng(0)
+    rows = []
+    for _ in range(args.check):
+        state, district = locations[rng.integers(len(locations))]
+        rows.append({
+            'State_Name': state, 'District_Name': district, 'Season': seasons[rng.integers(len(seasons))],
+            'Crop': crops[rng.integers(len(crops))], 'Crop_Year': int(years[rng.integers(len(years))]),
+        })
+    expected = np.array([pipeline.predict(pd.DataFrame([row], columns=YIELD_FEATURES))[0] for row in rows])
+    matches = int(np.sum(yield_cube.lookup(rows) == expected))
+    print(f"{'✅' if matches == len(rows) else '❌'} Spot check: {matches}/{len(rows)} cells identical to live predictions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "crop_production.csv"),
+                        help="Production CSV the yield model was trained on")
+    parser.add_argument("--model", default=yield_model_path(SAVED_MODELS),
+                        help="Yield model to precompute (default: the YIELD_ENGINE model the API serves)")
+    parser.add_argument("--recommend-model", default=os.path.join(SAVED_MODELS, "crop_recommend_model.pkl"))
+    parser.add_argument("--out", default=os.path.join(SAVED_MODELS, "yield_cube"))
+    parser.add_argument("--years", default="2000-2030", help="Inclusive range of Crop_Year values to precompute")
+    parser.add_argument("--all-crops", action="store_true", help="Also cover crops the recommender never returns")
+    parser.add_argument("--locations-per-batch", type=int, default=4)
+    parser.add_argument("--check", type=int, default=200, help="Random cells to verify against the model")
+    build(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Build the historical-yield store behind /yield/history.
+
+Usage (from backend/):
+    python -m Yield_Prediction.build_yield_history --data Yield_Prediction/crop_production.csv
+
+Cleans the production data exactly like yield-final.py (via
+train_yield.load_production_data, sharing its cache), groups it by
+(state, district, crop, season) and writes saved_models/yield_history/:
+per-group year/yield arrays sorted by year, group offsets, all-years
+summary statistics and a JSON index of group keys.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Yield_Prediction.train_yield import load_production_data  # noqa: E402
+from Yield_Prediction.yield_history import INDEX_FILE, STAT_NAMES, YieldHistory, summarize  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVED_MODELS = os.path.join(BASE_DIR, "saved_models")
+KEY_COLUMNS = ['State_Name', 'District_Name', 'Crop', 'Season']
+
+
+def build(args):
+    started = time.perf_counter()
+    frame = load_production_data(args.data, None if args.no_cache else args.cache_dir)
+    for column in KEY_COLUMNS:
+        frame[column] = frame[column].astype(str).str.strip().str.lower()
+    frame = frame.sort_values(KEY_COLUMNS + ['Crop_Year'], kind="stable", ignore_index=True)
+
+    group_ids = frame.groupby(KEY_COLUMNS, sort=False).ngroup().to_numpy()
+    starts = np.flatnonzero(np.r_[True, group_ids[1:] != group_ids[:-1]])
+    offsets = np.r_[starts, len(frame)].astype(np.int64)
+    years = frame['Crop_Year'].to_numpy(dtype=np.int16)
+    yields = frame['Yield'].to_numpy(dtype=np.float64)
+    keys = frame.loc[starts, KEY_COLUMNS].values.tolist()
+    stats = np.array([summarize(yields[offsets[i]:offsets[i + 1]]) for i in range(len(starts))])
+
+    os.makedirs(args.out, exist_ok=True)
+    for name, array in (("offsets", offsets), ("years", years), ("yields", yields), ("stats", stats)):
+        np.save(os.path.join(args.out, f"{name}.npy"), array)
+    with open(os.path.join(args.out, INDEX_FILE), "w") as f:
+        json.dump({"groups": keys, "stats": list(STAT_NAMES), "source": os.path.abspath(args.data)}, f)
+    print(f"✅ {len(keys):,} groups / {len(frame):,} rows written to {args.out} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    # Timing and a cross-check against a full boolean-mask scan (what yield-final.py's Cell 8 does)
+    history = YieldHistory(args.out)
+    rng = np.random.default_rng(0)
+    picks = [keys[i] for i in rng.integers(len(keys), size=min(args.check, len(keys)))]
+    start = time.perf_counter()
+    for key in picks:
+        history.lookup(*key)
+    lookup_us = (time.perf_counter() - start) / len(picks) * 1e6
+    state, district, crop, season = picks[0]
+    mask = ((frame['State_Name'] == state) & (frame['District_Name'] == district)
+            & (frame['Crop'] == crop) & (frame['Season'] == season))
+    assert np.isclose(history.lookup(*picks[0])["mean"], round(frame.loc[mask, 'Yield'].mean(), 4))
+    print(f"⚡ {lookup_us:.1f} us per lookup ({len(picks)} random groups)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "crop_production.csv"))
+    parser.add_argument("--out", default=os.path.join(SAVED_MODELS, "yield_history"))
+    parser.add_argument("--cache-dir", default=SAVED_MODELS, help="Cleaned-dataset cache shared with train_yield")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--check", type=int, default=1000, help="Random lookups to time")
+    build(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
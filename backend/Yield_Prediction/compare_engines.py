@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Compare the trained yield engines (rf vs. hgb) on the numbers that decide which one to serve.
+
+Usage (from backend/):
+    python -m Yield_Prediction.train_yield --engine hgb --skip-recommend   # if crop_yield_model_hgb.pkl is missing
+    python -m Yield_Prediction.compare_engines --data Yield_Prediction/crop_production.csv
+
+Every engine whose artifact is in saved_models/ is measured on the same
+held-out split train_yield.py / yield-final.py use (test_size=0.2,
+random_state=42): MAE on log yield, artifact size, unpickle time, and
+predict latency for single rows and for batches. Switch the API with
+YIELD_ENGINE=<engine>.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Yield_Prediction.engines import YIELD_ENGINES, yield_model_path  # noqa: E402
+from Yield_Prediction.train_yield import YIELD_FEATURES, load_production_data  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVED_MODELS = os.path.join(BASE_DIR, "saved_models")
+
+
+def _timings_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return sorted(timings)
+
+
+def measure(path, X_test, y_test, args):
+    from sklearn.metrics import mean_absolute_error
+
+    def load():
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    load_ms = _timings_ms(load, args.load_repeats)
+    pipeline = load()
+    result = {
+        "artifact_mb": os.path.getsize(path) / 1e6,
+        "load_ms": statistics.median(load_ms),
+        "mae_log": float(mean_absolute_error(y_test, pipeline.predict(X_test))),
+    }
+
+    # Single rows, one DataFrame each: what /predict-yield does without the cube
+    rows = [X_test.iloc[[i]] for i in range(min(args.single, len(X_test)))]
+    single = []
+    for row in rows:
+        start = time.perf_counter()
+        pipeline.predict(row)
+        single.append((time.perf_counter() - start) * 1000.0)
+    single.sort()
+    result["single_p50_ms"] = statistics.median(single)
+    result["single_p99_ms"] = single[min(len(single) - 1, int(len(single) * 0.99))]
+
+    for batch in args.batch:
+        frame = X_test.iloc[:batch]
+        result[f"batch_{len(frame)}_ms"] = statistics.median(_timings_ms(lambda: pipeline.predict(frame), 3))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "crop_production.csv"))
+    parser.add_argument("--model-dir", default=SAVED_MODELS)
+    parser.add_argument("--cache-dir", default=SAVED_MODELS, help="Cleaned-dataset cache shared with train_yield")
+    parser.add_argument("--engines", nargs="+", choices=YIELD_ENGINES, default=list(YIELD_ENGINES))
+    parser.add_argument("--single", type=int, default=300, help="Single-row predictions to time")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1000, 10000], help="Batch sizes to time")
+    parser.add_argument("--load-repeats", type=int, default=3)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    from sklearn.model_selection import train_test_split
+
+    yield_df = load_production_data(args.data, args.cache_dir)
+    _, X_test, _, y_test = train_test_split(
+        yield_df[YIELD_FEATURES], yield_df['Yield_log'], test_size=0.2, random_state=42)
+    del yield_df
+
+    print("🌾 Yield engine comparison")
+    print(f"📊 {len(X_test):,} held-out rows")
+    report = {}
+    for engine in args.engines:
+        path = yield_model_path(args.model_dir, engine)
+        if not os.path.exists(path):
+            print(f"⚠️ {engine}: no artifact at {path}; train it with train_yield.py --engine {engine}")
+            continue
+        print(f"🔄 {engine}: {os.path.basename(path)}")
+        report[engine] = measure(path, X_test, y_test, args)
+
+    if not report:
+        sys.exit("❌ No trained yield engines found")
+    metrics = list(next(iter(report.values())))
+    print(f"\n{'metric':<18}" + "".join(f" {engine:>12}" for engine in report))
+    for metric in metrics:
+        print(f"{metric:<18}" + "".join(f" {report[engine][metric]:>12.3f}" for engine in report))
+
+    if len(report) == len(YIELD_ENGINES):
+        rf, hgb = report["rf"], report["hgb"]
+        print(f"\n⚡ hgb vs rf: {rf['artifact_mb'] / hgb['artifact_mb']:.0f}x smaller, "
+              f"{rf['single_p50_ms'] / hgb['single_p50_ms']:.1f}x faster per row, "
+              f"MAE {hgb['mae_log'] - rf['mae_log']:+.3f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Yield_Prediction/engines.py
+"""
+The estimators the yield model can be trained with (YIELD_ENGINE=rf|hgb).
+
+rf   RandomForestRegressor on one-hot encoded categoricals (the original model)
+hgb  HistGradientBoostingRegressor with native categorical splits
+
+Both are plain sklearn Pipelines over the same five YIELD_FEATURES, so the
+API loads and predicts with either one the same way; each engine is saved
+under its own file name so both can sit in saved_models/ side by side.
+"""
+import os
+
+import numpy as np
+
+YIELD_ENGINES = ("rf", "hgb")
+YIELD_MODEL_FILES = {"rf": "crop_yield_model.pkl", "hgb": "crop_yield_model_hgb.pkl"}
+CATEGORICAL_FEATURES = ['State_Name', 'District_Name', 'Season', 'Crop']
+# HistGradientBoosting bins a native categorical into at most 255 levels; the
+# production data has ~650 districts, so District_Name is target encoded instead
+TARGET_ENCODED_FEATURES = ['District_Name']
+
+
+def yield_model_path(model_dir: str, engine: str = None) -> str:
+    engine = engine or os.getenv("YIELD_ENGINE", "rf")
+    if engine not in YIELD_MODEL_FILES:
+        raise ValueError(f"Unknown yield engine {engine!r}; choose from {', '.join(YIELD_ENGINES)}")
+    return os.path.join(model_dir, YIELD_MODEL_FILES[engine])
+
+
+def build_rf_pipeline(encoding: str = "sparse", n_estimators: int = 100, n_jobs: int = -1):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    sparse = encoding == "sparse"
+    preprocessor = ColumnTransformer(
+        transformers=[('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=sparse), CATEGORICAL_FEATURES)],
+        remainder='passthrough',
+        sparse_threshold=1.0 if sparse else 0.0,
+    )
+    return Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('regressor', RandomForestRegressor(n_estimators=n_estimators, random_state=42, n_jobs=n_jobs)),
+    ])
+
+
+def build_hgb_pipeline(max_iter: int = 300, learning_rate: float = 0.1, max_leaf_nodes: int = 63):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OrdinalEncoder, TargetEncoder
+
+    native = [c for c in CATEGORICAL_FEATURES if c not in TARGET_ENCODED_FEATURES]
+    # Unseen categories become NaN, which the booster routes like a missing value
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('cat', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan,
+                                   encoded_missing_value=np.nan), native),
+            ('target', TargetEncoder(target_type='continuous', random_state=42), TARGET_ENCODED_FEATURES),
+        ],
+        remainder='passthrough',
+    )
+    regressor = HistGradientBoostingRegressor(
+        max_iter=max_iter,
+        learning_rate=learning_rate,
+        max_leaf_nodes=max_leaf_nodes,
+        categorical_features=list(range(len(native))),  # the ordinal block comes first
+        random_state=42,
+    )
+    return Pipeline(steps=[('preprocessor', preprocessor), ('regressor', regressor)])
+
+
+def build_yield_pipeline(engine: str = "rf", **options):
+    """Untrained yield Pipeline for `engine`; options go to build_rf_pipeline / build_hgb_pipeline"""
+    if engine == "rf":
+        return build_rf_pipeline(**options)
+    if engine == "hgb":
+        return build_hgb_pipeline(**options)
+    raise ValueError(f"Unknown yield engine {engine!r}; choose from {', '.join(YIELD_ENGINES)}")
@@ -0,0 +1,136 @@
+# Yield_Prediction/fast_encoder.py
+import threading
+
+import numpy as np
+
+
+def _is_passthrough(transformer) -> bool:
+    # Newer scikit-learn stores a passthrough remainder as an identity FunctionTransformer
+    from sklearn.preprocessing import FunctionTransformer
+
+    if isinstance(transformer, str):
+        return transformer == "passthrough"
+    return (
+        isinstance(transformer, FunctionTransformer)
+        and transformer.func is None
+        and transformer.inverse_func is None
+    )
+
+
+class CompiledYieldEncoder:
+    """
+    The fitted ColumnTransformer of the yield pipeline, flattened into lookup tables.
+
+    Each one-hot column becomes a dict from category string to its output
+    column, and each passthrough column a fixed output position, so encoding
+    one row is a handful of dict lookups into a reusable (1, n_features)
+    float64 buffer instead of a DataFrame plus ColumnTransformer dispatch.
+    The buffer holds exactly what `preprocessor.transform` would produce, so
+    the regressor's predictions are bit-identical to `pipeline.predict`.
+
+    `from_pipeline` returns None for anything it does not know how to
+    compile exactly (other transformers, dropped or infrequent categories);
+    callers then keep using the pipeline.
+    """
+
+    def __init__(self, n_features, onehot, passthrough, estimator):
+        self.n_features = n_features
+        self.onehot = onehot            # [(column, {category: output index}, handle_unknown)]
+        self.passthrough = passthrough  # [(column, output index)]
+        self.estimator = estimator
+        self.columns = [c for c, _, _ in onehot] + [c for c, _ in passthrough]
+        self._local = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        # scikit-learn is imported here (once the model is loaded) so importing the router stays cheap
+        from sklearn.compose import ColumnTransformer
+        from sklearn.preprocessing import OneHotEncoder
+
+        # Any object with sklearn-style steps (Pipeline, or a CompiledPipeline from serving.compiled_forest)
+        steps = getattr(pipeline, "steps", None)
+        if not steps or len(steps) != 2:
+            return None
+        preprocessor, estimator = pipeline.steps[0][1], pipeline.steps[1][1]
+        if not isinstance(preprocessor, ColumnTransformer) or not hasattr(preprocessor, "output_indices_"):
+            return None
+        if hasattr(estimator, "feature_names_in_"):  # fitted on a DataFrame (set_output="pandas")
+            return None
+        names_in = list(getattr(preprocessor, "feature_names_in_", []))
+
+        onehot, passthrough = [], []
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop" or len(columns) == 0:
+                continue
+            columns = [names_in[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+            start = preprocessor.output_indices_[name].start
+            if _is_passthrough(transformer):
+                passthrough.extend((column, start + i) for i, column in enumerate(columns))
+            elif isinstance(transformer, OneHotEncoder):
+                if (
+                    transformer.drop_idx_ is not None
+                    or getattr(transformer, "_infrequent_enabled", False)
+                    or transformer.handle_unknown not in ("ignore", "error")
+                ):
+                    return None
+                offset = start
+                for column, categories in zip(columns, transformer.categories_):
+                    lookup = {category: offset + i for i, category in enumerate(categories.tolist())}
+                    onehot.append((column, lookup, transformer.handle_unknown))
+                    offset += len(categories)
+            else:
+                return None
+        n_features = max(indices.stop for indices in preprocessor.output_indices_.values())
+        return cls(n_features, onehot, passthrough, estimator)
+
+    def _buffer(self, n: int) -> np.ndarray:
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or buffer.shape[0] < n:
+            buffer = self._local.buffer = np.zeros((n, self.n_features), dtype=np.float64)
+        else:
+            buffer = buffer[:n]
+            buffer.fill(0.0)
+        return buffer
+
+    def encode(self, rows) -> np.ndarray:
+        """rows: list of dicts keyed by column name. The returned array is reused by the next call on this thread."""
+        X = self._buffer(len(rows))
+        for r, row in enumerate(rows):
+            for column, lookup, handle_unknown in self.onehot:
+                index = lookup.get(row[column])
+                if index is not None:
+                    X[r, index] = 1.0
+                elif handle_unknown == "error":
+                    raise ValueError(f"Found unknown category {row[column]!r} in column {column}")
+            for column, index in self.passthrough:
+                X[r, index] = row[column]
+        return X
+
+    def predict(self, rows) -> np.ndarray:
+        return self.estimator.predict(self.encode(rows))
+
+    def sample_rows(self, n: int = 8):
+        """Rows cycling through every known category (plus one unseen value) for parity checks"""
+        rows = []
+        for i in range(n):
+            row = {column: list(lookup)[i % len(lookup)] for column, lookup, _ in self.onehot}
+            row.update({column: 2000 + i for column, _ in self.passthrough})
+            rows.append(row)
+        if any(handle_unknown == "ignore" for _, _, handle_unknown in self.onehot):
+            rows.append({**rows[0], **{c: "__unseen__" for c, _, h in self.onehot if h == "ignore"}})
+        return rows
+
+
+def compile_pipeline(pipeline, sample_rows=None):
+    """CompiledYieldEncoder for `pipeline`, or None if it cannot reproduce `pipeline.predict` exactly on `sample_rows`"""
+    import pandas as pd
+
+    encoder = CompiledYieldEncoder.from_pipeline(pipeline)
+    if encoder is None:
+        return None
+    sample_rows = sample_rows or encoder.sample_rows()
+    frame = pd.DataFrame(sample_rows)
+    expected = pipeline.predict(frame)
+    if not np.array_equal(encoder.predict(sample_rows), expected):
+        return None
+    return encoder
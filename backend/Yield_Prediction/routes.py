@@ -1,12 +1,32 @@
 # api.py
 
+import itertools
+import json
+import math
 import os
 import pickle
 import numpy as np
-import pandas as pd
-from fastapi import APIRouter
-from pydantic import BaseModel
+from typing import TYPE_CHECKING, List, Optional
+from fastapi import APIRouter, UploadFile, File, Query, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
+from serving.executor import inference_executor, InferenceQueueFull
+from serving.lazy import LazyResource
+from serving.lru import LRUCache
+from serving.catalog import Catalog, encoder_categories, etag_response
+from serving.compiled_forest import load_model
+from Yield_Prediction import engines
+from Yield_Prediction.fast_encoder import compile_pipeline
+from Yield_Prediction.yield_cube import load_yield_cube
+from Yield_Prediction.yield_history import load_yield_history
+from Yield_Prediction.batch import (
+    iter_csv_chunks, iter_frame_chunks, missing_columns, clean_chunk, stream_yield_predictions
+)
+
+# pandas (and scikit-learn, through the pickled pipelines) is imported on first use, not with the router
+if TYPE_CHECKING:
+    import pandas as pd
 
 # --- 1. Initialize FastAPI app ---
 router = APIRouter()
@@ -16,23 +36,77 @@ router = APIRouter()
 # Get the absolute path of the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
 recommend_model_path = os.path.join(script_dir, 'saved_models', 'crop_recommend_model.pkl')
-yield_model_path = os.path.join(script_dir, 'saved_models', 'crop_yield_model.pkl')
-
-try:
-    with open(recommend_model_path, 'rb') as file:
-        recommend_model = pickle.load(file)
-    print("✅ Crop recommendation model loaded successfully.")
-except FileNotFoundError:
-    print(f"❌ Error: Recommendation model not found at {recommend_model_path}")
-    recommend_model = None
-
-try:
-    with open(yield_model_path, 'rb') as file:
-        yield_model_pipeline = pickle.load(file)
-    print("✅ Crop yield prediction model loaded successfully.")
-except FileNotFoundError:
-    print(f"❌ Error: Yield model not found at {yield_model_path}")
-    yield_model_pipeline = None
+# YIELD_ENGINE=hgb serves the HistGradientBoosting model (train it with train_yield.py --engine hgb)
+YIELD_ENGINE = os.getenv("YIELD_ENGINE", "rf")
+yield_model_path = engines.yield_model_path(os.path.join(script_dir, 'saved_models'), YIELD_ENGINE)
+
+# Both forests are unpickled on first use (or preloaded in the background at startup)
+recommend_model = None
+yield_model_pipeline = None
+# Single-row encoding without DataFrame/ColumnTransformer overhead (YIELD_FAST_ENCODER=0 disables)
+USE_FAST_ENCODER = os.getenv("YIELD_FAST_ENCODER", "1") != "0"
+yield_encoder = None
+# Precomputed answers for every known (state, district, season, crop, year); build with build_yield_cube.py
+YIELD_CUBE_PATH = os.getenv("YIELD_CUBE_PATH", os.path.join(script_dir, 'saved_models', 'yield_cube'))
+USE_YIELD_CUBE = os.getenv("USE_YIELD_CUBE", "1") != "0"
+yield_cube = None
+# Historical yield statistics per (state, district, crop, season); build with build_yield_history.py
+YIELD_HISTORY_PATH = os.getenv("YIELD_HISTORY_PATH", os.path.join(script_dir, 'saved_models', 'yield_history'))
+yield_history = None
+# States, districts, seasons and crops the yield encoder was fitted on (+ crops the recommender returns)
+yield_catalog = None
+
+def unpickle(path):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+# With USE_COMPILED_FORESTS=1, forests exported by serving/compiled_forest.py are memory-mapped instead
+def load_yield_models():
+    global recommend_model, yield_model_pipeline
+    try:
+        recommend_model = load_model(recommend_model_path, unpickle)
+        print("✅ Crop recommendation model loaded successfully.")
+    except FileNotFoundError:
+        print(f"❌ Error: Recommendation model not found at {recommend_model_path}")
+        recommend_model = None
+
+    try:
+        yield_model_pipeline = load_model(yield_model_path, unpickle)
+        print(f"✅ Crop yield prediction model ({YIELD_ENGINE}) loaded successfully.")
+    except FileNotFoundError:
+        print(f"❌ Error: Yield model not found at {yield_model_path}")
+        yield_model_pipeline = None
+
+    global yield_history
+    yield_history = load_yield_history(YIELD_HISTORY_PATH)
+    if yield_history is not None:
+        print(f"✅ Yield history loaded ({len(yield_history)} state/district/crop/season groups)")
+
+    if recommend_model is None or yield_model_pipeline is None:
+        return None
+
+    global yield_catalog
+    fields = encoder_categories(yield_model_pipeline)
+    fields["recommended_crops"] = [str(crop) for crop in getattr(recommend_model, "classes_", [])]
+    yield_catalog = Catalog(fields)
+    yield_catalog.full()  # rendered once, served as bytes
+
+    global yield_encoder
+    if USE_FAST_ENCODER:
+        yield_encoder = compile_pipeline(yield_model_pipeline)
+        if yield_encoder is not None:
+            print(f"✅ Compiled yield feature encoder ({yield_encoder.n_features} features)")
+        else:
+            print("⚠️ Yield pipeline could not be compiled exactly; single-row requests use the pipeline")
+
+    global yield_cube
+    if USE_YIELD_CUBE:
+        yield_cube = load_yield_cube(YIELD_CUBE_PATH, yield_model_path)
+        if yield_cube is not None:
+            print(f"✅ Yield cube loaded ({'x'.join(str(n) for n in yield_cube.values.shape)} predictions)")
+    return recommend_model, yield_model_pipeline
+
+yield_models = LazyResource("yield_models", load_yield_models)
 
 # --- 3. Define the Input Data Model using Pydantic ---
 # This ensures that the data sent from the frontend matches what the model expects.
@@ -50,41 +124,309 @@ class CropInput(BaseModel):
     Crop_Year: int = 2024 # Default to current year or make it an input
 
 # --- 4. Create the Prediction Endpoint ---
-@router.post("/predict-yield")
-async def predict_yield(data: CropInput):
-    if not recommend_model or not yield_model_pipeline:
-        return {"error": "Models are not loaded. Please check server logs."}
+RECOMMEND_FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+YIELD_FEATURES = ['State_Name', 'District_Name', 'Crop_Year', 'Season', 'Crop']
+MAX_TOP_K = 10
+INPUT_COLUMNS = RECOMMEND_FEATURES + ['State_Name', 'District_Name', 'Season', 'Crop_Year']
 
-    try:
-        # Part A: Predict Crop Recommendation
-        recommend_features_df = pd.DataFrame(
-            [[data.N, data.P, data.K, data.temperature, data.humidity, data.ph, data.rainfall]],
-            columns=['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
-        )
-        recommended_crop = recommend_model.predict(recommend_features_df)[0]
+def inputs_to_frame(rows: List[CropInput]) -> "pd.DataFrame":
+    import pandas as pd
+
+    return pd.DataFrame([row.dict() for row in rows], columns=INPUT_COLUMNS)
+
+def run_yield_batch(frame: "pd.DataFrame") -> List[dict]:
+    """Runs each model once over a whole frame of CropInput rows; results come back in row order."""
+    # Part A: Predict Crop Recommendation for every row
+    recommended_crops = recommend_model.predict(frame[RECOMMEND_FEATURES])
+
+    # Part B: Predict Yield for each row's recommended crop
+    yield_features_df = frame[['State_Name', 'District_Name', 'Crop_Year', 'Season']].assign(Crop=recommended_crops)
+    predicted_log_yield = predict_log_yields_frame(yield_features_df[YIELD_FEATURES])
+    predicted_yield = np.expm1(predicted_log_yield)
+
+    return [
+        {"recommended_crop": crop.upper(), "predicted_yield": f"{value:.2f}"}
+        for crop, value in zip(recommended_crops, predicted_yield)
+    ]
+
+def predict_log_yields_frame(frame: "pd.DataFrame") -> np.ndarray:
+    """Log yields for a frame of YIELD_FEATURES: cube lookups first, the pipeline only for misses"""
+    if yield_cube is None:
+        return yield_model_pipeline.predict(frame)
+    values = yield_cube.lookup_frame(frame)
+    missing = np.isnan(values)
+    if missing.any():
+        values[missing] = yield_model_pipeline.predict(frame[missing])
+    return values
+
+def predict_log_yields(rows: List[dict]) -> np.ndarray:
+    """Log yields for a few rows (dicts keyed by YIELD_FEATURES): cube, then the compiled encoder, then pandas"""
+    values = yield_cube.lookup(rows) if yield_cube is not None else np.full(len(rows), np.nan)
+    missing = np.flatnonzero(np.isnan(values))
+    if missing.size:
+        live_rows = [rows[i] for i in missing]
+        if yield_encoder is not None:
+            values[missing] = yield_encoder.predict(live_rows)
+        else:
+            import pandas as pd
+            values[missing] = yield_model_pipeline.predict(pd.DataFrame(live_rows, columns=YIELD_FEATURES))
+    return values
+
+def predict_yields_for_crops(data: CropInput, crops) -> np.ndarray:
+    """Predicted yields of several crops at one location, in one batched call"""
+    predicted_log_yield = predict_log_yields([{
+        'State_Name': data.State_Name,
+        'District_Name': data.District_Name,
+        'Crop_Year': data.Crop_Year,
+        'Season': data.Season,
+        'Crop': crop,
+    } for crop in crops])
+    return np.expm1(predicted_log_yield)
 
+def historical_baseline(data: CropInput, crop: str) -> Optional[dict]:
+    """All-years yield statistics for this crop at the input's location and season"""
+    return yield_history.lookup(data.State_Name, data.District_Name, crop, data.Season)
+
+def run_yield_prediction(data: CropInput, top_k: Optional[int] = None) -> dict:
+    """Runs both models for one CropInput; called on the shared inference executor."""
+    import pandas as pd
+
+    # Part A: Predict Crop Recommendation
+    recommend_features_df = pd.DataFrame(
+        [[data.N, data.P, data.K, data.temperature, data.humidity, data.ph, data.rainfall]],
+        columns=RECOMMEND_FEATURES
+    )
+    if not top_k:
+        recommended_crop = recommend_model.predict(recommend_features_df)[0]
         # Part B: Predict Yield for the Recommended Crop
-        yield_features_df = pd.DataFrame({
-            'State_Name': [data.State_Name],
-            'District_Name': [data.District_Name],
-            'Crop_Year': [data.Crop_Year],
-            'Season': [data.Season],
-            'Crop': [recommended_crop]
-        })
-        
-        predicted_log_yield = yield_model_pipeline.predict(yield_features_df)
-        # Extract the float value from the numpy array
-        predicted_yield = np.expm1(predicted_log_yield)
-
-        # Return the results as JSON
-        return {
+        predicted_yield = predict_yields_for_crops(data, [recommended_crop])
+        result = {
             "recommended_crop": recommended_crop.upper(),
             "predicted_yield": f"{predicted_yield[0]:.2f}"
         }
+        if yield_history is not None:
+            result["historical_baseline"] = historical_baseline(data, recommended_crop)
+        return result
+
+    # Top-k: the k most probable crops (the first is what predict() returns), all k yields in one call
+    probabilities = recommend_model.predict_proba(recommend_features_df)[0]
+    order = np.argsort(-probabilities, kind="stable")[:top_k]
+    crops = recommend_model.classes_[order]
+    predicted_yield = predict_yields_for_crops(data, crops)
+    top_crops = [
+        {"crop": crop.upper(), "probability": round(float(probabilities[i]), 4), "predicted_yield": f"{value:.2f}"}
+        for crop, i, value in zip(crops, order, predicted_yield)
+    ]
+    result = {"recommended_crop": crops[0].upper(), "predicted_yield": f"{predicted_yield[0]:.2f}"}
+    if yield_history is not None:
+        for entry, crop in zip(top_crops, crops):
+            entry["historical_baseline"] = historical_baseline(data, crop)
+        result["historical_baseline"] = top_crops[0]["historical_baseline"]
+    result["top_crops"] = top_crops
+    return result
+
+@router.post("/predict-yield")
+async def predict_yield(data: CropInput, top_k: Optional[int] = Query(None, ge=1, le=MAX_TOP_K)):
+    """`?top_k=3` adds the three most likely crops, each with its predicted yield"""
+    if await yield_models.aget() is None:
+        return {"error": "Models are not loaded. Please check server logs."}
+
+    try:
+        return await inference_executor.run(run_yield_prediction, data, top_k)
+    except InferenceQueueFull as e:
+        return JSONResponse(content={"error": str(e)}, status_code=503)
     except Exception as e:
         return {"error": f"An error occurred during prediction: {str(e)}"}
 
-# --- 5. Root endpoint for testing ---
+# --- 5. Batch endpoints: many plots per request, streamed back as NDJSON in input order ---
+# Rows are scored YIELD_BATCH_CHUNK at a time, one call per model per chunk
+YIELD_BATCH_CHUNK = int(os.getenv("YIELD_BATCH_CHUNK", 2048))
+TEXT_COLUMNS = ['State_Name', 'District_Name', 'Season']
+DEFAULT_COLUMNS = {'Crop_Year': 2024}  # same default as CropInput
+
+def clean_yield_chunk(chunk: "pd.DataFrame"):
+    return clean_chunk(
+        chunk, RECOMMEND_FEATURES + ['Crop_Year'], TEXT_COLUMNS,
+        defaults=DEFAULT_COLUMNS, integer_columns=['Crop_Year'],
+    )
+
+def stream_yield_batch(chunks):
+    lines = stream_yield_predictions(
+        chunks, run_yield_batch, clean_yield_chunk, inference_executor, InferenceQueueFull
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+@router.post("/predict-yield/batch")
+async def predict_yield_batch(rows: List[CropInput]):
+    if await yield_models.aget() is None:
+        return {"error": "Models are not loaded. Please check server logs."}
+    return stream_yield_batch(iter_frame_chunks(inputs_to_frame(rows), YIELD_BATCH_CHUNK))
+
+@router.post("/predict-yield/batch/csv")
+async def predict_yield_batch_csv(file: UploadFile = File(...)):
+    """CSV with a header row naming the CropInput fields (Crop_Year optional)"""
+    import pandas as pd
+
+    if await yield_models.aget() is None:
+        return {"error": "Models are not loaded. Please check server logs."}
+
+    try:
+        # Parsing the header (and first chunk) up front so a wrong file gets a plain 400
+        chunks = iter_csv_chunks(file.file, YIELD_BATCH_CHUNK, TEXT_COLUMNS)
+        first = await inference_executor.run(next, chunks, None)
+    except InferenceQueueFull as e:
+        return JSONResponse(content={"error": str(e)}, status_code=503)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        return JSONResponse(content={"error": f"Could not parse CSV: {e}"}, status_code=400)
+    if first is None:
+        return JSONResponse(content={"error": "CSV has no rows"}, status_code=400)
+    missing = missing_columns(first, RECOMMEND_FEATURES, TEXT_COLUMNS, DEFAULT_COLUMNS)
+    if missing:
+        return JSONResponse(content={"error": f"CSV is missing columns: {', '.join(missing)}"}, status_code=400)
+
+    return stream_yield_batch(itertools.chain([first], chunks))
+
+# --- What-if sweeps: the base input with some RECOMMEND_FEATURES varied over a grid ---
+# The whole grid goes through recommend_model in one call; results are cached as encoded JSON
+MAX_SWEEP_POINTS = int(os.getenv("YIELD_SWEEP_MAX_POINTS", 10000))
+sweep_cache = LRUCache(
+    maxsize=int(os.getenv("YIELD_SWEEP_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("YIELD_SWEEP_CACHE_TTL", 3600)),
+)
+
+class SweepAxis(BaseModel):
+    feature: str  # one of RECOMMEND_FEATURES
+    start: float
+    stop: float
+    # Bounded here so no axis is ever materialised past the limit, whatever the other axes are
+    steps: int = Field(5, ge=1, le=MAX_SWEEP_POINTS)
+
+class SweepRequest(BaseModel):
+    base: CropInput
+    axes: List[SweepAxis]
+    include_yield: bool = False
+
+def sweep_error(request: SweepRequest) -> Optional[str]:
+    features = [axis.feature for axis in request.axes]
+    if not features:
+        return "Give at least one axis to sweep"
+    unknown = [feature for feature in features if feature not in RECOMMEND_FEATURES]
+    if unknown:
+        return f"Cannot sweep {', '.join(unknown)}; choose from {', '.join(RECOMMEND_FEATURES)}"
+    if len(set(features)) != len(features):
+        return "Each feature can only be swept once"
+    # Python ints: np.prod would wrap around in int64 and let a huge grid through
+    points = math.prod(axis.steps for axis in request.axes)
+    if points > MAX_SWEEP_POINTS:
+        return f"Sweep has {points} points; the limit is {MAX_SWEEP_POINTS}"
+    return None
+
+def run_yield_sweep(request: SweepRequest) -> dict:
+    """
+    Columnar result: `crop_index` holds one entry per grid point (row-major over
+    `axes`, reshape to `shape`) pointing into `crops`.
+    """
+    import pandas as pd
+
+    base = request.base
+    axis_values = [np.linspace(axis.start, axis.stop, axis.steps) for axis in request.axes]
+    grid = np.meshgrid(*axis_values, indexing="ij")
+    points = grid[0].size
+
+    recommend_features_df = pd.DataFrame(
+        {feature: np.full(points, getattr(base, feature), dtype=np.float64) for feature in RECOMMEND_FEATURES},
+        columns=RECOMMEND_FEATURES,
+    )
+    for axis, values in zip(request.axes, grid):
+        recommend_features_df[axis.feature] = values.ravel()
+    recommended_crops = recommend_model.predict(recommend_features_df)
+    crops, crop_index = np.unique(recommended_crops, return_inverse=True)
+
+    result = {
+        "axes": {axis.feature: values.round(6).tolist() for axis, values in zip(request.axes, axis_values)},
+        "shape": list(grid[0].shape),
+        "crops": [crop.upper() for crop in crops],
+        "crop_counts": np.bincount(crop_index, minlength=len(crops)).tolist(),
+        "crop_index": crop_index.tolist(),
+    }
+    if request.include_yield:
+        # Location, season and year are the same at every point, so yield only depends on the crop
+        result["predicted_yield"] = [f"{value:.2f}" for value in predict_yields_for_crops(base, crops)]
+    return result
+
+@router.post("/sweep")
+async def yield_sweep(request: SweepRequest):
+    """Recommended crop (and optionally yield) at every point of a grid around `base`"""
+    error = sweep_error(request)
+    if error:
+        return JSONResponse(content={"error": error}, status_code=400)
+    if await yield_models.aget() is None:
+        return {"error": "Models are not loaded. Please check server logs."}
+
+    key = json.dumps(request.dict(), sort_keys=True)
+    body = sweep_cache.get(key)
+    if body is None:
+        try:
+            result = await inference_executor.run(run_yield_sweep, request)
+        except InferenceQueueFull as e:
+            return JSONResponse(content={"error": str(e)}, status_code=503)
+        except Exception as e:
+            return {"error": f"An error occurred during the sweep: {str(e)}"}
+        body = JSONResponse(content=result).body
+        sweep_cache.put(key, body)
+    return Response(content=body, media_type="application/json")
+
+@router.get("/sweep/stats")
+def yield_sweep_stats():
+    return sweep_cache.stats()
+
+# Hit ratio of the precomputed yield cube
+@router.get("/cube/stats")
+def yield_cube_stats():
+    if yield_cube is None:
+        return {"loaded": False, "state": yield_models.state}
+    return yield_cube.stats()
+
+# Historical yields (count, mean, median, percentiles) for one crop at one place; season=None pools all seasons
+@router.get("/history")
+async def yield_history_stats(
+    state: str,
+    district: str,
+    crop: str,
+    season: Optional[str] = None,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+):
+    await yield_models.aget()
+    if yield_history is None:
+        return JSONResponse(content={"error": "Yield history is not built. Run build_yield_history.py."}, status_code=503)
+    stats = yield_history.lookup(state, district, crop, season, start_year, end_year)
+    if stats is None:
+        return JSONResponse(content={"error": "No recorded yields for this selection"}, status_code=404)
+    return {"state": state, "district": district, "crop": crop, "season": season, **stats}
+
+# Catalog of values the models know, and autocomplete over it (e.g. field=District_Name&q=luck)
+MAX_SUGGESTIONS = 50
+
+@router.get("/catalog")
+async def get_yield_catalog(if_none_match: Optional[str] = Header(None)):
+    if await yield_models.aget() is None:
+        return {"error": "Models are not loaded. Please check server logs."}
+    return etag_response(yield_catalog.full(), if_none_match)
+
+@router.get("/typeahead")
+async def yield_typeahead(field: str, q: str = "", limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)):
+    if await yield_models.aget() is None:
+        return {"error": "Models are not loaded. Please check server logs."}
+    suggestions = yield_catalog.suggest(field, q, limit)
+    if suggestions is None:
+        return JSONResponse(
+            content={"error": f"Unknown field {field!r}; choose from {', '.join(yield_catalog.fields)}"},
+            status_code=400,
+        )
+    return {"field": field, "query": q, "suggestions": suggestions}
+
+# --- 6. Root endpoint for testing ---
 @router.get("/")
 def read_root():
     return {"message": "LeafLense Yield Prediction API is running."}
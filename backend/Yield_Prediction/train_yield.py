@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Memory-bounded training for the crop recommendation and yield models.
+
+Usage (from backend/):
+    python -m Yield_Prediction.train_yield --data Yield_Prediction/crop_production.csv
+    python -m Yield_Prediction.train_yield --encoding dense   # yield-final.py's dense one-hot, for comparison
+    python -m Yield_Prediction.train_yield --engine hgb --skip-recommend   # HistGradientBoosting yield model
+
+Same models and split as yield-final.py, but:
+  * crop_production.csv is read in chunks with typed columns, and the
+    four text columns become pandas categoricals (one small integer code
+    per row instead of a Python string);
+  * the cleaned dataset is cached next to the models (Parquet when pyarrow
+    is installed, a pickle otherwise) and reused while the CSV is unchanged;
+  * District_Name and friends are one-hot encoded into a sparse matrix,
+    so the design matrix grows with rows x 5 instead of rows x levels.
+
+Wall time and peak memory are printed for every stage. The models are
+written to saved_models/ exactly where the API loads them from (see
+engines.py for the file name of each --engine).
+"""
+
+import argparse
+import contextlib
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving.metrics import peak_rss_kb, reset_peak_rss  # noqa: E402
+from Yield_Prediction.engines import YIELD_ENGINES, build_yield_pipeline, yield_model_path  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVED_MODELS = os.path.join(BASE_DIR, "saved_models")
+CATEGORICAL_FEATURES = ['State_Name', 'District_Name', 'Season', 'Crop']
+YIELD_FEATURES = ['State_Name', 'District_Name', 'Crop_Year', 'Season', 'Crop']
+CSV_DTYPES = {
+    'State_Name': str,
+    'District_Name': str,
+    'Crop_Year': 'Int64',
+    'Season': str,
+    'Crop': str,
+    'Area': np.float64,
+    'Production': np.float64,
+}
+
+
+def _clean_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """yield-final.py's cleaning, applied to one chunk"""
+    for column in CATEGORICAL_FEATURES:
+        chunk[column] = chunk[column].str.strip()
+    chunk = chunk.dropna()
+    chunk = chunk.assign(Yield=chunk['Production'] / chunk['Area'])
+    chunk = chunk[np.isfinite(chunk['Yield'])]
+    chunk = chunk.assign(
+        Crop_Year=chunk['Crop_Year'].astype(np.int16),
+        Yield_log=np.log1p(chunk['Yield']),
+    )
+    for column in CATEGORICAL_FEATURES:
+        chunk[column] = chunk[column].astype('category')
+    return chunk
+
+
+def _cache_path(csv_path: str, cache_dir: str) -> str:
+    stat = os.stat(csv_path)
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    extension = "parquet" if _has_parquet() else "pkl"
+    return os.path.join(cache_dir, f"{stem}.clean-{stat.st_size}-{int(stat.st_mtime)}.{extension}")
+
+
+def _has_parquet() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def load_production_data(csv_path: str, cache_dir: str = None, chunksize: int = 100_000) -> pd.DataFrame:
+    """
+    The cleaned production dataset (stripped categoricals, int16 Crop_Year,
+    Yield and Yield_log), read chunk by chunk. With `cache_dir`, the result
+    is cached there and reused until the CSV's size or mtime changes.
+    """
+    cache_path = _cache_path(csv_path, cache_dir) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        if cache_path.endswith(".parquet"):
+            return pd.read_parquet(cache_path)
+        return pd.read_pickle(cache_path)
+
+    chunks = [
+        _clean_chunk(chunk)
+        for chunk in pd.read_csv(csv_path, usecols=list(CSV_DTYPES), dtype=CSV_DTYPES, chunksize=chunksize)
+    ]
+    # Chunks saw different category sets; union them so codes line up before concatenating
+    for column in CATEGORICAL_FEATURES:
+        categories = pd.api.types.union_categoricals([chunk[column] for chunk in chunks]).categories
+        for chunk in chunks:
+            chunk[column] = chunk[column].cat.set_categories(categories)
+    frame = pd.concat(chunks, ignore_index=True)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        for stale in os.listdir(cache_dir):
+            if stale.startswith(os.path.basename(cache_path).split(".clean-")[0] + ".clean-"):
+                os.remove(os.path.join(cache_dir, stale))
+        if cache_path.endswith(".parquet"):
+            frame.to_parquet(cache_path, index=False)
+        else:
+            frame.to_pickle(cache_path)
+    return frame
+
+
+class StageReport:
+    """Wall time and peak memory per training stage"""
+
+    def __init__(self, trace_python: bool = False):
+        self.trace_python = trace_python
+        self.rows = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        reset_peak_rss()
+        rss_before = peak_rss_kb()
+        if self.trace_python:
+            tracemalloc.start()
+        print(f"🔄 {name}...")
+        started = time.perf_counter()
+        yield
+        row = {
+            "stage": name,
+            "wall_s": time.perf_counter() - started,
+            "peak_rss_mb": peak_rss_kb() / 1024.0,
+            "rss_growth_mb": (peak_rss_kb() - rss_before) / 1024.0,
+        }
+        if self.trace_python:
+            row["python_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+        self.rows.append(row)
+
+    def print(self):
+        extra = self.trace_python
+        print(f"\n{'stage':<28} {'wall s':>8} {'peak RSS MB':>12} {'+MB':>8}" + (f" {'py peak MB':>11}" if extra else ""))
+        for r in self.rows:
+            line = f"{r['stage']:<28} {r['wall_s']:>8.2f} {r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>8.1f}"
+            print(line + (f" {r['python_peak_mb']:>11.1f}" if extra else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "crop_production.csv"))
+    parser.add_argument("--recommend-data", default=os.path.join(BASE_DIR, "crop_recommendation.csv"))
+    parser.add_argument("--out-dir", default=SAVED_MODELS)
+    parser.add_argument("--cache-dir", default=SAVED_MODELS, help="Where the cleaned dataset is cached")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-read the CSV")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="CSV rows per chunk")
+    parser.add_argument("--engine", choices=YIELD_ENGINES, default=os.getenv("YIELD_ENGINE", "rf"))
+    parser.add_argument("--encoding", choices=("sparse", "dense"), default="sparse", help="One-hot layout (rf)")
+    parser.add_argument("--trees", type=int, default=100, help="Forest size (rf)")
+    parser.add_argument("--max-iter", type=int, default=300, help="Boosting rounds (hgb)")
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--skip-recommend", action="store_true", help="Only retrain the yield model")
+    parser.add_argument("--trace-python", action="store_true", help="Also report tracemalloc peaks (slower)")
+    args = parser.parse_args()
+
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score, mean_absolute_error
+    from sklearn.model_selection import train_test_split
+
+    report = StageReport(args.trace_python)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    with report.stage("load + clean"):
+        yield_df = load_production_data(args.data, None if args.no_cache else args.cache_dir, args.chunksize)
+    print(f"📊 {len(yield_df):,} rows, {yield_df.memory_usage(deep=True).sum() / 1e6:.1f} MB in memory")
+
+    if not args.skip_recommend:
+        with report.stage("recommendation model"):
+            recommend_df = pd.read_csv(args.recommend_data)
+            X_recommend = recommend_df.drop('label', axis=1)
+            y_recommend = recommend_df['label']
+            X_train_rec, X_test_rec, y_train_rec, y_test_rec = train_test_split(
+                X_recommend, y_recommend, test_size=0.2, random_state=42)
+            recommend_model = RandomForestClassifier(n_estimators=100, random_state=42)
+            recommend_model.fit(X_train_rec, y_train_rec)
+            print(f"Crop Recommendation Model Accuracy: {accuracy_score(y_test_rec, recommend_model.predict(X_test_rec)):.2f}")
+
+    with report.stage("split"):
+        X_train, X_test, y_train, y_test = train_test_split(
+            yield_df[YIELD_FEATURES], yield_df['Yield_log'], test_size=0.2, random_state=42)
+        del yield_df
+
+    if args.engine == "rf":
+        pipeline = build_yield_pipeline("rf", encoding=args.encoding, n_estimators=args.trees, n_jobs=args.jobs)
+    else:
+        pipeline = build_yield_pipeline("hgb", max_iter=args.max_iter)
+    with report.stage(f"encode ({args.encoding if args.engine == 'rf' else 'ordinal + target'})"):
+        X_train_encoded = pipeline.named_steps['preprocessor'].fit_transform(X_train, y_train)
+    nnz = X_train_encoded.nnz if hasattr(X_train_encoded, "nnz") else X_train_encoded.size
+    print(f"📊 Design matrix {X_train_encoded.shape[0]:,} x {X_train_encoded.shape[1]:,}, {nnz:,} stored values")
+
+    with report.stage(f"fit {args.engine}"):
+        pipeline.named_steps['regressor'].fit(X_train_encoded, y_train)
+        del X_train_encoded
+
+    with report.stage("evaluate"):
+        print(f"Crop Yield Model MAE: {mean_absolute_error(y_test, pipeline.predict(X_test)):.2f}")
+
+    with report.stage("save"):
+        model_path = yield_model_path(args.out_dir, args.engine)
+        with open(model_path, 'wb') as file:
+            pickle.dump(pipeline, file)
+        print(f"Yield model saved to: {model_path}")
+        if not args.skip_recommend:
+            recommend_model_path = os.path.join(args.out_dir, 'crop_recommend_model.pkl')
+            with open(recommend_model_path, 'wb') as file:
+                pickle.dump(recommend_model, file)
+            print(f"Recommendation model saved to: {recommend_model_path}")
+
+    report.print()
+
+
+if __name__ == "__main__":
+    main()
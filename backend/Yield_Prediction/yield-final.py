@@ -7,6 +7,9 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+# For retraining on the full dataset prefer `python -m Yield_Prediction.train_yield`:
+# same models, but chunked/categorical CSV loading, a cached clean dataset and a sparse design matrix.
+
 # ### Cell 1: Import Libraries
 import numpy as np
 import pandas as pd
@@ -18,6 +21,15 @@ from sklearn.metrics import accuracy_score, mean_absolute_error
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from engines import YIELD_ENGINES, YIELD_MODEL_FILES, build_hgb_pipeline
+
+# YIELD_ENGINE=hgb trains a HistGradientBoostingRegressor with native categorical splits instead
+# (smaller and faster to serve; see engines.py and compare_engines.py). Checked before any training.
+YIELD_ENGINE = os.getenv("YIELD_ENGINE", "rf")
+if YIELD_ENGINE not in YIELD_ENGINES:
+    sys.exit(f"Unknown YIELD_ENGINE {YIELD_ENGINE!r}; choose from {', '.join(YIELD_ENGINES)}")
 
 # ### Cell 2: Load Datasets
 # Load the two datasets needed for recommendation and yield prediction.
@@ -73,18 +85,21 @@ X_yield = yield_df[['State_Name', 'District_Name', 'Crop_Year', 'Season', 'Crop'
 y_yield = yield_df['Yield_log']
 X_train_yield, X_test_yield, y_train_yield, y_test_yield = train_test_split(X_yield, y_yield, test_size=0.2, random_state=42)
 
-# Create a preprocessing pipeline to handle categorical features
-categorical_features = ['State_Name', 'District_Name', 'Season', 'Crop']
-preprocessor = ColumnTransformer(
-    transformers=[('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_features)],
-    remainder='passthrough'
-)
-
-# Create the full pipeline with the preprocessor and the regressor model
-yield_model_pipeline = Pipeline(steps=[
-    ('preprocessor', preprocessor),
-    ('regressor', RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1))
-])
+if YIELD_ENGINE == "hgb":
+    yield_model_pipeline = build_hgb_pipeline()
+else:
+    # Create a preprocessing pipeline to handle categorical features
+    categorical_features = ['State_Name', 'District_Name', 'Season', 'Crop']
+    preprocessor = ColumnTransformer(
+        transformers=[('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_features)],
+        remainder='passthrough'
+    )
+
+    # Create the full pipeline with the preprocessor and the regressor model
+    yield_model_pipeline = Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('regressor', RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1))
+    ])
 
 # Train the model on the clean data
 yield_model_pipeline.fit(X_train_yield, y_train_yield)
@@ -161,7 +176,7 @@ os.makedirs(save_dir, exist_ok=True)
 
 # Define the full paths for the model files
 recommend_model_path = os.path.join(save_dir, 'crop_recommend_model.pkl')
-yield_model_path = os.path.join(save_dir, 'crop_yield_model.pkl')
+yield_model_path = os.path.join(save_dir, YIELD_MODEL_FILES[YIELD_ENGINE])
 
 # Save the models to the new paths
 with open(yield_model_path, 'wb') as file:
@@ -0,0 +1,116 @@
+# Yield_Prediction/yield_cube.py
+import json
+import os
+import threading
+
+import numpy as np
+
+CUBE_FILE = "cube.npy"
+INDEX_FILE = "index.json"
+
+
+class YieldCube:
+    """
+    Precomputed log-yield predictions over the finite input space.
+
+    cube.npy is a (locations, seasons, crops, years) float64 array of
+    `yield_model_pipeline.predict` outputs, where a location is one
+    (State_Name, District_Name) pair that exists in the production data;
+    index.json holds the axis labels. The array is memory-mapped, so a
+    lookup is four dict hits and one read. Anything outside the cube
+    (unseen district, crop or year) is a miss and the caller runs the model.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.values = np.load(os.path.join(path, CUBE_FILE), mmap_mode="r")
+        self.path = path
+        self._locations = {(s, d): i for i, (s, d) in enumerate(self.index["locations"])}
+        self._seasons = {s: i for i, s in enumerate(self.index["seasons"])}
+        self._crops = {c: i for i, c in enumerate(self.index["crops"])}
+        self.first_year, self.last_year = self.index["years"]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _position(self, row):
+        location = self._locations.get((row["State_Name"], row["District_Name"]))
+        season = self._seasons.get(row["Season"])
+        crop = self._crops.get(row["Crop"])
+        year = row["Crop_Year"]
+        if location is None or season is None or crop is None or not self.first_year <= year <= self.last_year:
+            return None
+        return location, season, crop, int(year) - self.first_year
+
+    def lookup(self, rows) -> np.ndarray:
+        """Log yields for dict rows keyed by the yield features; NaN where the cube has no answer"""
+        out = np.full(len(rows), np.nan)
+        found = 0
+        for i, row in enumerate(rows):
+            position = self._position(row)
+            if position is not None:
+                out[i] = self.values[position]
+                found += 1
+        with self._lock:
+            self.hits += found
+            self.misses += len(rows) - found
+        return out
+
+    def lookup_frame(self, frame) -> np.ndarray:
+        """Vectorized lookup for a DataFrame with the yield feature columns"""
+        import pandas as pd
+
+        location = pd.Series(
+            list(zip(frame["State_Name"], frame["District_Name"])), index=frame.index, dtype=object
+        ).map(self._locations)
+        season = frame["Season"].map(self._seasons)
+        crop = frame["Crop"].map(self._crops)
+        year = frame["Crop_Year"] - self.first_year
+        found = (
+            location.notna() & season.notna() & crop.notna()
+            & (year >= 0) & (year <= self.last_year - self.first_year)
+        ).to_numpy()
+
+        out = np.full(len(frame), np.nan)
+        if found.any():
+            out[found] = self.values[
+                location.to_numpy()[found].astype(np.int64),
+                season.to_numpy()[found].astype(np.int64),
+                crop.to_numpy()[found].astype(np.int64),
+                year.to_numpy()[found].astype(np.int64),
+            ]
+        with self._lock:
+            self.hits += int(found.sum())
+            self.misses += int(len(frame) - found.sum())
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "loaded": True,
+                "shape": list(self.values.shape),
+                "years": [self.first_year, self.last_year],
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+            }
+
+
+def load_yield_cube(path: str, model_path: str = None):
+    """YieldCube at `path`, or None if it is missing or was built from another or an older yield model"""
+    index_path = os.path.join(path, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path) as f:
+        index = json.load(f)
+    built_from = index.get("model_mtime")
+    if model_path and index.get("model_path") and os.path.basename(index["model_path"]) != os.path.basename(model_path):
+        print(f"⚠️ Yield cube at {path} was built from {os.path.basename(index['model_path'])}, "
+              f"not {os.path.basename(model_path)}; rebuild it (serving live predictions)")
+        return None
+    if model_path and os.path.exists(model_path) and built_from and os.path.getmtime(model_path) > built_from:
+        print(f"⚠️ Yield cube at {path} was built from an older model; rebuild it (serving live predictions)")
+        return None
+    return YieldCube(path)
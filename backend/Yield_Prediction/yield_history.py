@@ -0,0 +1,89 @@
+# Yield_Prediction/yield_history.py
+import json
+import os
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+STAT_NAMES = ("count", "mean", "median", "p10", "p25", "p75", "p90", "min", "max")
+
+
+def history_key(*parts) -> tuple:
+    """Lookups ignore case and surrounding whitespace (the recommender says "rice", the data "Rice")"""
+    return tuple(str(part).strip().lower() for part in parts)
+
+
+def summarize(yields: np.ndarray) -> np.ndarray:
+    """STAT_NAMES, in order, for one group's yields"""
+    p10, p25, median, p75, p90 = np.percentile(yields, [10, 25, 50, 75, 90])
+    return np.array([len(yields), yields.mean(), median, p10, p25, p75, p90, yields.min(), yields.max()])
+
+
+class YieldHistory:
+    """
+    Historical yields per (state, district, crop, season), built by build_yield_history.py.
+
+    Every group's rows sit contiguously in years.npy / yields.npy, sorted by
+    year, with offsets.npy marking where each group starts; stats.npy holds
+    the all-years summary of every group. A lookup is one dict hit plus
+    either a row of stats.npy or a binary search for the year range and a
+    summary of that slice.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")  # noqa: E731
+        self.offsets, self.years, self.yields, self.stats_table = (
+            load("offsets"), load("years"), load("yields"), load("stats")
+        )
+        self.path = path
+        self._groups = {tuple(key): i for i, key in enumerate(self.index["groups"])}
+        self._by_location_crop = {}
+        for i, (state, district, crop, _) in enumerate(self.index["groups"]):
+            self._by_location_crop.setdefault((state, district, crop), []).append(i)
+
+    def __len__(self):
+        return len(self._groups)
+
+    def _group_ids(self, state, district, crop, season=None):
+        if season is None:
+            return self._by_location_crop.get(history_key(state, district, crop), [])
+        group = self._groups.get(history_key(state, district, crop, season))
+        return [] if group is None else [group]
+
+    def lookup(self, state, district, crop, season=None, start_year=None, end_year=None):
+        """Stats dict, or None when there is no history. Without a season, all seasons are pooled."""
+        groups = self._group_ids(state, district, crop, season)
+        if not groups:
+            return None
+
+        if len(groups) == 1 and start_year is None and end_year is None:
+            group = groups[0]
+            values = self.stats_table[group]
+            first, last = self.years[self.offsets[group]], self.years[self.offsets[group + 1] - 1]
+        else:
+            years, yields = [], []
+            for group in groups:
+                begin, end = self.offsets[group], self.offsets[group + 1]
+                group_years = self.years[begin:end]
+                lo = begin + (np.searchsorted(group_years, start_year, "left") if start_year is not None else 0)
+                hi = begin + (np.searchsorted(group_years, end_year, "right") if end_year is not None else end - begin)
+                years.append(self.years[lo:hi])
+                yields.append(self.yields[lo:hi])
+            years, yields = np.concatenate(years), np.concatenate(yields)
+            if not len(yields):
+                return None
+            values = summarize(yields)
+            first, last = years.min(), years.max()
+
+        stats = {name: round(float(value), 4) for name, value in zip(STAT_NAMES, values)}
+        stats["count"] = int(values[0])
+        stats["years"] = [int(first), int(last)]
+        return stats
+
+
+def load_yield_history(path: str):
+    if not os.path.exists(os.path.join(path, INDEX_FILE)):
+        return None
+    return YieldHistory(path)
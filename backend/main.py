@@ -1,5 +1,9 @@
+import time
+BOOT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -10,14 +14,20 @@ load_dotenv()
 # Add a debug print to confirm it's working
 print(f"DEBUG from main.py: PRIVATE_KEY has been loaded. Value starts with: {str(os.getenv('PRIVATE_KEY'))[:25]}...")
 # --- END BLOCK ---
-from FarmAgent.routes import router as farm_router
-from Plant_Disease.routes import router as plant_router
-from FertilizerSuggestor.routes import router as fert_router
-<<<<<<< Updated upstream
-from Yield_Prediction.routes import router as yield_router
-=======
-from PricePrediction.routes import router as price_router
->>>>>>> Stashed changes
+from serving.lazy import timed_import, preload, readiness, startup_report
+from serving.executor import inference_executor
+from Plant_Disease.uploads import UploadSizeLimitMiddleware
+
+# Router modules only define routes at import time; their models load on first use
+# (timed so /startup can show where boot time goes)
+farm_routes = timed_import("FarmAgent.routes")
+plant_routes = timed_import("Plant_Disease.routes")
+yield_routes = timed_import("Yield_Prediction.routes")
+price_routes = timed_import("PricePrediction.routes")
+
+# Which models to load in the background once the server is up:
+# "default" (every model, but not the WhatsApp MCP process), "all", "none", or names like "plant_disease,price_model"
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "default")
 
 # Load environment variables (from .env inside backend/)
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
@@ -29,6 +39,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Cap disease upload bodies while they stream in
+# (added before CORS so CORS stays outermost and its 413s still carry Access-Control-* headers)
+app.add_middleware(UploadSizeLimitMiddleware, limits=plant_routes.upload_limits("/plant"))
+
 # CORS setup
 app.add_middleware(
     CORSMiddleware,
@@ -39,19 +53,52 @@ app.add_middleware(
 )
 
 # Include routers
-app.include_router(farm_router, prefix="/farm", tags=["FarmAgent"])
-app.include_router(plant_router, prefix="/plant", tags=["Plant_Disease"])
-app.include_router(fert_router, prefix="/fertilizer", tags=["FertilizerSuggestor"])
-<<<<<<< Updated upstream
-app.include_router(yield_router, prefix="/yield", tags=["YieldPredictor"])
-=======
-app.include_router(price_router, prefix="/price", tags=["PricePrediction"])
->>>>>>> Stashed changes
+app.include_router(farm_routes.router, prefix="/farm", tags=["FarmAgent"])
+app.include_router(plant_routes.router, prefix="/plant", tags=["Plant_Disease"])
+app.include_router(yield_routes.router, prefix="/yield", tags=["YieldPredictor"])
+app.include_router(price_routes.router, prefix="/price", tags=["PricePrediction"])
 
 @app.get("/")
 def root():
     return {"message": "Unified Backend running successfully"}
 
+# Queue-length / in-flight gauges of the executor shared by the model routers
+@app.get("/inference/stats")
+def inference_stats():
+    return inference_executor.stats()
+
+# Liveness: answers as soon as the process is up, whatever the models are doing
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+# Readiness: 200 once every model picked by PRELOAD_MODELS has finished loading (or failed to);
+# lazily loaded models are listed with their state but do not hold readiness back
+@app.get("/ready")
+def ready():
+    resources = readiness()
+    waiting = [name for name in app.state.preloading if resources[name]["state"] in ("unloaded", "loading")]
+    return JSONResponse(content={
+        "ready": not waiting,
+        "waiting_for": waiting,
+        "resources": resources,
+    }, status_code=503 if waiting else 200)
+
+# Where boot time went: per-router import seconds and per-model load seconds
+@app.get("/startup")
+def startup_breakdown():
+    return {"boot_seconds": app.state.boot_seconds, **startup_report()}
+
+@app.on_event("startup")
+def preload_models():
+    app.state.preloading = preload(PRELOAD_MODELS)
+    app.state.boot_seconds = round(time.perf_counter() - BOOT_STARTED, 3)
+    print(f"🚀 Ready to serve in {app.state.boot_seconds}s; preloading in the background: {app.state.preloading or 'nothing'}")
+
+@app.on_event("shutdown")
+def shutdown_inference_executor():
+    inference_executor.shutdown(wait=False)
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",   # ✅ correct for backend/main.py
@@ -0,0 +1 @@
+# Shared serving infrastructure (metrics, executors, caches) used by the model routers
@@ -0,0 +1,119 @@
+# serving/catalog.py
+import bisect
+import difflib
+import hashlib
+import json
+import threading
+
+from fastapi.responses import Response
+
+# Shorter queries match too much to be worth a difflib pass
+FUZZY_MIN_CHARS = 3
+
+
+def encoder_categories(pipeline) -> dict:
+    """
+    {column: categories} from the fitted encoders in a pipeline's first step
+    (OneHot/Ordinal/TargetEncoder, anything with `categories_`); {} if there are none.
+    """
+    steps = getattr(pipeline, "steps", None)
+    if not steps:
+        return {}
+    preprocessor = steps[0][1]
+    names_in = list(getattr(preprocessor, "feature_names_in_", []))
+    categories = {}
+    for _, transformer, columns in getattr(preprocessor, "transformers_", []):
+        if not hasattr(transformer, "categories_"):
+            continue
+        for column, values in zip(columns, transformer.categories_):
+            column = names_in[column] if isinstance(column, int) and names_in else column
+            categories[column] = [str(v) for v in values if isinstance(v, str) or v == v]  # drop NaN
+    return categories
+
+
+class TypeaheadIndex:
+    """
+    Case-insensitive suggestions for one field: values starting with the
+    query first, then values with a later word starting with it (so "nagar"
+    finds "North Nagar"), then close misspellings via difflib.
+    """
+
+    def __init__(self, values):
+        self._values = sorted((v.casefold(), v) for v in values)
+        self._folded = [folded for folded, _ in self._values]
+        self._by_folded = {folded: v for folded, v in self._values}
+        self._words = sorted((word, v) for folded, v in self._values for word in folded.split()[1:])
+        self._word_keys = [word for word, _ in self._words]
+
+    def _prefixed(self, keys, pairs, query):
+        i = bisect.bisect_left(keys, query)
+        while i < len(keys) and keys[i].startswith(query):
+            yield pairs[i][1]
+            i += 1
+
+    def suggest(self, query: str, limit: int = 10) -> list:
+        query = query.strip().casefold()
+        if not query:
+            return [v for _, v in self._values[:limit]]
+        out = []
+        for value in self._prefixed(self._folded, self._values, query):
+            out.append(value)
+            if len(out) == limit:
+                return out
+        for value in self._prefixed(self._word_keys, self._words, query):
+            if value not in out:
+                out.append(value)
+                if len(out) == limit:
+                    return out
+        if len(query) < FUZZY_MIN_CHARS:
+            return out
+        for folded in difflib.get_close_matches(query, self._folded, n=limit, cutoff=0.6):
+            value = self._by_folded[folded]
+            if value not in out:
+                out.append(value)
+                if len(out) == limit:
+                    break
+        return out
+
+
+class Catalog:
+    """
+    The values a model accepts for each categorical field, sorted once.
+
+    JSON views are rendered once and kept as bytes with an ETag, so serving
+    one is a header compare; suggestions come from a per-field TypeaheadIndex.
+    """
+
+    def __init__(self, fields: dict):
+        self.fields = {name: sorted(set(values), key=str.casefold) for name, values in fields.items()}
+        self._indexes = {name: TypeaheadIndex(values) for name, values in self.fields.items()}
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def render(self, view: str, payload: dict):
+        """(body, etag) for a JSON payload, rendered the first time `view` is asked for"""
+        with self._lock:
+            if view not in self._rendered:
+                body = json.dumps(payload, separators=(",", ":")).encode()
+                self._rendered[view] = (body, f'"{hashlib.sha1(body).hexdigest()[:20]}"')
+            return self._rendered[view]
+
+    def full(self):
+        return self.render("catalog", {
+            "fields": self.fields,
+            "counts": {name: len(values) for name, values in self.fields.items()},
+        })
+
+    def suggest(self, field: str, query: str, limit: int = 10):
+        """Suggestions for `field`, or None if the catalog has no such field"""
+        index = self._indexes.get(field)
+        return None if index is None else index.suggest(query, limit)
+
+
+def etag_response(rendered, if_none_match: str = None) -> Response:
+    """200 with the pre-rendered bytes, or an empty 304 when the client already has them"""
+    body, etag = rendered
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Array-backed RandomForest evaluator.
+
+`export` flattens a fitted sklearn RandomForestRegressor/Classifier (or a
+Pipeline ending in one) into contiguous node arrays - one .npy file per
+field plus meta.json - and `load_compiled` maps them back read-only with
+mmap, so every worker shares one copy in the page cache instead of holding
+its own unpickled object graph. Pipelines keep their preprocessing steps in
+preprocessor.pkl.
+
+Usage (from backend/):
+    python -m serving.compiled_forest export Yield_Prediction/saved_models/crop_yield_model.pkl
+    python -m serving.compiled_forest verify Yield_Prediction/saved_models/crop_yield_model.pkl --rows 2000
+    python -m serving.compiled_forest verify Yield_Prediction/saved_models/crop_recommend_model.pkl \\
+        --data Yield_Prediction/crop_recommendation.csv
+
+The export is written next to the model as <name>.forest/ unless --out is given.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+# Batches up to this many rows are walked node by node in Python instead of level by level in numpy
+SCALAR_WALK_MAX_ROWS = int(os.getenv("COMPILED_FOREST_SCALAR_ROWS", 4))
+
+
+def forest_dir_for(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + ".forest"
+
+
+def _split_pipeline(model):
+    steps = getattr(model, "steps", None)
+    if steps:
+        from sklearn.pipeline import Pipeline
+        return Pipeline(steps[:-1]), steps[-1][1]
+    return None, model
+
+
+def export_forest(model, out_dir: str, source: str = None) -> dict:
+    """Writes the node arrays of `model`'s forest to `out_dir`; returns meta.json's contents"""
+    import sklearn
+    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+    preprocessor, forest = _split_pipeline(model)
+    if not isinstance(forest, (RandomForestRegressor, RandomForestClassifier)):
+        raise ValueError(f"Only RandomForest models can be compiled, got {type(forest).__name__}")
+    if getattr(forest, "n_outputs_", 1) != 1:
+        raise ValueError("Multi-output forests are not supported")
+    is_classifier = isinstance(forest, RandomForestClassifier)
+
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left < 0
+        nodes = np.arange(tree.node_count)
+        roots.append(offset)
+        # Leaves point at themselves so traversal can stop on `left == self`
+        feature.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        threshold.append(tree.threshold.astype(np.float64))
+        left.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+        right.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+        if is_classifier:
+            # What DecisionTreeClassifier.predict_proba returns for each leaf
+            proba = tree.value[:, 0, :forest.n_classes_].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            value.append(proba / normalizer)
+        else:
+            value.append(tree.value[:, 0, :1].astype(np.float64))
+        offset += tree.node_count
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        "feature": np.concatenate(feature),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left).astype(np.int64),
+        "right": np.concatenate(right).astype(np.int64),
+        "value": np.concatenate(value),
+        "roots": np.array(roots, dtype=np.int64),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), np.ascontiguousarray(array))
+    if preprocessor is not None:
+        with open(os.path.join(out_dir, "preprocessor.pkl"), "wb") as f:
+            pickle.dump(preprocessor, f)
+
+    meta = {
+        "kind": "classifier" if is_classifier else "regressor",
+        "n_trees": len(forest.estimators_),
+        "n_nodes": offset,
+        "n_features": int(forest.n_features_in_),
+        "max_depth": int(max(e.tree_.max_depth for e in forest.estimators_)),
+        "feature_names": [str(c) for c in getattr(forest, "feature_names_in_", [])],
+        "classes": forest.classes_.tolist() if is_classifier else None,
+        "has_preprocessor": preprocessor is not None,
+        "source": os.path.abspath(source) if source else None,
+        "source_mtime": os.path.getmtime(source) if source else None,
+        "sklearn_version": sklearn.__version__,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class CompiledForest:
+    """
+    Vectorized evaluator over exported node arrays.
+
+    All (row, tree) pairs of a batch walk down their trees together, one
+    level per numpy step, and pairs that reach a leaf drop out of the active
+    set; single rows are walked node by node instead. Inputs are cast to
+    float32 and compared against the float64 thresholds exactly as sklearn's
+    tree code does, and per-tree outputs are accumulated in tree order
+    (cumsum) as RandomForest.predict does, so predictions match the pickled
+    forest.
+    """
+
+    def __init__(self, path: str, mmap: bool = True):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        mode = "r" if mmap else None
+        for name in ARRAYS:
+            setattr(self, f"_{name}", np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode))
+        self.path = path
+        self._views = None
+        self.n_trees = self.meta["n_trees"]
+        self.n_features_in_ = self.meta["n_features"]
+        self.feature_names = self.meta["feature_names"] or None
+        self.classes_ = np.array(self.meta["classes"]) if self.meta["kind"] == "classifier" else None
+
+    def _as_array(self, X) -> np.ndarray:
+        if hasattr(X, "columns") and self.feature_names:
+            X = X[self.feature_names]
+        if hasattr(X, "toarray"):  # sparse output of a preprocessor
+            X = X.toarray()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got shape {X.shape}")
+        if np.isnan(X).any():
+            raise ValueError("Input contains NaN")
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """(n_samples, n_trees) global leaf index reached in every tree"""
+        X = self._as_array(X)
+        if len(X) <= SCALAR_WALK_MAX_ROWS:
+            return self._apply_scalar(X)
+        return self._apply_vectorized(X)
+
+    def _apply_scalar(self, X) -> np.ndarray:
+        # A few rows: a plain loop over memoryviews of the mapped arrays beats paying
+        # numpy's per-call overhead once per tree level (the yield trees go 200 levels deep)
+        if self._views is None:
+            self._views = tuple(memoryview(getattr(self, f"_{name}")) for name in ("feature", "threshold", "left", "right"))
+        feature, threshold, left, right = self._views
+        roots = self._roots.tolist()
+        leaves = np.empty((len(X), self.n_trees), dtype=np.int64)
+        for r, x in enumerate(X.tolist()):
+            row = leaves[r]
+            for t, node in enumerate(roots):
+                while left[node] != node:
+                    node = left[node] if x[feature[node]] <= threshold[node] else right[node]
+                row[t] = node
+        return leaves
+
+    def _apply_vectorized(self, X) -> np.ndarray:
+        n = len(X)
+        flat_x = X.ravel()
+        base = np.repeat(np.arange(n) * self.n_features_in_, self.n_trees)  # row offset into flat_x
+        current = np.tile(self._roots, n)
+        leaves = np.empty(n * self.n_trees, dtype=np.int64)
+        active = np.arange(n * self.n_trees)
+
+        while True:
+            done = self._left[current] == current
+            finished = np.count_nonzero(done)
+            if finished == len(active):
+                leaves[active] = current
+                break
+            # Leaves loop back to themselves, so finished pairs only need dropping once they are a sizeable share
+            if finished * 4 >= len(active):
+                leaves[active[done]] = current[done]
+                keep = ~done
+                active, current, base = active[keep], current[keep], base[keep]
+            go_left = flat_x[base + self._feature[current]] <= self._threshold[current]
+            current = np.where(go_left, self._left[current], self._right[current])
+        return leaves.reshape(n, self.n_trees)
+
+    def _mean_over_trees(self, X) -> np.ndarray:
+        per_tree = self._value[self.apply(X)]  # (n, trees, outputs)
+        return np.cumsum(per_tree, axis=1)[:, -1] / self.n_trees
+
+    def predict_proba(self, X) -> np.ndarray:
+        if self.classes_ is None:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._mean_over_trees(X)
+
+    def predict(self, X) -> np.ndarray:
+        if self.classes_ is not None:
+            return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+        return self._mean_over_trees(X)[:, 0]
+
+
+class CompiledPipeline:
+    """The pickled preprocessing steps followed by a CompiledForest (mirrors Pipeline.predict)"""
+
+    def __init__(self, preprocessor, forest: CompiledForest):
+        self.preprocessor = preprocessor
+        self.forest = forest
+        self.steps = list(getattr(preprocessor, "steps", [("preprocessor", preprocessor)])) + [("forest", forest)]
+
+    def predict(self, X):
+        return self.forest.predict(self.preprocessor.transform(X))
+
+    def predict_proba(self, X):
+        return self.forest.predict_proba(self.preprocessor.transform(X))
+
+    @property
+    def classes_(self):
+        return self.forest.classes_
+
+
+def load_compiled(path: str, source: str = None):
+    """
+    CompiledForest / CompiledPipeline from an export directory, or None if
+    there is no export or it is older than `source` (the .pkl it came from).
+    """
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    if source and os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(meta_path):
+        print(f"⚠️ {path} is older than {os.path.basename(source)}; re-run the export")
+        return None
+    forest = CompiledForest(path)
+    if not forest.meta["has_preprocessor"]:
+        return forest
+    with open(os.path.join(path, "preprocessor.pkl"), "rb") as f:
+        return CompiledPipeline(pickle.load(f), forest)
+
+
+def load_model(model_path: str, loader, use_compiled: bool = None):
+    """
+    `loader(model_path)`, unless compiled forests are enabled (USE_COMPILED_FORESTS=1)
+    and an up-to-date export sits next to the model, in which case that is mapped instead.
+    """
+    if use_compiled is None:
+        use_compiled = os.getenv("USE_COMPILED_FORESTS", "0") == "1"
+    if use_compiled:
+        compiled = load_compiled(forest_dir_for(model_path), source=model_path)
+        if compiled is not None:
+            print(f"✅ Using compiled forest {os.path.basename(forest_dir_for(model_path))}")
+            return compiled
+        print(f"⚠️ No compiled forest for {os.path.basename(model_path)}; loading the pickled model")
+    return loader(model_path)
+
+
+def _load_model(model_path):
+    import joblib
+    return joblib.load(model_path)  # also reads plain pickles
+
+
+def _synthetic_inputs(forest, rows, seed=0):
+    """Random points around the split thresholds of each feature so both branches get exercised"""
+    rng = np.random.default_rng(seed)
+    X = np.zeros((rows, forest.n_features_in_), dtype=np.float32)
+    is_split = forest._left != np.arange(len(forest._left))
+    features, thresholds = forest._feature[is_split], forest._threshold[is_split]
+    for j in range(forest.n_features_in_):
+        candidates = thresholds[features == j]
+        if candidates.size:
+            picks = rng.choice(candidates, rows)
+            X[:, j] = picks + rng.choice([-1.0, 0.0, 1.0], rows) * np.maximum(np.abs(picks), 1.0) * 1e-3
+    return X
+
+
+def verify(args):
+    model = _load_model(args.model)
+    compiled = load_compiled(args.forest or forest_dir_for(args.model))
+    if compiled is None:
+        sys.exit("❌ No (up-to-date) export found; run `export` first")
+    preprocessor, forest = _split_pipeline(model)
+    compiled_forest = compiled.forest if isinstance(compiled, CompiledPipeline) else compiled
+
+    checks = [("forest, synthetic inputs", forest, compiled_forest, _synthetic_inputs(compiled_forest, args.rows))]
+    if args.data:
+        import pandas as pd
+        frame = pd.read_csv(args.data, nrows=args.rows)
+        columns = list(getattr(preprocessor, "feature_names_in_", None) if preprocessor is not None else [])
+        columns = columns or compiled_forest.feature_names or list(frame.columns)
+        checks.append((f"end to end, {os.path.basename(args.data)}", model, compiled, frame[columns].dropna()))
+
+    failed = False
+    for name, reference, candidate, X in checks:
+        start = time.perf_counter()
+        expected = reference.predict(X)
+        reference_ms = (time.perf_counter() - start) * 1000.0
+        start = time.perf_counter()
+        actual = candidate.predict(X)
+        compiled_ms = (time.perf_counter() - start) * 1000.0
+        matches = int(np.sum(np.asarray(expected) == np.asarray(actual)))
+        ok = matches == len(X)
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {name}: {matches}/{len(X)} identical "
+              f"(sklearn {reference_ms:.1f} ms, compiled {compiled_ms:.1f} ms)")
+        if not ok and compiled_forest.classes_ is None:
+            print(f"   max abs difference: {np.max(np.abs(np.asarray(expected) - np.asarray(actual))):.3g}")
+
+    timings = {}
+    X = checks[-1][3]
+    for label, fn in (("sklearn", model.predict), ("compiled", compiled.predict)):
+        fn(X[:1])
+        start = time.perf_counter()
+        for i in range(min(args.single, len(X))):
+            fn(X[i:i + 1])
+        timings[label] = (time.perf_counter() - start) * 1000.0 / min(args.single, len(X))
+    print(f"⚡ Single-row predict: sklearn {timings['sklearn']:.2f} ms, compiled {timings['compiled']:.2f} ms")
+    if failed:
+        sys.exit(1)
+
+
+def export(args):
+    model = _load_model(args.model)
+    out_dir = args.out or forest_dir_for(args.model)
+    meta = export_forest(model, out_dir, source=args.model)
+    size = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    print(f"✅ Exported {meta['kind']} with {meta['n_trees']} trees / {meta['n_nodes']} nodes "
+          f"(max depth {meta['max_depth']}) to {out_dir} ({size / 1e6:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = sub.add_parser("export", help="Flatten a pickled forest into .npy node arrays")
+    export_parser.add_argument("model", help="Path to the .pkl / .joblib model")
+    export_parser.add_argument("--out", default=None, help="Export directory (default: <model>.forest)")
+    export_parser.set_defaults(func=export)
+
+    verify_parser = sub.add_parser("verify", help="Check the export predicts exactly like the pickled model")
+    verify_parser.add_argument("model", help="Path to the .pkl / .joblib model")
+    verify_parser.add_argument("--forest", default=None, help="Export directory (default: <model>.forest)")
+    verify_parser.add_argument("--data", default=None, help="CSV of raw model inputs for an end-to-end check")
+    verify_parser.add_argument("--rows", type=int, default=1000)
+    verify_parser.add_argument("--single", type=int, default=200, help="Single-row calls to time")
+    verify_parser.set_defaults(func=verify)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    main()
@@ -0,0 +1,111 @@
+# serving/executor.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from serving.metrics import RollingWindow
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the inference executor already has `max_queue` jobs waiting"""
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for CPU-bound model calls (TensorFlow, sklearn).
+
+    Handlers `await executor.run(fn, *args)` instead of calling the model on the
+    event loop, so I/O routes keep being served while inference saturates the
+    cores. At most `max_workers` jobs run at once and at most `max_queue` wait
+    behind them; anything beyond that is rejected with InferenceQueueFull so
+    callers can shed load instead of queueing unboundedly.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        # Jobs holding a slot (waiting or running); a slot is freed when the pool is done with the job,
+        # not when the caller stops waiting, so cancelled requests can't leak or double-book capacity
+        self._admitted = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._rejected = 0
+        self._wait_ms = RollingWindow()
+        self._run_ms = RollingWindow()
+
+    def _release(self, future):
+        with self._lock:
+            self._admitted -= 1
+            if future.cancelled():
+                self._cancelled += 1
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._admitted >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFull(
+                    f"Inference queue is full ({self._admitted - self._in_flight} waiting, {self._in_flight} running)"
+                )
+            self._admitted += 1
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self._in_flight += 1
+            self._wait_ms.record((started - submitted) * 1000.0)
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                self._run_ms.record((time.perf_counter() - started) * 1000.0)
+                with self._lock:
+                    self._in_flight -= 1
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        try:
+            future = self._pool.submit(job)
+        except BaseException:
+            with self._lock:
+                self._admitted -= 1
+            raise
+        # Runs once the job finished or, if the awaiting request was cancelled first, was dropped from the queue
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            gauges = {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_length": self._admitted - self._in_flight,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "rejected": self._rejected,
+            }
+        gauges["queue_wait_ms"] = self._wait_ms.snapshot()
+        gauges["run_ms"] = self._run_ms.snapshot()
+        return gauges
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# ✅ One executor shared by every model router in the unified backend
+inference_executor = InferenceExecutor(
+    max_workers=int(os.getenv("INFERENCE_WORKERS", os.cpu_count() or 2)),
+    max_queue=int(os.getenv("INFERENCE_MAX_QUEUE", 64)),
+)
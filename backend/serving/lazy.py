@@ -0,0 +1,115 @@
+# serving/lazy.py
+import asyncio
+import importlib
+import threading
+import time
+
+# Every LazyResource registers itself here so main.py can report and preload them
+_resources = {}
+# module name -> seconds spent importing it (recorded by timed_import)
+_import_seconds = {}
+
+
+class LazyResource:
+    """
+    A model (or subprocess, or any expensive object) loaded on first use.
+
+    `get()` runs `loader()` exactly once, even when many threads ask at the
+    same time; later calls return the cached value. A loader that raises or
+    returns None is recorded as "failed" and `get()` returns None, matching
+    how the routers treated a missing model before. `preload()` starts the
+    load on a background thread so a worker can answer health checks while
+    models are still being read from disk.
+    """
+
+    def __init__(self, name: str, loader, preload: bool = True):
+        self.name = name
+        self.preload_by_default = preload
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self.state = "unloaded"
+        self.load_seconds = None
+        self.error = None
+        _resources[name] = self
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get(self):
+        if self.state in ("ready", "failed"):
+            return self._value
+        with self._lock:
+            if self.state in ("ready", "failed"):
+                return self._value
+            self.state = "loading"
+            start = time.perf_counter()
+            try:
+                self._value = self._loader()
+                self.state = "ready" if self._value is not None else "failed"
+                if self._value is None:
+                    self.error = "loader returned nothing (see the log above)"
+            except Exception as e:
+                print(f"❌ Failed to load {self.name}: {e}")
+                self.error = str(e)
+                self.state = "failed"
+            self.load_seconds = round(time.perf_counter() - start, 3)
+            print(f"⏱️ {self.name} {self.state} in {self.load_seconds}s")
+            return self._value
+
+    async def aget(self):
+        """get() without blocking the event loop while the first load runs"""
+        if self.state in ("ready", "failed"):
+            return self._value
+        return await asyncio.to_thread(self.get)
+
+    def preload(self):
+        if self.state == "unloaded":
+            threading.Thread(target=self.get, name=f"preload-{self.name}", daemon=True).start()
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+
+def timed_import(module_name: str):
+    """importlib.import_module that records how long the import took"""
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    _import_seconds[module_name] = round(time.perf_counter() - start, 3)
+    return module
+
+
+def preload(names: str = "default"):
+    """
+    Starts background loads. `names` is "default" (every resource registered
+    with preload=True), "all", "none", or a comma-separated list of names.
+    """
+    names = (names or "none").strip().lower()
+    if names == "none":
+        return []
+    if names == "default":
+        selected = [r for r in _resources.values() if r.preload_by_default]
+    elif names == "all":
+        selected = list(_resources.values())
+    else:
+        wanted = {n.strip() for n in names.split(",") if n.strip()}
+        selected = [r for r in _resources.values() if r.name.lower() in wanted]
+    for resource in selected:
+        resource.preload()
+    return [r.name for r in selected]
+
+
+def readiness() -> dict:
+    return {name: resource.status() for name, resource in _resources.items()}
+
+
+def startup_report() -> dict:
+    return {
+        "import_seconds": dict(_import_seconds),
+        "load_seconds": {name: r.load_seconds for name, r in _resources.items()},
+    }
@@ -0,0 +1,70 @@
+# serving/metrics.py
+import sys
+import threading
+from collections import deque
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class RollingWindow:
+    """Keeps the last `size` observations and reports count/mean/percentiles over them"""
+
+    def __init__(self, size: int = 2048):
+        self._values = deque(maxlen=size)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def record(self, value: float):
+        with self._lock:
+            self._values.append(value)
+            self._total += 1
+
+    def snapshot(self, digits: int = 3) -> dict:
+        with self._lock:
+            values = sorted(self._values)
+            total = self._total
+        if not values:
+            return {"count": total, "window": 0, "mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "count": total,
+            "window": len(values),
+            "mean": round(sum(values) / len(values), digits),
+            "p50": round(percentile(values, 50), digits),
+            "p90": round(percentile(values, 90), digits),
+            "p99": round(percentile(values, 99), digits),
+            "max": round(values[-1], digits),
+        }
+
+
+def reset_peak_rss():
+    """Resets the process's resident-set high-water mark (Linux only; a no-op elsewhere)"""
+    # Linux keeps the parent's high-water mark across fork/exec; "5" resets it
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size in KiB since start or the last reset_peak_rss() (0 where it can't be read)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource  # Unix only; serving.metrics has to import on Windows too
+    except ImportError:
+        return 0
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from FarmAgent.app.agents import reasoner
+from FarmAgent.app.clients.llm import LLMGateway, StubBackend, register_backend
+
+
+class CountingBackend(StubBackend):
+    """The stub's canned answer, with the prompts it was asked to write"""
+
+    def __init__(self, latency_ms=20, fail=False):
+        super().__init__(latency_ms=latency_ms, tail_rate=0, error_rate=0)
+        self.fail = fail
+        self.prompts = []
+
+    async def generate(self, model, prompt):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        return await super().generate(model, prompt)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = CountingBackend()
+    register_backend("advice-test", lambda: backend)
+    monkeypatch.setattr(reasoner, "llm", LLMGateway(backend="advice-test", retries=0))
+    reasoner.advice_cache.clear()
+    reasoner.failed_profiles.clear()
+    yield backend
+    reasoner.advice_cache.clear()
+    reasoner.failed_profiles.clear()
+
+
+def farmer(name, crop="Rice", district="Patna"):
+    return {"name": name, "crop": crop, "growth_stage": "flowering", "district": district}
+
+
+WEATHER = {"current_temp": 31, "humidity": 88, "conditions": "light rain", "total_rainfall": 4, "wet_hours": 6}
+
+
+def risks(disease=0.62, pest=0.35, irrigation="reduce"):
+    return {"disease_risk": disease, "pest_risk": pest, "irrigation_action": irrigation}
+
+
+def run(coro, timeout=5):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+def test_risks_are_quantized_into_buckets():
+    assert reasoner.risk_bucket(0.60) == reasoner.risk_bucket(0.69) == 6
+    assert reasoner.risk_bucket(0.70) == 7
+    # 0.3 / 0.1 is 2.9999999999999996 in floating point
+    assert reasoner.risk_bucket(0.3) == 3
+
+
+@pytest.mark.parametrize("conditions, label", [
+    ("thunderstorm with light rain", "storm"),
+    ("light rain", "rain"),
+    ("overcast clouds", "cloudy"),
+    ("clear sky", "clear"),
+    ("volcanic ash", "other"),
+])
+def test_conditions_are_reduced_to_a_class(conditions, label):
+    assert reasoner.condition_class(conditions) == label
+
+
+def test_profile_key_ignores_name_and_formatting():
+    a = reasoner.advice_key(farmer("Asha"), WEATHER, risks(0.61, 0.31))
+    b = reasoner.advice_key(farmer("Ravi", crop=" rice "), {**WEATHER, "conditions": "moderate rain"}, risks(0.68, 0.39))
+    c = reasoner.advice_key(farmer("Asha"), WEATHER, risks(0.71, 0.31))
+    assert a == b != c
+
+
+def test_farmers_with_one_profile_share_one_llm_call(backend):
+    async def main():
+        return await asyncio.gather(*(
+            reasoner.generate_advice(farmer(name), WEATHER, risks(0.6 + i / 100))
+            for i, name in enumerate(["Asha", "Ravi", "Meena"])
+        ))
+
+    advice = run(main())
+
+    assert len(backend.prompts) == 1
+    assert "{name}" in backend.prompts[0] and "Asha" not in backend.prompts[0]
+    assert [text.split(":")[0] for text in advice] == ["Asha", "Ravi", "Meena"]
+
+    run(reasoner.generate_advice(farmer("Kiran"), WEATHER, risks(0.65)))
+    assert len(backend.prompts) == 1
+
+
+def test_a_different_bucket_gets_its_own_advice(backend):
+    run(reasoner.generate_advice(farmer("Asha"), WEATHER, risks(0.62)))
+    run(reasoner.generate_advice(farmer("Asha"), WEATHER, risks(0.82)))
+    run(reasoner.generate_advice(farmer("Asha", crop="Wheat"), WEATHER, risks(0.62)))
+    assert len(backend.prompts) == 3
+
+
+def test_failed_profiles_use_the_template_without_asking_again(backend):
+    backend.fail = True
+
+    first = run(reasoner.generate_advice(farmer("Asha"), WEATHER, risks()))
+    second = run(reasoner.generate_advice(farmer("Ravi"), WEATHER, risks()))
+
+    assert first == second == reasoner.template_advice(farmer("Asha"), risks())
+    assert len(backend.prompts) == 1
+    assert reasoner.advice_stats()["backed_off_profiles"] == 1
+
+
+def test_missing_name_falls_back_to_farmer():
+    assert reasoner.fill_name("{name}: irrigate less", {"name": None}) == "Farmer: irrigate less"
+    assert len(reasoner.fill_name("{name} " + "x" * 300, {"name": "Asha"})) == 160
+
+
+def test_cancelled_farmer_does_not_cancel_the_shared_call(backend):
+    backend.latency_s = 0.1
+
+    async def main():
+        impatient = asyncio.ensure_future(reasoner.generate_advice(farmer("Asha"), WEATHER, risks()))
+        patient = asyncio.ensure_future(reasoner.generate_advice(farmer("Ravi"), WEATHER, risks()))
+        await asyncio.sleep(0.02)
+        impatient.cancel()
+        return await patient
+
+    assert run(main()).startswith("Ravi:")
+    assert len(backend.prompts) == 1
+
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from Plant_Disease.batching import MicroBatcher
+from serving.executor import InferenceExecutor
+
+
+def double(inputs):
+    # One row out per row in, so each caller can check it got its own row back
+    return inputs.reshape(len(inputs), -1).sum(axis=1, keepdims=True) * 2
+
+
+def run(coro, timeout=5):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+def test_concurrent_requests_share_one_batch():
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(np.full((2, 2), i, dtype=np.float32)) for i in range(5)))
+
+    rows = run(main())
+
+    assert [float(row[0]) for row in rows] == [i * 8.0 for i in range(5)]
+    stats = batcher.stats()
+    assert stats["batches"] == 1 and stats["batch_size_histogram"] == {5: 1}
+
+
+def test_full_batch_is_dispatched_without_waiting_for_the_window():
+    batcher = MicroBatcher(double, max_batch_size=4, max_wait_ms=10_000)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(np.ones((1,), dtype=np.float32)) for _ in range(8)))
+
+    started = time.perf_counter()
+    rows = run(main())
+
+    assert len(rows) == 8
+    assert time.perf_counter() - started < 5
+    assert batcher.stats()["batch_size_histogram"] == {4: 2}
+
+
+def test_lone_request_is_flushed_when_the_window_closes():
+    batcher = MicroBatcher(double, max_batch_size=16, max_wait_ms=20)
+
+    async def main():
+        first = await batcher.submit(np.ones((1,), dtype=np.float32))
+        # Arrives after the first window closed, so it gets a batch of its own
+        second = await batcher.submit(np.full((1,), 3, dtype=np.float32))
+        return first, second
+
+    first, second = run(main())
+
+    assert float(first[0]) == 2.0 and float(second[0]) == 6.0
+    stats = batcher.stats()
+    assert stats["batches"] == 2 and stats["batch_size_histogram"] == {1: 2}
+
+
+def test_model_error_reaches_every_caller_in_the_batch():
+    def broken(inputs):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(broken, max_batch_size=4, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(
+            *(batcher.submit(np.ones((1,), dtype=np.float32)) for _ in range(3)), return_exceptions=True
+        )
+
+    errors = run(main())
+
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert batcher.stats()["batches"] == 1
+
+
+@pytest.mark.parametrize("executor", [None, InferenceExecutor(max_workers=1, max_queue=4)])
+def test_batches_run_off_the_event_loop(executor):
+    threads = set()
+
+    def record_thread(inputs):
+        threads.add(threading.current_thread().name)
+        return double(inputs)
+
+    batcher = MicroBatcher(record_thread, max_batch_size=2, max_wait_ms=5, executor=executor)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(np.ones((1,), dtype=np.float32)) for _ in range(2)))
+
+    run(main())
+
+    assert threads and threading.main_thread().name not in threads
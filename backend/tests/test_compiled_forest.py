@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from serving import compiled_forest
+from serving.compiled_forest import CompiledForest, CompiledPipeline, export_forest, load_compiled
+
+
+def make_data(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 6)).astype(np.float32)
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+
+def export(model, tmp_path):
+    out_dir = str(tmp_path / "model.forest")
+    export_forest(model, out_dir)
+    return load_compiled(out_dir)
+
+
+def batches(rows, seed=1):
+    # One row and SCALAR_WALK_MAX_ROWS rows take the scalar walk, the rest the vectorized one
+    X, _ = make_data(rows=300, seed=seed)
+    return [X[:1], X[:compiled_forest.SCALAR_WALK_MAX_ROWS], X[:rows]]
+
+
+@pytest.fixture
+def regressor():
+    X, y = make_data()
+    return RandomForestRegressor(n_estimators=15, max_depth=12, random_state=0).fit(X, y)
+
+
+@pytest.fixture
+def classifier():
+    X, y = make_data()
+    labels = np.array(["low", "mid", "high"])[np.digitize(y, [-1.5, 1.5])]
+    return RandomForestClassifier(n_estimators=15, random_state=0).fit(X, labels)
+
+
+def test_regressor_matches_sklearn(regressor, tmp_path):
+    compiled = export(regressor, tmp_path)
+    assert isinstance(compiled, CompiledForest)
+    for X in batches(300):
+        np.testing.assert_allclose(compiled.predict(X), regressor.predict(X), rtol=0, atol=1e-12)
+
+
+def test_classifier_matches_sklearn(classifier, tmp_path):
+    compiled = export(classifier, tmp_path)
+    assert list(compiled.classes_) == list(classifier.classes_)
+    for X in batches(300):
+        np.testing.assert_array_equal(compiled.predict(X), classifier.predict(X))
+        np.testing.assert_allclose(compiled.predict_proba(X), classifier.predict_proba(X), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("fixture", ["regressor", "classifier"])
+def test_scalar_and_vectorized_walks_agree(fixture, request, tmp_path):
+    compiled = export(request.getfixturevalue(fixture), tmp_path)
+    X = compiled._as_array(batches(300)[-1])
+    np.testing.assert_array_equal(compiled._apply_scalar(X), compiled._apply_vectorized(X))
+
+
+def test_pipeline_matches_sklearn(tmp_path):
+    X, y = make_data()
+    frame = pd.DataFrame(X, columns=[f"f{i}" for i in range(6)])
+    frame["crop"] = np.where(y > 0, "rice", np.where(y > -2, "wheat", "maize"))
+    model = Pipeline([
+        ("encode", ColumnTransformer(
+            [("crop", OneHotEncoder(handle_unknown="ignore"), ["crop"])], remainder="passthrough",
+        )),
+        ("forest", RandomForestRegressor(n_estimators=10, random_state=0)),
+    ]).fit(frame, y)
+
+    compiled = export(model, tmp_path)
+    assert isinstance(compiled, CompiledPipeline)
+    for rows in (1, compiled_forest.SCALAR_WALK_MAX_ROWS, 250):
+        np.testing.assert_allclose(compiled.predict(frame[:rows]), model.predict(frame[:rows]), rtol=0, atol=1e-12)
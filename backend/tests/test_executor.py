@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+from serving.executor import InferenceExecutor, InferenceQueueFull
+
+
+def run(coro, timeout=5):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+def test_jobs_beyond_workers_plus_queue_are_rejected():
+    executor = InferenceExecutor(max_workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def main():
+        jobs = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(10)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    results = run(main())
+
+    assert results.count(True) == 3
+    assert sum(isinstance(r, InferenceQueueFull) for r in results) == 7
+    stats = executor.stats()
+    assert stats["rejected"] == 7 and stats["completed"] == 3
+    assert stats["queue_length"] == 0 and stats["in_flight"] == 0
+
+
+def test_rejection_message_counts_waiting_and_running_jobs():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        jobs = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        try:
+            with pytest.raises(InferenceQueueFull, match=r"1 waiting, 1 running"):
+                await executor.run(release.wait, 5)
+        finally:
+            release.set()
+            await asyncio.gather(*jobs)
+
+    run(main())
+
+
+def test_cancelled_callers_free_their_slots():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        queued = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        running.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+        release.set()
+        # The running job still holds its slot until the worker finishes it
+        while executor.stats()["in_flight"]:
+            await asyncio.sleep(0.01)
+        return await asyncio.gather(*(executor.run(lambda: "ok") for _ in range(2)))
+
+    assert run(main()) == ["ok", "ok"]
+    stats = executor.stats()
+    assert stats["cancelled"] == 1 and stats["queue_length"] == 0 and stats["rejected"] == 0
+
+
+def test_failures_are_raised_to_the_caller_and_counted():
+    executor = InferenceExecutor(max_workers=2, max_queue=0)
+
+    def broken():
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError, match="bad input"):
+        run(executor.run(broken))
+    assert executor.stats()["failed"] == 1
+    assert run(executor.run(sum, [1, 2, 3])) == 6
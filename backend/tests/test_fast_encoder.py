@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+from serving.compiled_forest import export_forest, load_compiled
+from Yield_Prediction.engines import build_hgb_pipeline, build_rf_pipeline
+from Yield_Prediction.fast_encoder import CompiledYieldEncoder, compile_pipeline
+
+YIELD_FEATURES = ['State_Name', 'District_Name', 'Crop_Year', 'Season', 'Crop']
+STATES = {"Bihar": ["Patna", "Gaya"], "Kerala": ["Kollam", "Idukki", "Wayanad"]}
+SEASONS = ["Kharif", "Rabi", "Whole Year"]
+CROPS = ["rice", "wheat", "banana", "maize"]
+
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        state = rng.choice(list(STATES))
+        rows.append({
+            'State_Name': state,
+            'District_Name': rng.choice(STATES[state]),
+            'Crop_Year': int(rng.integers(1998, 2015)),
+            'Season': rng.choice(SEASONS),
+            'Crop': rng.choice(CROPS),
+        })
+    return rows
+
+
+def fit(pipeline, rows=300):
+    frame = pd.DataFrame(make_rows(rows), columns=YIELD_FEATURES)
+    log_yield = np.log1p(frame['Crop'].map({"rice": 2.5, "wheat": 3.0, "banana": 30.0, "maize": 2.0})
+                         * (1 + (frame['Crop_Year'] - 1998) / 50))
+    return pipeline.fit(frame, log_yield)
+
+
+def expected(pipeline, rows):
+    return pipeline.predict(pd.DataFrame(rows, columns=YIELD_FEATURES))
+
+
+@pytest.fixture(scope="module", params=["dense", "sparse"])
+def rf_pipeline(request):
+    return fit(build_rf_pipeline(encoding=request.param, n_estimators=10, n_jobs=1))
+
+
+def test_predictions_are_bit_identical_to_the_pipeline(rf_pipeline):
+    encoder = compile_pipeline(rf_pipeline)
+    assert isinstance(encoder, CompiledYieldEncoder)
+    for rows in (make_rows(1, seed=1), make_rows(7, seed=2), make_rows(200, seed=3)):
+        np.testing.assert_array_equal(encoder.predict(rows), expected(rf_pipeline, rows))
+
+
+def test_unseen_categories_encode_like_handle_unknown_ignore(rf_pipeline):
+    encoder = compile_pipeline(rf_pipeline)
+    rows = [
+        {**make_rows(1)[0], 'District_Name': "Nowhere"},
+        {**make_rows(1)[0], 'State_Name': "Atlantis", 'Crop': "coffee"},
+    ]
+    np.testing.assert_array_equal(encoder.predict(rows), expected(rf_pipeline, rows))
+
+
+def test_encoding_matches_the_column_transformer(rf_pipeline):
+    encoder = compile_pipeline(rf_pipeline)
+    rows = make_rows(5, seed=4)
+    transformed = rf_pipeline.steps[0][1].transform(pd.DataFrame(rows, columns=YIELD_FEATURES))
+    if hasattr(transformed, "toarray"):
+        transformed = transformed.toarray()
+    np.testing.assert_array_equal(encoder.encode(rows), transformed)
+
+
+def test_buffer_is_reused_across_batch_sizes(rf_pipeline):
+    encoder = compile_pipeline(rf_pipeline)
+    big, small = make_rows(6, seed=5), make_rows(2, seed=6)
+    encoder.encode(big)
+    # A shorter batch must not see the previous batch's one-hot bits
+    np.testing.assert_array_equal(encoder.predict(small), expected(rf_pipeline, small))
+
+
+def test_compiled_forest_pipeline_compiles_too(rf_pipeline, tmp_path):
+    out_dir = str(tmp_path / "yield.forest")
+    export_forest(rf_pipeline, out_dir)
+    compiled = load_compiled(out_dir)
+    encoder = CompiledYieldEncoder.from_pipeline(compiled)
+    rows = make_rows(20, seed=7)
+    assert encoder is not None
+    np.testing.assert_array_equal(encoder.predict(rows), expected(rf_pipeline, rows))
+
+
+def test_handle_unknown_error_raises_like_sklearn():
+    preprocessor = ColumnTransformer(
+        transformers=[('cat', OneHotEncoder(handle_unknown='error', sparse_output=False),
+                       ['State_Name', 'District_Name', 'Season', 'Crop'])],
+        remainder='passthrough',
+    )
+    pipeline = fit(Pipeline([('preprocessor', preprocessor),
+                             ('regressor', RandomForestRegressor(n_estimators=5, random_state=0))]))
+    encoder = compile_pipeline(pipeline)
+    assert encoder is not None
+    with pytest.raises(ValueError, match="unknown category"):
+        encoder.encode([{**make_rows(1)[0], 'Crop': "coffee"}])
+
+
+@pytest.mark.parametrize("build", [
+    lambda: build_hgb_pipeline(max_iter=5),
+    lambda: Pipeline([('preprocessor', ColumnTransformer(
+        [('cat', OneHotEncoder(drop='first', sparse_output=False), ['State_Name', 'District_Name', 'Season', 'Crop'])],
+        remainder='passthrough',
+    )), ('regressor', RandomForestRegressor(n_estimators=5, random_state=0))]),
+])
+def test_pipelines_it_cannot_reproduce_are_left_alone(build):
+    assert compile_pipeline(fit(build())) is None
@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+from FarmAgent.app.clients.llm import LLMError, LLMGateway, LLMTimeout, StubBackend, register_backend
+
+
+class ScriptedBackend(StubBackend):
+    """
+    The stub backend with its latency and failures scripted per attempt:
+    `script` holds one (delay seconds, error or None) per call, the last one repeating.
+    """
+
+    def __init__(self, script):
+        super().__init__(latency_ms=0, tail_rate=0, error_rate=0)
+        self.script = list(script)
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def generate(self, model, prompt):
+        delay, error = self.script[min(self.calls, len(self.script) - 1)]
+        self.calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+        if error is not None:
+            raise error
+        return await super().generate(model, prompt)
+
+
+def gateway(script, **options):
+    backend = ScriptedBackend(script)
+    register_backend("scripted", lambda: backend)
+    options = {"timeout": 1.0, "retries": 0, "retry_base_delay": 0.01, "hedge_after": 0, **options}
+    return LLMGateway(backend="scripted", **options), backend
+
+
+def run(coro, timeout=5):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+def test_answer_comes_from_the_stub():
+    llm, backend = gateway([(0, None)])
+    result = run(llm.generate("Advise {name} on rice"))
+    assert result.text.startswith("{name}: ") and backend.calls == 1
+    stats = llm.stats()
+    assert stats["succeeded"] == 1 and stats["attempts"] == 1 and stats["prompt_tokens"] > 0
+
+
+def test_deadline_caps_all_attempts_together():
+    llm, backend = gateway([(10, None)], timeout=5, retries=3)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(LLMTimeout):
+            await llm.generate("slow", deadline=0.2)
+        return loop.time() - started
+
+    assert run(main()) < 1
+    assert backend.calls == 1
+    stats = llm.stats()
+    assert stats["timeouts"] == 1 and stats["failed"] == 1
+
+
+def test_timed_out_attempt_is_retried():
+    llm, backend = gateway([(1, None), (0, None)], timeout=0.1, retries=2)
+    result = run(llm.generate("retry me"))
+    assert result.text and backend.calls == 2
+    stats = llm.stats()
+    assert stats["retries"] == 1 and stats["timeouts"] == 1 and stats["succeeded"] == 1
+
+
+def test_errors_are_retried_then_raised():
+    llm, backend = gateway([(0, RuntimeError("quota exceeded"))], retries=2)
+    with pytest.raises(LLMError, match="quota exceeded"):
+        run(llm.generate("failing"))
+    assert backend.calls == 3
+    stats = llm.stats()
+    assert stats["attempts"] == 3 and stats["retries"] == 2 and stats["errors"] == 3 and stats["failed"] == 1
+
+
+def test_slow_attempt_is_hedged_and_the_hedge_wins():
+    llm, backend = gateway([(0.5, None), (0, None)], hedge_after=0.05)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await llm.generate("hedge me")
+        return result, loop.time() - started
+
+    result, elapsed = run(main())
+
+    assert result.text and elapsed < 0.4
+    assert backend.calls == 2
+    stats = llm.stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1 and stats["retries"] == 0
+
+
+def test_fast_attempt_is_not_hedged():
+    llm, backend = gateway([(0, None)], hedge_after=0.2)
+    run(llm.generate("fast"))
+    assert backend.calls == 1 and llm.stats()["hedges"] == 0
+
+
+def test_concurrency_is_capped():
+    llm, backend = gateway([(0.05, None)], max_concurrency=2)
+
+    async def main():
+        return await asyncio.gather(*(llm.generate(f"prompt {i}") for i in range(6)))
+
+    assert len(run(main())) == 6
+    assert backend.peak_in_flight == 2
+
+
+def test_stream_retries_until_the_first_chunk():
+    class FlakyStream(StubBackend):
+        def __init__(self):
+            super().__init__(latency_ms=10, tail_rate=0, error_rate=0)
+            self.opened = 0
+
+        async def stream(self, model, prompt):
+            self.opened += 1
+            if self.opened == 1:
+                raise RuntimeError("connection reset")
+            async for chunk in super().stream(model, prompt):
+                yield chunk
+
+    backend = FlakyStream()
+    register_backend("flaky-stream", lambda: backend)
+    llm = LLMGateway(backend="flaky-stream", timeout=1.0, retries=1, retry_base_delay=0.01)
+
+    async def main():
+        return "".join([text async for text in llm.stream("Advise {name}")])
+
+    assert run(main()) == backend.answer("Advise {name}")
+    assert backend.opened == 2 and llm.stats()["retries"] == 1
+
+
+def test_unknown_backend_is_an_llm_error():
+    with pytest.raises(LLMError, match="Unknown LLM backend"):
+        run(LLMGateway(backend="nope", retries=0).generate("hi"))
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from FarmAgent.app.pipeline import Stage, StagedPipeline
+
+
+async def numbers(n):
+    for i in range(n):
+        yield i
+
+
+def run(pipeline, n=20, timeout=5):
+    # A stalled pipeline fails the test with a TimeoutError instead of hanging it
+    return asyncio.run(asyncio.wait_for(pipeline.run(numbers(n)), timeout))
+
+
+def failing_on(bad, exc):
+    async def stage(item):
+        await asyncio.sleep(0)
+        if item == bad:
+            raise exc
+        return item
+    return stage
+
+
+@pytest.mark.parametrize("exc", [asyncio.CancelledError(), ValueError("bad item")])
+def test_one_failing_item_does_not_stall_the_run(exc):
+    collected = []
+    pipeline = StagedPipeline("test", [
+        Stage("first", failing_on(7, exc), concurrency=3),
+        Stage("second", lambda item: item, concurrency=2),
+        Stage("sink", collected.append, concurrency=1, blocking=True),
+    ], queue_size=2)
+
+    stats = run(pipeline)
+
+    first, second, sink = stats["stages"]
+    assert first["failed"] == 1 and first["passed"] == 19
+    assert second["received"] == 19
+    assert sorted(collected) == [i for i in range(20) if i != 7]
+    assert not pipeline.running
+
+
+def test_cancelled_items_in_every_worker_still_finish():
+    pipeline = StagedPipeline("test", [
+        Stage("flaky", failing_on(0, asyncio.CancelledError()), concurrency=1),
+        Stage("next", lambda item: item, concurrency=1),
+    ], queue_size=1)
+
+    stats = run(pipeline, n=5)
+
+    assert stats["stages"][0]["failed"] == 1
+    assert stats["stages"][1]["passed"] == 4
+
+
+def test_cancelling_the_run_still_cancels_it():
+    async def slow(item):
+        await asyncio.sleep(10)
+        return item
+
+    pipeline = StagedPipeline("test", [Stage("slow", slow, concurrency=2)], queue_size=2)
+
+    async def cancel_midway():
+        task = asyncio.ensure_future(pipeline.run(numbers(10)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(cancel_midway(), 5))
+    assert not pipeline.running
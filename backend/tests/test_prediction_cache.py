@@ -0,0 +1,97 @@
+import numpy as np
+
+from Plant_Disease.cache import ENTRY_OVERHEAD_BYTES, PredictionCache, perceptual_hash
+
+
+def image(seed, size=128):
+    # An 8x8 grid of flat colour patches, so the low DCT frequencies carry real structure
+    coarse = np.random.default_rng(seed).uniform(0, 1, (8, 8, 3))
+    return np.kron(coarse, np.ones((size // 8, size // 8, 1))).astype(np.float32)
+
+
+def probabilities(i, classes=38):
+    row = np.zeros(classes, dtype=np.float32)
+    row[i % classes] = 1.0
+    return row
+
+
+def entry_bytes(cache, arr, classes=38):
+    return 4 * classes + len(cache.key_for(arr)) + ENTRY_OVERHEAD_BYTES
+
+
+def test_exact_mode_hits_only_the_identical_input():
+    cache = PredictionCache(mode="exact")
+    arr = image(1)
+    cache.put(cache.key_for(arr), probabilities(3))
+
+    hit = cache.get(cache.key_for(arr.copy()))
+    nudged = arr.copy()
+    nudged[0, 0, 0] += 1e-3
+
+    assert hit is not None and int(hit.argmax()) == 3
+    assert cache.get(cache.key_for(nudged)) is None
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1 and stats["misses"] == 1
+
+
+def test_exact_keys_are_namespaced_by_model():
+    arr = image(1)
+    assert PredictionCache(namespace="a").key_for(arr) != PredictionCache(namespace="b").key_for(arr)
+
+
+def test_phash_mode_hits_a_near_duplicate():
+    cache = PredictionCache(mode="phash")
+    arr = image(2)
+    # Re-saved with slightly lower contrast and re-quantized to 8 bits
+    recompressed = (np.round(arr * 255 * 0.98 + 2) / 255).astype(np.float32)
+    cache.put(cache.key_for(arr), probabilities(5))
+
+    hit = cache.get(cache.key_for(recompressed))
+
+    assert hit is not None and int(hit.argmax()) == 5
+    assert cache.get(cache.key_for(image(3))) is None
+
+
+def test_perceptual_hash_is_63_bits_in_16_hex_digits():
+    digest = perceptual_hash(image(4))
+    assert len(digest) == 16 and int(digest, 16) < 2 ** 63
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    arrays = [image(seed) for seed in range(3)]
+    probe = PredictionCache(mode="exact")
+    cache = PredictionCache(mode="exact", max_bytes=2 * entry_bytes(probe, arrays[0]))
+    keys = [cache.key_for(arr) for arr in arrays]
+
+    cache.put(keys[0], probabilities(0))
+    cache.put(keys[1], probabilities(1))
+    cache.get(keys[0])  # keys[1] is now the least recently used
+    cache.put(keys[2], probabilities(2))
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 2 and stats["bytes"] <= cache.max_bytes
+
+
+def test_disk_tier_refills_memory_after_a_restart(tmp_path):
+    arr = image(5)
+    cache = PredictionCache(mode="exact", disk_dir=str(tmp_path), namespace="model")
+    cache.put(cache.key_for(arr), probabilities(7))
+    cache._writer.shutdown(wait=True)
+
+    restarted = PredictionCache(mode="exact", disk_dir=str(tmp_path), namespace="model")
+    hit = restarted.get(restarted.key_for(arr))
+
+    assert hit is not None and int(hit.argmax()) == 7
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get(restarted.key_for(arr)) is not None
+    assert restarted.stats()["memory_hits"] == 1
+
+
+def test_off_mode_never_caches():
+    cache = PredictionCache(mode="off")
+    arr = image(6)
+    cache.put(cache.key_for(arr), probabilities(1))
+    assert cache.key_for(arr) is None and cache.get(cache.key_for(arr)) is None
+    assert cache.stats()["entries"] == 0
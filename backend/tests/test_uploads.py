@@ -0,0 +1,69 @@
+from fastapi import FastAPI, File, Request, UploadFile
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from Plant_Disease.uploads import UploadSizeLimitMiddleware
+
+CAP = 1024
+
+
+def make_client(cors=False):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"bytes": len(await request.body())}
+
+    @app.post("/form")
+    async def form(file: UploadFile = File(...)):
+        return {"bytes": len(await file.read())}
+
+    @app.post("/unlimited")
+    async def unlimited(request: Request):
+        return {"bytes": len(await request.body())}
+
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/upload": CAP, "/form/": CAP})
+    if cors:
+        # Same order as main.py: CORS outermost, so rejections still carry its headers
+        app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    return TestClient(app)
+
+
+def chunks(total, size=256):
+    for _ in range(total // size):
+        yield b"x" * size
+
+
+def test_body_within_the_cap_passes_through():
+    response = make_client().post("/upload", content=b"x" * CAP)
+    assert response.status_code == 200 and response.json() == {"bytes": CAP}
+
+
+def test_announced_content_length_over_the_cap_is_rejected():
+    response = make_client().post("/upload", content=b"x" * (CAP + 1))
+    assert response.status_code == 413
+    assert response.json()["error"] == f"Upload too large (limit {CAP} bytes)"
+
+
+def test_chunked_body_is_cut_off_once_it_passes_the_cap():
+    # No Content-Length, so only the running byte count can catch it
+    response = make_client().post("/upload", content=chunks(4 * CAP))
+    assert response.status_code == 413
+
+
+def test_multipart_upload_over_the_cap_is_rejected():
+    response = make_client().post("/form", files={"file": ("leaf.jpg", b"x" * (2 * CAP), "image/jpeg")})
+    assert response.status_code == 413
+
+
+def test_paths_without_a_cap_are_not_limited():
+    response = make_client().post("/unlimited", content=b"x" * (4 * CAP))
+    assert response.status_code == 200 and response.json() == {"bytes": 4 * CAP}
+
+
+def test_rejections_keep_cors_headers():
+    response = make_client(cors=True).post(
+        "/upload", content=b"x" * (CAP + 1), headers={"Origin": "https://farm.example"}
+    )
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == "*"
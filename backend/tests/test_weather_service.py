@@ -0,0 +1,129 @@
+import asyncio
+
+from FarmAgent.app.clients.weather_service import WeatherService, parse_owm
+
+
+def run(coro, timeout=5):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+def stub_upstream(service, delay=0.05, fail=False):
+    """Replaces the HTTP call; returns the list of points the upstream was asked about"""
+    calls = []
+
+    async def fetch(lat, lon):
+        calls.append((lat, lon))
+        call = len(calls)  # every upstream answer is distinguishable
+        await asyncio.sleep(delay)
+        if fail:
+            return None
+        return parse_owm({"main": {"temp": 30 + call, "humidity": 80}, "weather": [{"description": "light rain"}]})
+
+    service._fetch = fetch
+    return calls
+
+
+def test_concurrent_requests_for_one_cell_share_a_single_call():
+    service = WeatherService(grid_deg=0.1)
+    calls = stub_upstream(service)
+
+    async def main():
+        # Three farms within the same 0.1° cell, one in the next cell
+        return await asyncio.gather(
+            service.get(25.61, 85.11), service.get(25.63, 85.14), service.get(25.69, 85.19), service.get(25.71, 85.11),
+        )
+
+    results = run(main())
+
+    assert len(calls) == 2
+    assert results[0] == results[1] == results[2] != results[3]
+    stats = service.stats()
+    assert stats["requests"] == 4 and stats["coalesced"] == 2
+
+
+def test_answers_are_cached_for_the_ttl():
+    service = WeatherService(grid_deg=0.1, ttl=0.2)
+    calls = stub_upstream(service, delay=0)
+
+    async def main():
+        first = await service.get(10.01, 76.31)
+        again = await service.get(10.02, 76.32)
+        await asyncio.sleep(0.25)
+        expired = await service.get(10.01, 76.31)
+        return first, again, expired
+
+    first, again, expired = run(main())
+
+    assert len(calls) == 2
+    assert first == again and expired != first
+    assert service.stats()["cache_hits"] == 1
+
+
+def test_callers_get_their_own_copy_of_a_cached_answer():
+    service = WeatherService(grid_deg=0.1)
+    stub_upstream(service, delay=0)
+
+    async def main():
+        first = await service.get(10.01, 76.31)
+        first["current_temp"] = -100
+        return await service.get(10.01, 76.31)
+
+    assert run(main())["current_temp"] != -100
+
+
+def test_failed_lookups_fall_back_to_defaults_and_are_not_cached():
+    service = WeatherService(grid_deg=0.1)
+    calls = stub_upstream(service, delay=0, fail=True)
+
+    async def main():
+        return await service.get(10.01, 76.31), await service.get(10.01, 76.31)
+
+    first, second = run(main())
+
+    assert first == second == parse_owm({})
+    assert len(calls) == 2 and service.stats()["cached_cells"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_lookup_for_others():
+    service = WeatherService(grid_deg=0.1)
+    calls = stub_upstream(service, delay=0.1)
+
+    async def main():
+        impatient = asyncio.ensure_future(service.get(10.01, 76.31))
+        patient = asyncio.ensure_future(service.get(10.02, 76.32))
+        await asyncio.sleep(0.02)
+        impatient.cancel()
+        return await patient
+
+    weather = run(main())
+
+    assert len(calls) == 1 and weather["conditions"] == "light rain"
+
+
+def test_upstream_is_asked_about_the_cell_center():
+    service = WeatherService(grid_deg=0.5)
+    calls = stub_upstream(service, delay=0)
+    run(service.get(10.1, 76.4))
+    assert calls == [(10.25, 76.25)]
+
+
+def test_geohash_cells_group_nearby_points():
+    service = WeatherService(geohash_precision=5)
+    key, center_lat, center_lon = service.cell(25.6093, 85.1235)
+    assert len(key) == 5
+    assert service.cell(center_lat, center_lon)[0] == key
+    assert service.cell(25.9, 85.1235)[0] != key
+
+
+def test_session_from_a_finished_loop_is_released():
+    service = WeatherService()
+
+    async def session():
+        return service._get_session()
+
+    first = run(session())
+    second = run(session())
+
+    assert first.closed and second is not first
+    run(service.close())
+    assert second.closed and service._session is None